@@ -10,10 +10,18 @@ from fastapi import APIRouter
 
 from app.api.routes_flow import router as flow_router
 from app.api.routes_functions import router as functions_router
+from app.api.routes_health import router as health_router
+from app.api.routes_metrics import router as metrics_router
+from app.api.routes_prompts import router as prompts_router
 from app.api.routes_rag import router as rag_router
+from app.api.routes_usage import router as usage_router
 
 
 api_router = APIRouter()
 api_router.include_router(flow_router)
 api_router.include_router(rag_router)
 api_router.include_router(functions_router)
+api_router.include_router(metrics_router)
+api_router.include_router(health_router)
+api_router.include_router(prompts_router)
+api_router.include_router(usage_router)
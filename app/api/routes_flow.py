@@ -6,27 +6,202 @@ Extension points:
 - Add authentication or rate limiting for flow runs.
 """
 
-from fastapi import APIRouter, Depends
+import json
+import logging
+import math
+from collections.abc import AsyncIterator, Callable
+from typing import Any
 
-from app.core.dependencies import get_orchestration_service
-from app.models.flow import FlowRunRequest, FlowRunResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.core.admission import AdmissionController, AdmissionRejectedError
+from app.core.coalescing import LEADER, IdempotencyConflictError, RequestCoalescer, request_key
+from app.core.dependencies import (
+    get_admission_controller,
+    get_orchestration_service,
+    get_request_coalescer,
+)
+from app.core.usage import QuotaExceededError
+from app.models.flow import FlowBatchRequest, FlowRunRequest, FlowRunResponse
+from app.orchestration.dynamic import FlowDefinitionError
 from app.orchestration.service import OrchestrationService
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/flow", tags=["flow"])
 
 
 @router.post("/run", response_model=FlowRunResponse)
-def run_flow(
+async def run_flow(
     request: FlowRunRequest,
+    response: Response,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
     orchestration_service: OrchestrationService = Depends(get_orchestration_service),
+    admission: AdmissionController | None = Depends(get_admission_controller),
+    coalescer: RequestCoalescer | None = Depends(get_request_coalescer),
 ) -> FlowRunResponse:
     """
     Execute an orchestration flow and return its output.
 
+    Runs only after admission control grants a slot; refused requests get
+    429 (queue full) or 503 (queue timeout) with Retry-After. Identical
+    concurrent requests share one run, and a retry carrying the same
+    ``Idempotency-Key`` gets the stored response; ``X-Flow-Coalesced``
+    reports ``shared`` or ``replayed`` in those cases.
+
     Extension points:
     - Add request validation and audit logging.
-    - Add async execution and job tracking.
+    - Add background job tracking for long-running flows.
+    """
+
+    async def execute() -> FlowRunResponse:
+        if admission is None:
+            return await orchestration_service.arun_flow(request)
+        async with admission.slot():
+            return await orchestration_service.arun_flow(request)
+
+    try:
+        # Thread-less runs are stateless and the key covers tenant_id, so
+        # identical payloads (retries, double submits) can share one run.
+        if coalescer is None:
+            return await execute()
+        result, outcome = await coalescer.run(request_key(request), execute, idempotency_key)
+        if outcome != LEADER:
+            response.headers["X-Flow-Coalesced"] = outcome
+        return result
+    except IdempotencyConflictError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except AdmissionRejectedError as exc:
+        raise _admission_http_error(exc) from exc
+    except FlowDefinitionError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except QuotaExceededError as exc:
+        raise _quota_http_error(exc) from exc
+
+
+@router.post("/stream")
+async def stream_flow(
+    request: FlowRunRequest,
+    orchestration_service: OrchestrationService = Depends(get_orchestration_service),
+    admission: AdmissionController | None = Depends(get_admission_controller),
+) -> StreamingResponse:
     """
+    Execute an orchestration flow and stream analyst tokens as Server-Sent Events.
+
+    Emits ``token`` events while the analyst replies and a closing ``final``
+    event with the FlowRunResponse fields. The flow definition, the token
+    budget and admission are all checked before the response starts, so
+    those refusals get the same 400/429/503 as POST /flow/run. The
+    admission slot is held until the stream ends. Failures after that
+    become an ``error`` event.
+
+    Extension points:
+    - Add heartbeat events for idle proxies.
+    """
+
+    try:
+        orchestration_service.check_run(request)
+    except FlowDefinitionError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except QuotaExceededError as exc:
+        raise _quota_http_error(exc) from exc
+
+    release = _release_once(None, None)
+    if admission is not None:
+        try:
+            release = _release_once(admission, await admission.acquire())
+        except AdmissionRejectedError as exc:
+            raise _admission_http_error(exc) from exc
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in orchestration_service.astream_flow(request):
+                yield _format_sse(event["event"], event["data"])
+        except (FlowDefinitionError, QuotaExceededError) as exc:
+            yield _format_sse("error", {"detail": str(exc)})
+        except Exception:
+            logger.exception("Streamed flow run failed")
+            yield _format_sse("error", {"detail": "Flow run failed"})
+        finally:
+            release()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release),
+    )
+
+
+@router.post("/run_batch")
+async def run_flow_batch(
+    request: FlowBatchRequest,
+    orchestration_service: OrchestrationService = Depends(get_orchestration_service),
+) -> StreamingResponse:
+    """
+    Execute many flows with bounded concurrency and stream results as NDJSON.
+
+    Each line is a FlowBatchItemResult; lines arrive in completion order and
+    carry the item's ``index`` in the request.
+
+    Extension points:
+    - Add a job-based variant that stores results for later download.
+    """
+
+    async def result_stream() -> AsyncIterator[str]:
+        async for result in orchestration_service.astream_batch(request):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
+@router.get("/graphs/stats")
+def graph_cache_stats(
+    orchestration_service: OrchestrationService = Depends(get_orchestration_service),
+) -> dict[str, Any]:
+    """
+    Return compiled dynamic-graph cache statistics.
+
+    Extension points:
+    - Add an endpoint to evict or pre-compile specific flows.
+    """
+
+    return orchestration_service.graph_cache_stats()
+
+
+def _format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _admission_http_error(exc: AdmissionRejectedError) -> HTTPException:
+    return HTTPException(
+        status_code=exc.status_code,
+        detail=str(exc),
+        headers={"Retry-After": exc.retry_after_header},
+    )
+
+
+def _quota_http_error(exc: QuotaExceededError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(exc),
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+def _release_once(
+    admission: AdmissionController | None,
+    admitted_at: float | None,
+) -> Callable[[], None]:
+    released = admission is None
+
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            admission.release(admitted_at)
 
-    return orchestration_service.run_flow(request)
+    return release
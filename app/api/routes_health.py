@@ -0,0 +1,45 @@
+"""
+Liveness and readiness probe routes.
+
+Extension points:
+- Add dependency checks for the vector store and checkpointer.
+"""
+
+from fastapi import APIRouter, Depends, Response, status
+
+from app.core.dependencies import get_readiness
+from app.core.lifecycle import ReadinessState
+from app.models.health import ReadinessResponse
+
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+def live() -> dict[str, str]:
+    """
+    Report that the process is up and serving requests.
+
+    Extension points:
+    - Detect a stalled event loop and fail the probe.
+    """
+
+    return {"status": "ok"}
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+def ready(
+    response: Response,
+    readiness: ReadinessState = Depends(get_readiness),
+) -> ReadinessResponse:
+    """
+    Report whether startup warm-up finished; 503 until it has.
+
+    Extension points:
+    - Return 503 while the instance is overloaded or draining.
+    """
+
+    snapshot = readiness.snapshot()
+    if not snapshot.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return snapshot
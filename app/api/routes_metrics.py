@@ -0,0 +1,27 @@
+"""
+Prometheus metrics exposition route.
+
+Extension points:
+- Restrict access to internal networks or scrapers.
+- Add OpenMetrics content negotiation.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import CONTENT_TYPE, REGISTRY
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    """
+    Render all registered metrics in Prometheus text format.
+
+    Extension points:
+    - Add per-registry filtering via query parameters.
+    """
+
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
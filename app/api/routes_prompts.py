@@ -0,0 +1,46 @@
+"""
+Prompt registry inspection and hot-reload routes.
+
+Extension points:
+- Restrict reloads to operators.
+- Add endpoints to pin or roll back prompt versions.
+"""
+
+from fastapi import APIRouter, Depends
+
+from app.core.dependencies import get_prompt_registry
+from app.models.prompts import PromptInfo, PromptListResponse, PromptReloadResponse
+from app.orchestration.prompts import PromptRegistry
+
+
+router = APIRouter(prefix="/prompts", tags=["prompts"])
+
+
+@router.get("", response_model=PromptListResponse)
+def list_prompts(registry: PromptRegistry = Depends(get_prompt_registry)) -> PromptListResponse:
+    """
+    List registered prompts with their current versions.
+
+    Extension points:
+    - Filter by prompt ID prefix.
+    """
+
+    return PromptListResponse(
+        prompts=[
+            PromptInfo(prompt_id=prompt.prompt_id, version=prompt.version, origin=prompt.origin)
+            for prompt in registry.list_prompts()
+        ],
+        render_cache=registry.stats(),
+    )
+
+
+@router.post("/reload", response_model=PromptReloadResponse)
+def reload_prompts(registry: PromptRegistry = Depends(get_prompt_registry)) -> PromptReloadResponse:
+    """
+    Re-read changed prompt files so new versions apply without a restart.
+
+    Extension points:
+    - Trigger reloads from a file watcher instead of the API.
+    """
+
+    return PromptReloadResponse(changed=registry.reload())
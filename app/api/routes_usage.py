@@ -0,0 +1,33 @@
+"""
+Token usage and tenant budget routes.
+
+Extension points:
+- Restrict access to the tenant's own usage.
+- Add billing exports across windows.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.core.dependencies import get_usage_ledger
+from app.core.usage import UsageLedger
+from app.models.usage import TenantUsageResponse
+
+
+router = APIRouter(prefix="/usage", tags=["usage"])
+
+
+@router.get("/{tenant_id}", response_model=TenantUsageResponse)
+def tenant_usage(
+    tenant_id: str,
+    ledger: UsageLedger | None = Depends(get_usage_ledger),
+) -> TenantUsageResponse:
+    """
+    Return a tenant's token usage and remaining budget for the current window.
+
+    Extension points:
+    - Accept a window offset to query previous windows.
+    """
+
+    if ledger is None:
+        raise HTTPException(status_code=404, detail="Usage accounting is disabled.")
+    return TenantUsageResponse(**ledger.tenant_usage(tenant_id))
@@ -0,0 +1,10 @@
+"""
+Benchmarks for the flow API and flow_mcp against a mock LLM server.
+
+Extension points:
+- Add micro-benchmarks for prompt rendering and graph compilation.
+- Run the suite in CI and compare against the last release report.
+
+Example usage:
+    python -m app.benchmarks run --target api --spawn-mock --spawn-server --users 16
+"""
@@ -0,0 +1,286 @@
+"""
+Command line entry point for the benchmark suite.
+
+Subcommands:
+- ``mock``: serve the mock OpenAI-compatible LLM.
+- ``run``: replay conversations against the API or flow_mcp and save a JSON
+  report; optionally start the mock and an API server for the run, record or
+  replay LLM traffic through a cassette, and compare the result with a
+  baseline report.
+- ``compare``: compare two saved reports.
+
+Extension points:
+- Add a ``matrix`` subcommand sweeping users and worker counts.
+
+Example usage:
+    python -m app.benchmarks mock --port 8911 --mean-ms 400
+    python -m app.benchmarks run --target api --spawn-mock --spawn-server --workers 2
+    python -m app.benchmarks run --target mcp --spawn-mock --users 8 --duration 30
+    python -m app.benchmarks run --target api --spawn-server --cassette-dir cassettes/v1 \
+        --cassette-latency none
+    python -m app.benchmarks compare results/v1.json results/v2.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+import httpx
+
+from app.benchmarks.conversations import load_conversations
+from app.benchmarks.driver import LoadConfig, api_sender, mcp_sender, run_load
+from app.benchmarks.mock_llm import LatencyModel, MockLLMConfig, create_mock_app
+from app.benchmarks.report import CPUSampler, compare_reports, format_report, save_report
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    Parse benchmark subcommands and options.
+
+    Extension points:
+    - Read defaults from a benchmark profile file.
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m app.benchmarks", description="Flow benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    mock = commands.add_parser("mock", help="Serve the mock LLM.")
+    mock.add_argument("--host", default="127.0.0.1")
+    mock.add_argument("--port", type=int, default=8911)
+    _add_mock_options(mock)
+
+    run = commands.add_parser("run", help="Run a load test and save a JSON report.")
+    run.add_argument("--target", choices=("api", "mcp"), default="api")
+    run.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL (target api).")
+    run.add_argument("--llm-url", default="http://127.0.0.1:8911/v1", help="LLM base URL.")
+    run.add_argument("--users", type=int, default=8, help="Concurrent virtual users.")
+    run.add_argument("--duration", type=float, default=60.0, help="Run time limit in seconds.")
+    run.add_argument("--conversations", type=int, default=None, help="Conversations per user.")
+    run.add_argument("--think-ms", type=float, default=0.0, help="Pause between turns.")
+    run.add_argument("--conversation-file", default=None, help="JSONL conversations.")
+    run.add_argument(
+        "--no-unique-sessions",
+        action="store_true",
+        help="Send identical first turns (lets response caching and coalescing apply).",
+    )
+    run.add_argument("--server-pid", type=int, action="append", default=[], help="Worker PID for CPU.")
+    run.add_argument("--spawn-mock", action="store_true", help="Start the mock LLM for the run.")
+    run.add_argument("--spawn-server", action="store_true", help="Start uvicorn app.main:app.")
+    run.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn-server.")
+    run.add_argument("--out", default=None, help="Report path (default benchmark-results/...).")
+    run.add_argument("--baseline", default=None, help="Report to compare against.")
+    run.add_argument("--tolerance", type=float, default=0.1, help="Allowed regression fraction.")
+    run.add_argument("--cassette-dir", default=None, help="Record/replay LLM traffic here.")
+    run.add_argument("--cassette-mode", choices=("record", "replay", "auto"), default="replay")
+    run.add_argument("--cassette-latency", choices=("original", "none"), default="original")
+    _add_mock_options(run)
+
+    compare = commands.add_parser("compare", help="Compare two saved reports.")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--tolerance", type=float, default=0.1)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Run the selected subcommand and return the process exit code.
+
+    ``run`` and ``compare`` exit with 1 when a regression is found.
+
+    Extension points:
+    - Emit reports in JUnit format for CI.
+    """
+
+    args = parse_args(argv)
+    if args.command == "mock":
+        import uvicorn
+
+        uvicorn.run(create_mock_app(_mock_config(args)), host=args.host, port=args.port, log_level="warning")
+        return 0
+    if args.command == "compare":
+        return _print_regressions(
+            compare_reports(_load(args.baseline), _load(args.current), args.tolerance)
+        )
+    return _run(args)
+
+
+def _add_mock_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--latency",
+        choices=("constant", "uniform", "normal", "lognormal", "exponential"),
+        default="lognormal",
+    )
+    parser.add_argument("--mean-ms", type=float, default=300.0)
+    parser.add_argument("--stddev-ms", type=float, default=150.0)
+    parser.add_argument("--token-delay-ms", type=float, default=15.0)
+    parser.add_argument("--tool-call-ratio", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def _mock_config(args: argparse.Namespace) -> MockLLMConfig:
+    return MockLLMConfig(
+        latency=LatencyModel(
+            distribution=args.latency,
+            mean_ms=args.mean_ms,
+            stddev_ms=args.stddev_ms,
+            token_delay_ms=args.token_delay_ms,
+        ),
+        tool_call_ratio=args.tool_call_ratio,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+
+def _run(args: argparse.Namespace) -> int:
+    config = LoadConfig(
+        target=args.target,
+        users=args.users,
+        duration_seconds=args.duration,
+        conversations_per_user=args.conversations,
+        think_seconds=args.think_ms / 1000.0,
+        unique_sessions=not args.no_unique_sessions,
+    )
+    conversations = load_conversations(args.conversation_file)
+    with ExitStack() as stack:
+        llm_url = args.llm_url
+        if args.spawn_mock:
+            port = _free_port()
+            llm_url = f"http://127.0.0.1:{port}/v1"
+            mock_args = ["mock", "--port", str(port), *_mock_argv(args)]
+            stack.enter_context(_spawn([sys.executable, "-m", "app.benchmarks", *mock_args], {}))
+            _wait_ready(f"http://127.0.0.1:{port}/v1/models")
+
+        pids = list(args.server_pid)
+        llm_env = _cassette_env(args)
+        if args.target == "api":
+            url = args.url
+            if args.spawn_server:
+                port = _free_port()
+                url = f"http://127.0.0.1:{port}"
+                env = {
+                    "LLM_ORCH_DEFAULT_PROVIDER": "local",
+                    "LLM_ORCH_LOCAL_BASE_URL": llm_url,
+                    **llm_env,
+                }
+                command = [
+                    sys.executable, "-m", "uvicorn", "app.main:app",
+                    "--port", str(port), "--workers", str(args.workers), "--log-level", "warning",
+                ]
+                server = stack.enter_context(_spawn(command, env))
+                _wait_ready(f"{url}/health/ready", timeout=60.0)
+                pids.append(server.pid)
+            send, close = api_sender(url, config.request_timeout_seconds)
+            cpu = CPUSampler(pids)
+        else:
+            os.environ.setdefault("LLM_BASE_URL", llm_url)
+            os.environ.update(llm_env)
+            send, close = mcp_sender(config.users)
+            cpu = CPUSampler(pids)
+
+        async def drive() -> dict:
+            try:
+                return await run_load(config, conversations, send, cpu)
+            finally:
+                await close()
+
+        report = asyncio.run(drive())
+
+    report["config"]["llm_url"] = llm_url
+    if args.spawn_mock:
+        report["config"]["mock"] = _mock_config(args).model_dump()
+    if args.spawn_server:
+        report["config"]["workers"] = args.workers
+    if args.cassette_dir:
+        report["config"]["cassette"] = llm_env
+    out = args.out or f"benchmark-results/{args.target}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path = save_report(report, out)
+    print(format_report(report))
+    print(f"report: {path}")
+    if args.baseline:
+        return _print_regressions(compare_reports(_load(args.baseline), report, args.tolerance))
+    return 0
+
+
+def _cassette_env(args: argparse.Namespace) -> dict[str, str]:
+    if not args.cassette_dir:
+        return {}
+    return {
+        "LLM_ORCH_LLM_CASSETTE_MODE": args.cassette_mode,
+        "LLM_ORCH_LLM_CASSETTE_DIR": str(Path(args.cassette_dir).resolve()),
+        "LLM_ORCH_LLM_CASSETTE_LATENCY": args.cassette_latency,
+    }
+
+
+def _mock_argv(args: argparse.Namespace) -> list[str]:
+    argv = [
+        "--latency", args.latency,
+        "--mean-ms", str(args.mean_ms),
+        "--stddev-ms", str(args.stddev_ms),
+        "--token-delay-ms", str(args.token_delay_ms),
+        "--tool-call-ratio", str(args.tool_call_ratio),
+        "--error-rate", str(args.error_rate),
+    ]
+    if args.seed is not None:
+        argv += ["--seed", str(args.seed)]
+    return argv
+
+
+@contextmanager
+def _spawn(command: list[str], env: dict[str, str]) -> Iterator[subprocess.Popen]:
+    process = subprocess.Popen(command, env={**os.environ, **env})
+    try:
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _wait_ready(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f} s")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _load(path: str) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _print_regressions(regressions: list[str]) -> int:
+    if not regressions:
+        print("no regressions")
+        return 0
+    print("regressions:")
+    for line in regressions:
+        print(f"  {line}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Scripted multi-turn conversations replayed by the load driver.
+
+Each conversation walks an idea from the first description to the user's
+confirmation, which is the traffic shape of a real analyst session: short
+user turns, growing history, and a final turn that triggers submission and
+sizing.
+
+Extension points:
+- Load conversations from anonymized production transcripts (JSONL).
+- Add abandoned sessions that never reach confirmation.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class Conversation:
+    """
+    Named sequence of user turns.
+
+    Extension points:
+    - Add per-turn think time.
+    """
+
+    name: str
+    turns: tuple[str, ...]
+
+
+BUILTIN_CONVERSATIONS: tuple[Conversation, ...] = (
+    Conversation(
+        name="adres_guncelleme",
+        turns=(
+            "Müşteri adreslerini MERNIS'ten otomatik güncellemek istiyoruz.",
+            "Şubelerde adresler eski kaldığı için iadeli postalar artıyor.",
+            "Şu an şube personeli adresleri manuel olarak güncelliyor.",
+            "Adres Güncelleme Otomasyonu",
+            "Regülatif /Yasal",
+            "Gece çalışan bir entegrasyon MERNIS adresini çekip müşteri kaydını günceller.",
+            "Entegrasyon",
+            "Şube ve Çağrı Merkezi",
+            "Bireysel müşteriler",
+            "İade posta oranı",
+            "Evet",
+        ),
+    ),
+    Conversation(
+        name="kredi_on_onay",
+        turns=(
+            "Mobil uygulamada ihtiyaç kredisi için anlık ön onay göstermek istiyoruz.",
+            "Müşteriler başvuru sonucunu günler sonra öğreniyor ve vazgeçiyor.",
+            "Başvurular şubede toplanıp kredi tahsis ekibine iletiliyor.",
+            "Anlık Kredi Ön Onayı",
+            "Müşteri Deneyimini İyileştirme/Memnuniyetini Artırmak",
+            "Skor modeli çağrılıp limit mobil ana sayfada gösterilecek.",
+            "Yeni ekran",
+            "Mobil",
+            "Bireysel müşteriler",
+            "Başvuru dönüşüm oranı",
+            "Evet",
+        ),
+    ),
+    Conversation(
+        name="kisa_oturum",
+        turns=(
+            "Ticari müşterilere toplu ödeme dosyası yükleme ekranı lazım.",
+            "Evet",
+        ),
+    ),
+)
+
+
+def load_conversations(path: str | None = None) -> list[Conversation]:
+    """
+    Return conversations from a JSONL file, or the built-in set.
+
+    Each line is ``{"name": ..., "turns": [...]}``.
+
+    Extension points:
+    - Sample conversations with weights.
+    """
+
+    if path is None:
+        return list(BUILTIN_CONVERSATIONS)
+    conversations = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            item = json.loads(line)
+            conversations.append(Conversation(name=item["name"], turns=tuple(item["turns"])))
+    return conversations
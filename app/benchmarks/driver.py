@@ -0,0 +1,176 @@
+"""
+Load driver replaying multi-turn conversations against the flow targets.
+
+Virtual users each pick conversations round-robin and send their turns in
+order, waiting for every answer before the next turn, like a user in the
+Jira form. Session tags depend only on the user index and conversation
+number, so repeated runs send the same LLM requests and can be replayed from
+a cassette. Two targets are supported:
+
+- ``api``: ``POST /flow/run`` on a running server, one ``thread_id`` per
+  conversation, payloads built like ``app.scripts.cli_chat``;
+- ``mcp``: ``flow_mcp.flow_analyst_step_core`` in-process, on a thread pool
+  (the core is synchronous), which measures the MCP logic without stdio.
+
+Extension points:
+- Add an open-loop mode with a fixed arrival rate.
+- Add a ``/flow/stream`` target recording time to first token.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import itertools
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import httpx
+
+from app.benchmarks.conversations import Conversation
+from app.benchmarks.report import CPUSampler, Sample, summarize
+from app.scripts.cli_chat import append_history, build_payload, extract_output
+
+TurnSender = Callable[[str, str, list[dict[str, Any]]], Awaitable[str]]
+
+
+@dataclass(frozen=True)
+class LoadConfig:
+    """
+    Shape of one load run.
+
+    The run stops after ``duration_seconds`` or once every user finished
+    ``conversations_per_user`` conversations, whichever comes first.
+
+    Extension points:
+    - Ramp users up gradually.
+    """
+
+    target: str = "api"
+    users: int = 8
+    duration_seconds: float = 60.0
+    conversations_per_user: int | None = None
+    think_seconds: float = 0.0
+    unique_sessions: bool = True
+    request_timeout_seconds: float = 120.0
+
+
+async def run_load(
+    config: LoadConfig,
+    conversations: list[Conversation],
+    send_turn: TurnSender,
+    cpu: CPUSampler,
+) -> dict[str, Any]:
+    """
+    Drive ``send_turn`` with ``config.users`` concurrent users and return a report.
+
+    Extension points:
+    - Stop early when the error rate exceeds a threshold.
+    """
+
+    samples: list[Sample] = []
+    deadline = time.perf_counter() + config.duration_seconds
+
+    async def user(index: int) -> None:
+        for done in itertools.count():
+            if time.perf_counter() >= deadline:
+                return
+            if config.conversations_per_user is not None and done >= config.conversations_per_user:
+                return
+            conversation = conversations[(index + done * config.users) % len(conversations)]
+            session = f"u{index:03d}-c{done:04d}"
+            await _replay(conversation, session, config, send_turn, samples, deadline)
+
+    cpu.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(user(index) for index in range(config.users)))
+    wall = time.perf_counter() - started
+    return summarize(samples, wall, cpu.stop(), asdict(config))
+
+
+def api_sender(base_url: str, timeout: float) -> tuple[TurnSender, Callable[[], Awaitable[None]]]:
+    """
+    Return a turn sender for ``POST /flow/run`` and its close function.
+
+    Extension points:
+    - Send an ``Idempotency-Key`` per turn to exercise replay.
+    """
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    client = httpx.AsyncClient(base_url=base_url.rstrip("/"), timeout=timeout, limits=limits)
+
+    async def send(thread_id: str, question: str, history: list[dict[str, Any]]) -> str:
+        payload = build_payload(question, history, thread_id)
+        response = await client.post("/flow/run", json=payload)
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return extract_output(response.json())
+
+    return send, client.aclose
+
+
+def mcp_sender(workers: int) -> tuple[TurnSender, Callable[[], Awaitable[None]]]:
+    """
+    Return a turn sender calling ``flow_mcp.flow_analyst_step_core``.
+
+    ``flow_mcp`` reads LLM_BASE_URL and friends at import time, so set them
+    before the first call.
+
+    Extension points:
+    - Drive a real MCP server over stdio or HTTP instead.
+    """
+
+    flow_mcp = importlib.import_module("flow_mcp")
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bench-mcp")
+
+    async def send(thread_id: str, question: str, history: list[dict[str, Any]]) -> str:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            executor,
+            lambda: flow_mcp.flow_analyst_step_core(question=question, thread_id=thread_id),
+        )
+        return str(result.get("answer", ""))
+
+    async def close() -> None:
+        executor.shutdown(wait=False)
+
+    return send, close
+
+
+async def _replay(
+    conversation: Conversation,
+    session: str,
+    config: LoadConfig,
+    send_turn: TurnSender,
+    samples: list[Sample],
+    deadline: float,
+) -> None:
+    thread_id = str(uuid.uuid4())
+    history: list[dict[str, Any]] = []
+    for index, turn in enumerate(conversation.turns):
+        if time.perf_counter() >= deadline:
+            return
+        question = f"[{session}] {turn}" if config.unique_sessions and index == 0 else turn
+        started = time.perf_counter()
+        try:
+            answer = await send_turn(thread_id, question, history)
+        except Exception as exc:
+            samples.append(
+                Sample(conversation.name, index, time.perf_counter() - started, False, _error(exc))
+            )
+            return
+        samples.append(Sample(conversation.name, index, time.perf_counter() - started, True))
+        append_history(history, question, answer)
+        if config.think_seconds:
+            await asyncio.sleep(config.think_seconds)
+
+
+def _error(exc: Exception) -> str:
+    message = str(exc)
+    if message.startswith("HTTP "):
+        return message
+    return type(exc).__name__
@@ -0,0 +1,324 @@
+"""
+Mock OpenAI-compatible chat completions server for benchmarks.
+
+Serves ``POST /v1/chat/completions`` (plain, JSON mode, tool calls and SSE
+streaming) with latency drawn from a configurable distribution, so the API
+and flow_mcp can be load-tested without spending provider quota. Tool calls
+are deterministic:
+
+- a tool named in the most recent system message is called (flow_mcp's
+  "Form durumu" context names the step's tool);
+- ``score_complexity`` is called for sizing requests ("Talep Bilgileri");
+- ``submit_idea_form`` / ``confirm_form`` are called when the user confirms.
+
+Arguments are generated from each tool's JSON schema. Responses report usage
+with ``cached_tokens`` for the longest message prefix already seen, which
+approximates a provider prefix cache.
+
+Extension points:
+- Replay recorded provider responses instead of synthesized ones.
+- Model queueing inside the server (limited decode slots).
+
+Example usage:
+    python -m app.benchmarks mock --port 8911 --latency lognormal --mean-ms 400
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from typing import Any, Literal
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+
+CONFIRM_WORDS = ("evet", "onaylıyorum", "onayliyorum", "onay")
+CONFIRM_TOOLS = ("submit_idea_form", "confirm_form")
+SIZING_TOOL = "score_complexity"
+SIZING_MARKER = "Talep Bilgileri"
+
+
+class LatencyModel(BaseModel):
+    """
+    Latency distribution for one mock completion.
+
+    ``mean_ms`` and ``stddev_ms`` parameterize every distribution; streaming
+    responses add ``token_delay_ms`` between content chunks.
+
+    Extension points:
+    - Scale latency with prompt and completion length.
+    """
+
+    distribution: Literal["constant", "uniform", "normal", "lognormal", "exponential"] = Field(
+        default="lognormal",
+        description="Distribution of time to full response (or first chunk when streaming).",
+    )
+    mean_ms: float = Field(default=300.0, description="Mean latency in milliseconds.")
+    stddev_ms: float = Field(default=150.0, description="Latency standard deviation in milliseconds.")
+    token_delay_ms: float = Field(
+        default=15.0,
+        description="Delay between streamed content chunks in milliseconds.",
+    )
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        """
+        Draw one latency in seconds.
+
+        Extension points:
+        - Add bimodal distributions for cache hit/miss backends.
+        """
+
+        mean, std = self.mean_ms, self.stddev_ms
+        if self.distribution == "constant":
+            value = mean
+        elif self.distribution == "uniform":
+            value = rng.uniform(mean - std, mean + std)
+        elif self.distribution == "normal":
+            value = rng.gauss(mean, std)
+        elif self.distribution == "exponential":
+            value = rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+        else:
+            sigma2 = math.log(1.0 + (std / mean) ** 2) if mean > 0 else 0.0
+            value = rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2)) if mean > 0 else 0.0
+        return max(value, 0.0) / 1000.0
+
+
+class MockLLMConfig(BaseModel):
+    """
+    Behaviour of the mock completions server.
+
+    Extension points:
+    - Add per-model latency overrides.
+    """
+
+    latency: LatencyModel = Field(default_factory=LatencyModel, description="Latency model.")
+    tool_call_ratio: float = Field(
+        default=1.0,
+        description="Probability of calling the tool named in the system context.",
+    )
+    error_rate: float = Field(default=0.0, description="Fraction of requests answered with 503.")
+    seed: int | None = Field(default=None, description="Random seed for reproducible runs.")
+    prefix_cache_size: int = Field(
+        default=4096,
+        description="Message prefixes remembered for cached_tokens reporting.",
+    )
+
+
+def create_mock_app(config: MockLLMConfig | None = None) -> FastAPI:
+    """
+    Build the mock server application.
+
+    Extension points:
+    - Add the legacy ``/v1/completions`` endpoint.
+    """
+
+    config = config or MockLLMConfig()
+    rng = random.Random(config.seed)
+    prefixes: OrderedDict[str, None] = OrderedDict()
+    counters = {"requests": 0, "errors": 0, "tool_calls": 0, "streamed": 0}
+    app = FastAPI(title="Mock LLM")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> Any:
+        body = await request.json()
+        counters["requests"] += 1
+        await asyncio.sleep(config.latency.sample_seconds(rng))
+        if config.error_rate and rng.random() < config.error_rate:
+            counters["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "mock overload", "type": "server_error"}},
+                status_code=503,
+            )
+
+        messages = body.get("messages") or []
+        content, tool_call = _reply(body, messages, config.tool_call_ratio, rng)
+        if tool_call is not None:
+            counters["tool_calls"] += 1
+        usage = _usage(messages, content, tool_call, prefixes, config.prefix_cache_size)
+        model = body.get("model", "mock")
+        if body.get("stream"):
+            counters["streamed"] += 1
+            return StreamingResponse(
+                _stream(model, content, tool_call, usage, config.latency.token_delay_ms / 1000.0),
+                media_type="text/event-stream",
+            )
+        message: dict[str, Any] = {"role": "assistant", "content": content}
+        if tool_call is not None:
+            message["tool_calls"] = [tool_call]
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if tool_call else "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    @app.get("/v1/models")
+    async def models() -> dict[str, Any]:
+        return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+    @app.get("/stats")
+    async def stats() -> dict[str, int]:
+        return dict(counters)
+
+    return app
+
+
+def _reply(
+    body: dict[str, Any],
+    messages: list[dict[str, Any]],
+    tool_call_ratio: float,
+    rng: random.Random,
+) -> tuple[str | None, dict[str, Any] | None]:
+    last = _text(messages[-1]) if messages else ""
+    tools = {
+        tool["function"]["name"]: tool["function"].get("parameters") or {}
+        for tool in body.get("tools") or []
+        if isinstance(tool, dict) and "function" in tool
+    }
+    name = _pick_tool(tools, messages, last)
+    if name is not None and rng.random() < tool_call_ratio:
+        arguments = _sample_args(tools[name], tools[name], last)
+        call = {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)},
+        }
+        return None, call
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        answer = {"assistant_message": _answer(last), "extracted": {}, "is_confirmed": False}
+        return json.dumps(answer, ensure_ascii=False), None
+    return _answer(last), None
+
+
+def _pick_tool(tools: dict[str, Any], messages: list[dict[str, Any]], last: str) -> str | None:
+    if not tools:
+        return None
+    if SIZING_TOOL in tools and SIZING_MARKER in last:
+        return SIZING_TOOL
+    if last.strip().lower().rstrip(".!") in CONFIRM_WORDS:
+        for name in CONFIRM_TOOLS:
+            if name in tools:
+                return name
+    for message in reversed(messages):
+        if message.get("role") == "system":
+            text = _text(message)
+            named = [name for name in tools if name not in CONFIRM_TOOLS and name in text]
+            return named[0] if named else None
+    return None
+
+
+def _sample_args(schema: dict[str, Any], root: dict[str, Any], text: str) -> Any:
+    if "$ref" in schema:
+        ref = schema["$ref"].rsplit("/", 1)[-1]
+        return _sample_args(root.get("$defs", {}).get(ref, {}), root, text)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return _sample_args(options[0] if options else {}, root, text)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object" or "properties" in schema:
+        return {
+            name: _sample_args(prop, root, text)
+            for name, prop in (schema.get("properties") or {}).items()
+        }
+    if kind == "array":
+        return [_sample_args(schema.get("items") or {}, root, text)]
+    if kind == "boolean":
+        return True
+    if kind in ("integer", "number"):
+        low = schema.get("minimum", 1)
+        high = schema.get("maximum", max(low, 3))
+        return min(max(3, low), high)
+    return (text.strip() or "örnek değer")[:200]
+
+
+def _usage(
+    messages: list[dict[str, Any]],
+    content: str | None,
+    tool_call: dict[str, Any] | None,
+    prefixes: OrderedDict[str, None],
+    max_prefixes: int,
+) -> dict[str, Any]:
+    prompt_tokens = 0
+    cached_tokens = 0
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(json.dumps(message, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        prompt_tokens += _tokens(_text(message)) + 4
+        key = digest.hexdigest()
+        if key in prefixes:
+            prefixes.move_to_end(key)
+            cached_tokens = prompt_tokens
+        else:
+            prefixes[key] = None
+    while len(prefixes) > max_prefixes:
+        prefixes.popitem(last=False)
+    completion = content or (tool_call or {}).get("function", {}).get("arguments", "")
+    completion_tokens = _tokens(completion)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+    }
+
+
+async def _stream(
+    model: str,
+    content: str | None,
+    tool_call: dict[str, Any] | None,
+    usage: dict[str, Any],
+    token_delay: float,
+) -> AsyncIterator[str]:
+    base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion.chunk",
+            "created": int(time.time()), "model": model}
+
+    def chunk(delta: dict[str, Any], finish: str | None = None, **extra: Any) -> str:
+        payload = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **extra}
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    for word in (content or "").split(" ") if content else []:
+        await asyncio.sleep(token_delay)
+        yield chunk({"content": word + " "})
+    if tool_call is not None:
+        yield chunk({"tool_calls": [{"index": 0, **tool_call}]})
+    yield chunk({}, "tool_calls" if tool_call else "stop", usage=usage)
+    yield "data: [DONE]\n\n"
+
+
+def _answer(last: str) -> str:
+    return (
+        f"Teşekkürler, '{last[:60]}' bilgisini not aldım. Bir sonraki adım için "
+        "biraz daha detay paylaşır mısınız? Örneğin hangi kanallar etkilenecek?"
+    )
+
+
+def _text(message: dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(str(part.get("text", "")) for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4 + 1 if text else 0
@@ -0,0 +1,282 @@
+"""
+Benchmark result summaries, JSON reports and regression comparison.
+
+A report holds latency percentiles (p50/p95/p99), throughput, error counts
+and worker CPU for one run, plus the run's configuration and git revision,
+so reports saved per release can be compared with ``compare_reports``.
+
+Extension points:
+- Export reports to a time-series store for dashboards.
+- Add per-turn latency breakdowns.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Sample:
+    """
+    Outcome of one benchmarked request.
+
+    Extension points:
+    - Record time to first token for streaming targets.
+    """
+
+    conversation: str
+    turn: int
+    seconds: float
+    ok: bool
+    error: str | None = None
+
+
+class CPUSampler:
+    """
+    Measure CPU seconds used by worker processes during a run.
+
+    With ``pids`` the processes (and their child processes, e.g. uvicorn
+    workers) are read from ``/proc``; without, the current process is
+    measured, which suits in-process targets.
+
+    Extension points:
+    - Read cgroup CPU usage for containerized workers.
+    """
+
+    def __init__(self, pids: list[int] | None = None) -> None:
+        self._pids = pids or []
+        self._start_cpu: float | None = None
+        self._start_wall = 0.0
+
+    def start(self) -> None:
+        """
+        Record the starting CPU and wall-clock time.
+
+        Extension points:
+        - Sample periodically to report peak usage.
+        """
+
+        self._start_cpu = self._cpu_seconds()
+        self._start_wall = time.perf_counter()
+
+    def stop(self) -> dict[str, Any]:
+        """
+        Return CPU seconds and average cores used since ``start``.
+
+        Values are None when CPU time cannot be read on this platform.
+
+        Extension points:
+        - Report user and system time separately.
+        """
+
+        wall = time.perf_counter() - self._start_wall
+        end_cpu = self._cpu_seconds()
+        if self._start_cpu is None or end_cpu is None:
+            return {"scope": self._scope(), "cpu_seconds": None, "cpu_cores": None}
+        used = end_cpu - self._start_cpu
+        return {
+            "scope": self._scope(),
+            "cpu_seconds": round(used, 3),
+            "cpu_cores": round(used / wall, 3) if wall > 0 else None,
+        }
+
+    def _scope(self) -> str:
+        return "pids:" + ",".join(map(str, self._pids)) if self._pids else "driver_process"
+
+    def _cpu_seconds(self) -> float | None:
+        if not self._pids:
+            return time.process_time()
+        try:
+            ticks = os.sysconf("SC_CLK_TCK")
+            return sum(_proc_ticks(pid) for pid in _with_children(self._pids)) / ticks
+        except (OSError, ValueError, AttributeError):
+            # Not Linux, or the measured process is gone.
+            return None
+
+
+def summarize(
+    samples: list[Sample],
+    wall_seconds: float,
+    cpu: dict[str, Any],
+    config: dict[str, Any],
+) -> dict[str, Any]:
+    """
+    Build the JSON-serializable report for one run.
+
+    Latency percentiles cover successful requests only; failures are
+    counted by error message.
+
+    Extension points:
+    - Add HDR histograms for tail analysis.
+    """
+
+    latencies = sorted(sample.seconds for sample in samples if sample.ok)
+    errors: dict[str, int] = {}
+    for sample in samples:
+        if not sample.ok:
+            errors[sample.error or "error"] = errors.get(sample.error or "error", 0) + 1
+    conversations = {sample.conversation for sample in samples}
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": config,
+        "requests": len(samples),
+        "succeeded": len(latencies),
+        "failed": len(samples) - len(latencies),
+        "errors": errors,
+        "conversations": sorted(conversations),
+        "wall_seconds": round(wall_seconds, 3),
+        "requests_per_second": round(len(latencies) / wall_seconds, 3) if wall_seconds else 0.0,
+        "latency_ms": {
+            "mean": _ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": _ms(percentile(latencies, 50)),
+            "p95": _ms(percentile(latencies, 95)),
+            "p99": _ms(percentile(latencies, 99)),
+            "max": _ms(latencies[-1]) if latencies else None,
+        },
+        "cpu": cpu,
+    }
+
+
+def percentile(sorted_values: list[float], pct: float) -> float | None:
+    """
+    Return the nearest-rank percentile of already sorted values.
+
+    Extension points:
+    - Interpolate between ranks for small samples.
+    """
+
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def save_report(report: dict[str, Any], path: str) -> Path:
+    """
+    Write a report as indented JSON, creating parent directories.
+
+    Extension points:
+    - Upload reports to shared storage.
+    """
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return target
+
+
+def compare_reports(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    tolerance: float = 0.1,
+) -> list[str]:
+    """
+    Return regressions of ``current`` against ``baseline``.
+
+    Latency percentiles and CPU seconds per request may grow, and
+    throughput may drop, by at most ``tolerance`` (a fraction) before
+    they are reported.
+
+    Extension points:
+    - Use confidence intervals over repeated runs instead of one threshold.
+    """
+
+    regressions = []
+    for key in ("p50", "p95", "p99"):
+        old = baseline["latency_ms"].get(key)
+        new = current["latency_ms"].get(key)
+        if old and new and new > old * (1 + tolerance):
+            regressions.append(f"latency {key}: {old:.1f} ms -> {new:.1f} ms")
+    old_rps, new_rps = baseline["requests_per_second"], current["requests_per_second"]
+    if old_rps and new_rps < old_rps * (1 - tolerance):
+        regressions.append(f"throughput: {old_rps:.2f} req/s -> {new_rps:.2f} req/s")
+    old_cpu, new_cpu = _cpu_per_request(baseline), _cpu_per_request(current)
+    if old_cpu and new_cpu and new_cpu > old_cpu * (1 + tolerance):
+        regressions.append(f"cpu per request: {old_cpu * 1000:.1f} ms -> {new_cpu * 1000:.1f} ms")
+    if current["failed"] > baseline["failed"]:
+        regressions.append(f"failed requests: {baseline['failed']} -> {current['failed']}")
+    return regressions
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """
+    Return a one-screen text summary of a report.
+
+    Extension points:
+    - Render a Markdown table for release notes.
+    """
+
+    latency = report["latency_ms"]
+    cpu = report["cpu"]
+    lines = [
+        f"target: {report['config'].get('target')}  revision: {report['git_revision'] or '-'}",
+        f"requests: {report['requests']} ok / {report['failed']} failed "
+        f"in {report['wall_seconds']} s ({report['requests_per_second']} req/s)",
+        "latency ms: "
+        + "  ".join(f"{key}={_fmt(latency[key])}" for key in ("mean", "p50", "p95", "p99", "max")),
+        f"cpu ({cpu['scope']}): {_fmt(cpu['cpu_seconds'])} s, {_fmt(cpu['cpu_cores'])} cores",
+    ]
+    if report["errors"]:
+        lines.append("errors: " + ", ".join(f"{k} x{v}" for k, v in report["errors"].items()))
+    return "\n".join(lines)
+
+
+def _cpu_per_request(report: dict[str, Any]) -> float | None:
+    seconds = report["cpu"].get("cpu_seconds")
+    if seconds is None or not report["succeeded"]:
+        return None
+    return seconds / report["succeeded"]
+
+
+def _proc_ticks(pid: int) -> int:
+    stat = Path(f"/proc/{pid}/stat").read_text()
+    fields = stat[stat.rindex(")") + 2 :].split()
+    return int(fields[11]) + int(fields[12])
+
+
+def _with_children(pids: list[int]) -> list[int]:
+    found: list[int] = []
+    pending = list(pids)
+    while pending:
+        pid = pending.pop()
+        if pid in found:
+            continue
+        found.append(pid)
+        for task in Path(f"/proc/{pid}/task").iterdir():
+            try:
+                children = (task / "children").read_text().split()
+            except FileNotFoundError:
+                continue
+            pending.extend(int(child) for child in children)
+    return found
+
+
+def _git_revision() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000.0, 2)
+
+
+def _fmt(value: Any) -> str:
+    return "-" if value is None else str(value)
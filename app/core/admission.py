@@ -0,0 +1,262 @@
+"""
+Admission control for flow runs: bounded concurrency plus a bounded queue.
+
+At most ``limit`` flows run at once. Further requests wait in a FIFO queue
+of at most ``max_queue`` entries for up to ``max_queue_seconds``. When the
+queue is full a request is refused immediately (429); when it waits too long
+it is refused with 503. Both carry a Retry-After estimate from the recent
+service time. Under a burst, admitted requests keep their normal latency
+instead of every request slowing down and timing out together.
+
+The controller is thread-safe and not bound to one event loop, so it works
+with several loops (tests, worker threads) as well as uvicorn's.
+
+Extension points:
+- Add priority classes with separate queues.
+- Adapt ``limit`` from observed latency (see ``set_limit``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import Settings
+from app.core.metrics import ADMISSION_QUEUE_SECONDS, ADMISSION_REJECTIONS
+
+
+class AdmissionRejectedError(RuntimeError):
+    """
+    Raised when a request is not admitted.
+
+    ``status_code`` is 429 when the queue is full and 503 when the request
+    timed out in the queue.
+
+    Extension points:
+    - Add the estimated queue position for clients that want to wait.
+    """
+
+    def __init__(self, reason: str, status_code: int, retry_after: float) -> None:
+        super().__init__(f"Request not admitted: {reason.replace('_', ' ')}")
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """
+        Return Retry-After as whole seconds (at least one).
+
+        Extension points:
+        - Add jitter so rejected clients do not retry in lockstep.
+        """
+
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+@dataclass
+class _Waiter:
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    granted: bool = False
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded, time-limited FIFO wait queue.
+
+    Extension points:
+    - Drop the oldest waiter instead of rejecting new ones (LIFO shedding).
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        max_queue: int,
+        max_queue_seconds: float,
+        ewma_alpha: float = 0.2,
+    ) -> None:
+        """
+        Initialize an idle controller.
+
+        Extension points:
+        - Seed the service-time estimate from configuration.
+        """
+
+        self._limit = max(limit, 1)
+        self._max_queue = max_queue
+        self._max_queue_seconds = max_queue_seconds
+        self._ewma_alpha = ewma_alpha
+        self._service_seconds: float | None = None
+        self._in_flight = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """
+        Return the current concurrency limit.
+
+        Extension points:
+        - Expose the configured ceiling alongside the live limit.
+        """
+
+        return self._limit
+
+    def set_limit(self, limit: int) -> None:
+        """
+        Change the concurrency limit; raising it admits queued requests.
+
+        Lowering it never interrupts running requests; new admissions wait
+        until the in-flight count drops below the new limit.
+
+        Extension points:
+        - Rate-limit changes to avoid oscillation.
+        """
+
+        with self._lock:
+            self._limit = max(limit, 1)
+            self._dispatch()
+
+    async def acquire(self) -> float:
+        """
+        Wait for a slot and return the admission time for ``release``.
+
+        Raises ``AdmissionRejectedError`` when the queue is full or the wait
+        exceeds ``max_queue_seconds``.
+
+        Extension points:
+        - Accept a per-request deadline shorter than the queue limit.
+        """
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_flight < self._limit and not self._waiters:
+                self._in_flight += 1
+                ADMISSION_QUEUE_SECONDS.labels().observe(0.0)
+                return time.perf_counter()
+            if len(self._waiters) >= self._max_queue:
+                rejected = self._rejection("queue_full", 429)
+            else:
+                waiter = _Waiter(loop, loop.create_future())
+                self._waiters.append(waiter)
+                rejected = None
+        if rejected is not None:
+            raise rejected
+
+        try:
+            await asyncio.wait_for(waiter.future, timeout=self._max_queue_seconds)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+                    rejected = self._rejection("queue_timeout", 503)
+            if rejected is not None:
+                raise rejected from None
+        except BaseException:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self.release(None)
+            raise
+        now = time.perf_counter()
+        ADMISSION_QUEUE_SECONDS.labels().observe(now - waiter.enqueued)
+        return now
+
+    def release(self, admitted_at: float | None) -> None:
+        """
+        Free a slot and hand it to the next queued request.
+
+        ``admitted_at`` (from ``acquire``) updates the service-time estimate
+        used for Retry-After; pass None for requests that did not run.
+
+        Extension points:
+        - Report service time to an adaptive limiter.
+        """
+
+        with self._lock:
+            self._in_flight -= 1
+            if admitted_at is not None:
+                elapsed = time.perf_counter() - admitted_at
+                if self._service_seconds is None:
+                    self._service_seconds = elapsed
+                else:
+                    self._service_seconds += self._ewma_alpha * (elapsed - self._service_seconds)
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold an admission slot for the duration of the block.
+
+        Extension points:
+        - Attach the queue wait to the request trace.
+        """
+
+        admitted_at = await self.acquire()
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the limit, in-flight count, queue depth and service estimate.
+
+        Extension points:
+        - Add the age of the oldest waiter.
+        """
+
+        with self._lock:
+            return {
+                "limit": self._limit,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "max_queue": self._max_queue,
+                "service_seconds": self._service_seconds or 0.0,
+            }
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._in_flight < self._limit:
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            self._in_flight += 1
+            waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+
+    def _rejection(self, reason: str, status_code: int) -> AdmissionRejectedError:
+        ADMISSION_REJECTIONS.labels(reason).inc()
+        service = self._service_seconds or 1.0
+        drain = (len(self._waiters) + 1) * service / self._limit
+        return AdmissionRejectedError(reason, status_code, drain)
+
+
+def build_admission_controller(settings: Settings) -> AdmissionController | None:
+    """
+    Build the configured admission controller, or None when disabled.
+
+    Extension points:
+    - Build separate controllers per route or tenant.
+    """
+
+    if not settings.admission_enabled:
+        return None
+    return AdmissionController(
+        limit=settings.admission_max_concurrency,
+        max_queue=settings.admission_max_queue,
+        max_queue_seconds=settings.admission_max_queue_seconds,
+    )
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,193 @@
+"""
+Singleflight coalescing and idempotency keys for flow runs.
+
+Concurrent requests with the same canonical payload hash share one execution:
+the first caller starts it and every identical caller awaits the same result
+(or error). The shared run is shielded, so a caller that disconnects does not
+cancel it for the others. Callers that send an idempotency key also have the
+successful result stored for ``ttl_seconds``; a retry with the same key and
+payload inside that window gets the stored result without running again.
+
+Extension points:
+- Store idempotent results in a shared backend for multi-instance setups.
+- Coalesce streaming runs by fanning out their events.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel
+
+from app.core.config import Settings
+from app.core.metrics import FLOW_COALESCED
+
+T = TypeVar("T")
+
+LEADER = "leader"
+SHARED = "shared"
+REPLAYED = "replayed"
+
+
+class IdempotencyConflictError(ValueError):
+    """
+    Raised when an idempotency key is reused with a different payload.
+
+    Extension points:
+    - Include the stored payload hash for debugging.
+    """
+
+    def __init__(self, idempotency_key: str) -> None:
+        super().__init__(
+            f"Idempotency key '{idempotency_key}' was already used with a different request"
+        )
+        self.idempotency_key = idempotency_key
+
+
+class RequestCoalescer(Generic[T]):
+    """
+    Deduplicate identical in-flight requests and replay idempotent results.
+
+    Extension points:
+    - Add a short post-completion window for callers without keys.
+    """
+
+    def __init__(self, ttl_seconds: float = 600.0, max_entries: int = 1024) -> None:
+        """
+        Initialize empty in-flight and idempotency tables.
+
+        Extension points:
+        - Evict stored results by size instead of count.
+        """
+
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._in_flight: dict[str, tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._stored: OrderedDict[str, tuple[str, float, T]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def run(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[T]],
+        idempotency_key: str | None = None,
+    ) -> tuple[T, str]:
+        """
+        Return the result for ``key`` and how it was obtained.
+
+        The second element is ``leader`` (this call ran it), ``shared``
+        (joined an identical in-flight run) or ``replayed`` (stored result
+        for ``idempotency_key``). Raises ``IdempotencyConflictError`` when
+        the key was stored for a different payload.
+
+        Extension points:
+        - Bypass coalescing for requests that opt out.
+        """
+
+        if idempotency_key is not None:
+            stored = self._lookup(idempotency_key, key)
+            if stored is not None:
+                FLOW_COALESCED.labels(REPLAYED).inc()
+                return stored[0], REPLAYED
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None or flight[0] is not loop
+            if leader:
+                task = loop.create_task(self._execute(key, factory))
+                task.add_done_callback(_retrieve_exception)
+                self._in_flight[key] = (loop, task)
+            else:
+                task = flight[1]
+        outcome = LEADER if leader else SHARED
+        FLOW_COALESCED.labels(outcome).inc()
+        result = await asyncio.shield(task)
+        if idempotency_key is not None:
+            self._store(idempotency_key, key, result)
+        return result, outcome
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return the number of in-flight runs and stored idempotent results.
+
+        Extension points:
+        - Add the number of callers waiting per run.
+        """
+
+        with self._lock:
+            return {"in_flight": len(self._in_flight), "stored": len(self._stored)}
+
+    async def _execute(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        try:
+            return await factory()
+        finally:
+            with self._lock:
+                if self._in_flight.get(key, (None, None))[1] is asyncio.current_task():
+                    del self._in_flight[key]
+
+    def _lookup(self, idempotency_key: str, key: str) -> tuple[T] | None:
+        with self._lock:
+            entry = self._stored.get(idempotency_key)
+            if entry is None:
+                return None
+            stored_key, expires, result = entry
+            if expires <= time.monotonic():
+                del self._stored[idempotency_key]
+                return None
+        if stored_key != key:
+            raise IdempotencyConflictError(idempotency_key)
+        return (result,)
+
+    def _store(self, idempotency_key: str, key: str, result: T) -> None:
+        with self._lock:
+            if idempotency_key in self._stored:
+                return
+            self._stored[idempotency_key] = (key, time.monotonic() + self._ttl_seconds, result)
+            while len(self._stored) > self._max_entries:
+                self._stored.popitem(last=False)
+
+
+def request_key(request: BaseModel) -> str:
+    """
+    Return a canonical hash of a request model.
+
+    Field order and JSON whitespace do not matter; defaults are included,
+    so an omitted field and its explicit default hash the same.
+
+    Extension points:
+    - Exclude fields that do not affect the result.
+    """
+
+    payload: Any = request.model_dump(mode="json")
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def build_request_coalescer(settings: Settings) -> RequestCoalescer | None:
+    """
+    Build the configured flow request coalescer, or None when disabled.
+
+    Extension points:
+    - Use separate coalescers per route.
+    """
+
+    if not settings.flow_coalescing_enabled:
+        return None
+    return RequestCoalescer(
+        ttl_seconds=settings.flow_idempotency_ttl_seconds,
+        max_entries=settings.flow_idempotency_max_entries,
+    )
+
+
+def _retrieve_exception(task: asyncio.Future) -> None:
+    # Callers that gave up no longer await the task; avoid "never retrieved" noise.
+    if not task.cancelled():
+        task.exception()
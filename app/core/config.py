@@ -31,6 +31,7 @@ class Settings(BaseSettings):
     environment: str = "dev"
     ssl_verify: bool = True
     llm_max_tokens: int | None = None
+    llm_temperature: float | None = None
     default_provider: str = "openai"
     default_openai_model: str = "gpt-4o"
     default_local_model: str = "llama3"
@@ -39,10 +40,78 @@ class Settings(BaseSettings):
     local_api_key: str = "dummy"
     azure_api_key: str | None = None
     openai_base_url: str = "https://api.openai.com/v1"
+    openai_base_urls: list[str] = []
     local_base_url: str = "http://localhost:8000/v1"
+    local_base_urls: list[str] = []
     azure_endpoint: str | None = None
     azure_api_version: str = "2024-02-15-preview"
     azure_deployment_name: str | None = None
     rag_default_collection: str = "default"
     chroma_persist_path: str = "./.chroma"
+    checkpoint_backend: str = "sqlite"
+    checkpoint_path: str = "./.checkpoints.sqlite"
+    checkpoint_ttl_seconds: int = 7 * 24 * 3600
+    history_token_budget: int = 4000
+    history_keep_turns: int = 6
+    history_summary_cache_size: int = 512
+    graph_cache_size: int = 64
+    prompt_dir: str | None = None
+    prompt_render_cache_size: int = 256
+    warmup_enabled: bool = True
+    warmup_completion: bool = False
+    warmup_timeout_seconds: float = 10.0
+    admission_enabled: bool = True
+    admission_max_concurrency: int = 32
+    admission_max_queue: int = 128
+    admission_max_queue_seconds: float = 5.0
+    flow_coalescing_enabled: bool = True
+    flow_idempotency_ttl_seconds: float = 600.0
+    flow_idempotency_max_entries: int = 1024
+    flow_batch_concurrency: int = 8
+    flow_batch_max_concurrency: int = 32
+    idea_dedup_enabled: bool = True
+    idea_dedup_threshold: float = 0.8
+    idea_dedup_max_entries: int = 10_000
+    llm_model_pool_size: int = 32
+    llm_http_max_connections: int = 100
+    llm_http_max_keepalive_connections: int = 20
+    llm_http_keepalive_expiry_seconds: float = 30.0
+    llm_http2: bool = False
+    llm_http_connect_timeout_seconds: float = 10.0
+    llm_http_read_timeout_seconds: float = 90.0
+    llm_http_proxy: str | None = None
+    llm_lb_strategy: str = "least_outstanding"
+    llm_lb_failure_threshold: int = 3
+    llm_lb_ejection_seconds: float = 30.0
+    llm_lb_max_attempts: int = 2
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 95.0
+    llm_hedge_initial_delay_seconds: float = 5.0
+    llm_hedge_min_delay_seconds: float = 0.5
+    llm_hedge_min_samples: int = 20
+    llm_hedge_budget_ratio: float = 0.1
+    llm_hedge_origin: str | None = None
+    llm_limiter_enabled: bool = True
+    llm_limiter_initial_limit: int = 16
+    llm_limiter_min_limit: int = 1
+    llm_limiter_max_limit: int = 128
+    llm_limiter_backoff_ratio: float = 0.9
+    llm_limiter_latency_tolerance: float = 2.0
+    llm_limiter_max_wait_seconds: float = 30.0
+    usage_backend: str = "memory"
+    usage_path: str = "./.usage.sqlite"
+    usage_flush_seconds: float = 10.0
+    usage_window_seconds: int = 24 * 3600
+    usage_default_budget_tokens: int | None = None
+    usage_tenant_budgets: dict[str, int] = {}
+    usage_tokenizer: str = "estimate"
+    usage_tiktoken_encoding: str = "o200k_base"
+    llm_cassette_mode: str = "off"
+    llm_cassette_dir: str = "./cassettes"
+    llm_cassette_latency: str = "original"
+    llm_cache_backend: str = "memory"
+    llm_cache_path: str = "./.llm_cache.sqlite"
+    llm_cache_ttl_seconds: int = 24 * 3600
+    llm_cache_max_entries: int = 1024
+    llm_cache_max_sqlite_entries: int = 100_000
     log_level: str = "INFO"
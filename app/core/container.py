@@ -9,10 +9,20 @@ Example usage:
     container = build_container(Settings())
 """
 
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from app.core.admission import AdmissionController, build_admission_controller
+from app.core.coalescing import RequestCoalescer, build_request_coalescer
 from app.core.config import Settings
+from app.core.lifecycle import ReadinessState
+from app.core.usage import UsageLedger, build_usage_ledger
 from app.functions.registry import FunctionRegistry
 from app.functions.tools import register_builtin_tools
+from app.llm_provider.cache import build_response_cache
+from app.llm_provider.clients import LLMHttpClients, build_http_clients
 from app.llm_provider.factory import LLMFactory
+from app.orchestration.checkpoint import build_checkpointer
+from app.orchestration.prompts import PromptRegistry
 from app.orchestration.service import OrchestrationService
 from app.rag.service import RAGService
 from app.scripts.executor import ScriptExecutor
@@ -37,11 +47,20 @@ class AppContainer:
         """
 
         self._settings = settings
+        self._http_clients: LLMHttpClients | None = None
         self._llm_factory: LLMFactory | None = None
+        self._usage_ledger: UsageLedger | None = None
+        self._usage_ledger_built = False
         self._function_registry: FunctionRegistry | None = None
         self._script_executor: ScriptExecutor | None = None
         self._rag_service: RAGService | None = None
+        self._checkpointer: BaseCheckpointSaver | None = None
+        self._checkpointer_built = False
+        self._prompt_registry: PromptRegistry | None = None
         self._orchestration_service: OrchestrationService | None = None
+        self._admission_controller = build_admission_controller(settings)
+        self._request_coalescer = build_request_coalescer(settings)
+        self._readiness = ReadinessState()
 
     @property
     def settings(self) -> Settings:
@@ -54,6 +73,34 @@ class AppContainer:
 
         return self._settings
 
+    def http_clients(self) -> LLMHttpClients:
+        """
+        Provide the shared pooled HTTP clients for LLM traffic.
+
+        Extension points:
+        - Build separate stacks per provider or tenant.
+        """
+
+        if self._http_clients is None:
+            self._http_clients = build_http_clients(
+                self._settings,
+                response_cache=build_response_cache(self._settings),
+            )
+        return self._http_clients
+
+    def usage_ledger(self) -> UsageLedger | None:
+        """
+        Provide the token usage ledger, or None when accounting is disabled.
+
+        Extension points:
+        - Share one ledger service across instances.
+        """
+
+        if not self._usage_ledger_built:
+            self._usage_ledger = build_usage_ledger(self._settings)
+            self._usage_ledger_built = True
+        return self._usage_ledger
+
     def llm_factory(self) -> LLMFactory:
         """
         Provide the shared LLMFactory instance.
@@ -63,7 +110,12 @@ class AppContainer:
         """
 
         if self._llm_factory is None:
-            self._llm_factory = LLMFactory(ssl_verify=self._settings.ssl_verify)
+            self._llm_factory = LLMFactory(
+                ssl_verify=self._settings.ssl_verify,
+                model_pool_size=self._settings.llm_model_pool_size,
+                http_clients=self.http_clients(),
+                usage_ledger=self.usage_ledger(),
+            )
         return self._llm_factory
 
     def function_registry(self) -> FunctionRegistry:
@@ -103,6 +155,34 @@ class AppContainer:
             self._rag_service = RAGService(self._settings)
         return self._rag_service
 
+    def checkpointer(self) -> BaseCheckpointSaver | None:
+        """
+        Provide the conversation checkpointer, or None when disabled.
+
+        Extension points:
+        - Inject an external saver for multi-instance deployments.
+        """
+
+        if not self._checkpointer_built:
+            self._checkpointer = build_checkpointer(self._settings)
+            self._checkpointer_built = True
+        return self._checkpointer
+
+    def prompt_registry(self) -> PromptRegistry:
+        """
+        Provide the shared prompt registry.
+
+        Extension points:
+        - Back the registry with a database of prompt versions.
+        """
+
+        if self._prompt_registry is None:
+            self._prompt_registry = PromptRegistry(
+                prompt_dir=self._settings.prompt_dir,
+                render_cache_size=self._settings.prompt_render_cache_size,
+            )
+        return self._prompt_registry
+
     def orchestration_service(self) -> OrchestrationService:
         """
         Provide the OrchestrationService instance.
@@ -118,9 +198,56 @@ class AppContainer:
                 script_executor=self.script_executor(),
                 rag_service=self.rag_service(),
                 settings=self._settings,
+                checkpointer=self.checkpointer(),
+                prompt_registry=self.prompt_registry(),
+                usage_ledger=self.usage_ledger(),
+                admission=self.admission_controller(),
             )
         return self._orchestration_service
 
+    def admission_controller(self) -> AdmissionController | None:
+        """
+        Provide the flow admission controller, or None when disabled.
+
+        Extension points:
+        - Coordinate limits across instances through a shared store.
+        """
+
+        return self._admission_controller
+
+    def request_coalescer(self) -> RequestCoalescer | None:
+        """
+        Provide the flow request coalescer, or None when disabled.
+
+        Extension points:
+        - Back idempotent results with a shared store.
+        """
+
+        return self._request_coalescer
+
+    def readiness(self) -> ReadinessState:
+        """
+        Provide the readiness state updated by the startup warm-up.
+
+        Extension points:
+        - Share readiness with sidecars through a status file.
+        """
+
+        return self._readiness
+
+    async def aclose(self) -> None:
+        """
+        Release pooled resources held by constructed services.
+
+        Extension points:
+        - Close checkpointer and vector store connections.
+        """
+
+        if self._llm_factory is not None:
+            await self._llm_factory.aclose()
+        if self._usage_ledger is not None:
+            self._usage_ledger.close()
+
 
 def build_container(settings: Settings) -> AppContainer:
     """
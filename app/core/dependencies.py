@@ -11,9 +11,14 @@ Example usage:
 
 from functools import lru_cache
 
+from app.core.admission import AdmissionController
+from app.core.coalescing import RequestCoalescer
 from app.core.config import Settings
 from app.core.container import AppContainer, build_container
+from app.core.lifecycle import ReadinessState
+from app.core.usage import UsageLedger
 from app.functions.registry import FunctionRegistry
+from app.orchestration.prompts import PromptRegistry
 from app.orchestration.service import OrchestrationService
 from app.rag.service import RAGService
 
@@ -73,3 +78,58 @@ def get_function_registry() -> FunctionRegistry:
     """
 
     return get_container().function_registry()
+
+
+def get_readiness() -> ReadinessState:
+    """
+    Provide the readiness state dependency.
+
+    Extension points:
+    - Aggregate readiness across worker processes.
+    """
+
+    return get_container().readiness()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """
+    Provide the PromptRegistry dependency.
+
+    Extension points:
+    - Resolve tenant-specific prompt overlays.
+    """
+
+    return get_container().prompt_registry()
+
+
+def get_usage_ledger() -> UsageLedger | None:
+    """
+    Provide the UsageLedger dependency, or None when accounting is disabled.
+
+    Extension points:
+    - Scope the ledger view to the authenticated tenant.
+    """
+
+    return get_container().usage_ledger()
+
+
+def get_admission_controller() -> AdmissionController | None:
+    """
+    Provide the flow admission controller, or None when disabled.
+
+    Extension points:
+    - Pick a controller per route or priority class.
+    """
+
+    return get_container().admission_controller()
+
+
+def get_request_coalescer() -> RequestCoalescer | None:
+    """
+    Provide the flow request coalescer, or None when disabled.
+
+    Extension points:
+    - Disable coalescing for specific tenants.
+    """
+
+    return get_container().request_coalescer()
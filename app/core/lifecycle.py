@@ -0,0 +1,192 @@
+"""
+Application lifespan: startup warm-up and readiness tracking.
+
+Startup builds the DI container, compiles the default graph (generating
+tool schemas and binding tools), pre-opens a pooled connection to the
+configured LLM provider, and optionally sends a one-token completion. The
+readiness state flips to ``ready`` only after these steps finish, so load
+balancers hold traffic until the first request no longer pays cold-start
+latency. Provider steps are best-effort: failures are recorded on the
+readiness state instead of aborting startup, while a graph that cannot be
+compiled fails startup outright.
+
+Extension points:
+- Pre-compile popular dynamic flows or warm the RAG vector store.
+- Gate readiness on provider reachability for strict deployments.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from typing import TYPE_CHECKING, Literal
+
+from app.models.health import ReadinessResponse, WarmupCheck
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+    from app.core.container import AppContainer
+
+
+class ReadinessState:
+    """
+    Lifecycle status and warm-up results for the readiness endpoint.
+
+    Extension points:
+    - Add a draining phase that waits for in-flight flows on shutdown.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize in the ``starting`` state with no recorded checks.
+
+        Extension points:
+        - Restore the last warm-up report for faster diagnostics.
+        """
+
+        self._status: Literal["starting", "ready", "stopping"] = "starting"
+        self._checks: list[WarmupCheck] = []
+
+    @property
+    def ready(self) -> bool:
+        """
+        Return whether the instance should receive traffic.
+
+        Extension points:
+        - Drop readiness while an upstream provider is failing over.
+        """
+
+        return self._status == "ready"
+
+    def record(self, check: WarmupCheck) -> None:
+        """
+        Append the outcome of a warm-up step.
+
+        Extension points:
+        - Export step durations as startup metrics.
+        """
+
+        self._checks.append(check)
+
+    def mark_ready(self) -> None:
+        """
+        Report the instance as ready to serve traffic.
+
+        Extension points:
+        - Notify a service registry on readiness changes.
+        """
+
+        self._status = "ready"
+
+    def mark_stopping(self) -> None:
+        """
+        Report the instance as shutting down.
+
+        Extension points:
+        - Deregister from a service registry before connections close.
+        """
+
+        self._status = "stopping"
+
+    def snapshot(self) -> ReadinessResponse:
+        """
+        Return the current readiness state as a response model.
+
+        Extension points:
+        - Hide error details from unauthenticated callers.
+        """
+
+        return ReadinessResponse(
+            status=self._status,
+            ready=self.ready,
+            checks=list(self._checks),
+        )
+
+
+async def warm_up(container: AppContainer) -> None:
+    """
+    Run startup warm-up steps and record each outcome on readiness.
+
+    Extension points:
+    - Run independent steps concurrently for faster cold starts.
+    """
+
+    settings = container.settings
+    readiness = container.readiness()
+    timeout = settings.warmup_timeout_seconds
+
+    await _run_step(
+        readiness,
+        "graph",
+        lambda: asyncio.to_thread(lambda: container.orchestration_service().warm_up()),
+        required=True,
+    )
+    service = container.orchestration_service()
+    await _run_step(
+        readiness,
+        "llm_connection",
+        lambda: asyncio.wait_for(service.aopen_llm_connection(), timeout),
+    )
+    if settings.warmup_completion:
+        await _run_step(
+            readiness,
+            "llm_completion",
+            lambda: asyncio.wait_for(service.awarm_llm_completion(), timeout),
+        )
+    else:
+        readiness.record(WarmupCheck(name="llm_completion", status="skipped"))
+
+
+def build_lifespan(
+    container_provider: Callable[[], AppContainer],
+) -> Callable[[FastAPI], AbstractAsyncContextManager[None]]:
+    """
+    Build a FastAPI lifespan that warms up before serving and cleans up after.
+
+    Extension points:
+    - Start background jobs such as cache pruning or index refresh.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        container = await asyncio.to_thread(container_provider)
+        readiness = container.readiness()
+        if container.settings.warmup_enabled:
+            await warm_up(container)
+        readiness.mark_ready()
+        try:
+            yield
+        finally:
+            readiness.mark_stopping()
+            await container.aclose()
+
+    return lifespan
+
+
+async def _run_step(
+    readiness: ReadinessState,
+    name: str,
+    step: Callable[[], Awaitable[object]],
+    required: bool = False,
+) -> None:
+    started = time.perf_counter()
+    try:
+        await step()
+    except Exception as exc:
+        readiness.record(
+            WarmupCheck(
+                name=name,
+                status="error",
+                duration_ms=(time.perf_counter() - started) * 1000,
+                error=str(exc) or type(exc).__name__,
+            )
+        )
+        if required:
+            raise
+        return
+    readiness.record(
+        WarmupCheck(name=name, status="ok", duration_ms=(time.perf_counter() - started) * 1000)
+    )
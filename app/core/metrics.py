@@ -0,0 +1,796 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Metric objects are module-level and cheap to update: label children are
+created once and cached, and each update is a dict lookup plus a short
+locked increment. Values that already live elsewhere (e.g. response cache
+counters) are read through callbacks at scrape time instead of being
+mirrored on the hot path.
+
+Extension points:
+- Swap for prometheus_client or an OpenTelemetry meter provider.
+- Add multi-process aggregation for gunicorn-style worker pools.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+    from app.core.container import AppContainer
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+Sample = tuple[tuple[str, ...], float]
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Any:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, _format_labels(self.labelnames, values)))
+        return lines
+
+
+class _ValueChild:
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def render(self, name: str, labels: str) -> list[str]:
+        return [f"{name}{labels} {_format_value(self._value)}"]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def render(self, name: str, labels: str) -> list[str]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        lines: list[str] = []
+        cumulative = 0
+        for bound, count in zip((*self._buckets, float("inf")), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format_value(bound)
+            lines.append(f"{name}_bucket{_with_label(labels, 'le', le)} {cumulative}")
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter with optional labels.
+
+    Extension points:
+    - Add exemplars linking to trace IDs.
+    """
+
+    kind = "counter"
+
+    def _new_child(self) -> _ValueChild:
+        return _ValueChild()
+
+
+class Gauge(_Metric):
+    """
+    Gauge that can go up and down.
+
+    Extension points:
+    - Add max-over-interval tracking for bursty values.
+    """
+
+    kind = "gauge"
+
+    def _new_child(self) -> _ValueChild:
+        return _ValueChild()
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram for latencies.
+
+    Extension points:
+    - Add native (sparse) histogram support.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._bucket_bounds = buckets
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self._bucket_bounds)
+
+
+class CallbackMetric:
+    """
+    Metric whose samples are produced by a callback at scrape time.
+
+    Extension points:
+    - Cache callback results for expensive sources.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: tuple[str, ...],
+        callback: Callable[[], Iterable[Sample]],
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = labelnames
+        self._callback = callback
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in self._callback():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Container for metrics rendered together on the /metrics endpoint.
+
+    Extension points:
+    - Add per-tenant registries.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty registry.
+
+        Extension points:
+        - Add default process metrics (CPU, memory, open files).
+        """
+
+        self._metrics: dict[str, _Metric | CallbackMetric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """
+        Create and register a counter.
+
+        Extension points:
+        - Validate metric and label names.
+        """
+
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        """
+        Create and register a gauge.
+
+        Extension points:
+        - Validate metric and label names.
+        """
+
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        """
+        Create and register a histogram.
+
+        Extension points:
+        - Validate that buckets are strictly increasing.
+        """
+
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: tuple[str, ...],
+        callback: Callable[[], Iterable[Sample]],
+    ) -> CallbackMetric:
+        """
+        Register (or replace) a metric computed at scrape time.
+
+        Extension points:
+        - Add timeouts for slow callbacks.
+        """
+
+        metric = CallbackMetric(name, documentation, kind, labelnames, callback)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        Render all metrics in Prometheus text exposition format.
+
+        Extension points:
+        - Add OpenMetrics output negotiation.
+        """
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: Any) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "llm_orch_http_requests_total",
+    "HTTP requests by method, route template, and status code.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "llm_orch_http_request_duration_seconds",
+    "HTTP request latency, including streamed bodies.",
+    ("method", "route"),
+)
+FLOWS_IN_FLIGHT = REGISTRY.gauge(
+    "llm_orch_flows_in_flight",
+    "Flow runs currently executing.",
+    ("mode",),
+)
+FLOW_COALESCED = REGISTRY.counter(
+    "llm_orch_flow_coalesced_total",
+    "Flow run requests by coalescing outcome (leader, shared, replayed).",
+    ("outcome",),
+)
+FLOW_NODE_SECONDS = REGISTRY.histogram(
+    "llm_orch_flow_node_duration_seconds",
+    "Wall time per graph node execution.",
+    ("node",),
+)
+FLOW_NODE_ERRORS = REGISTRY.counter(
+    "llm_orch_flow_node_errors_total",
+    "Graph node executions that raised.",
+    ("node",),
+)
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "llm_orch_llm_request_duration_seconds",
+    "Chat model call latency per provider and model.",
+    ("provider", "model"),
+)
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_orch_llm_requests_total",
+    "Chat model calls by outcome (ok, error, timeout).",
+    ("provider", "model", "outcome"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_orch_llm_tokens_total",
+    "Tokens reported by the provider (prompt, completion, cached prefix).",
+    ("provider", "model", "type"),
+)
+LLM_PROMPT_CACHED_RATIO = REGISTRY.histogram(
+    "llm_orch_llm_prompt_cached_ratio",
+    "Per-call fraction of prompt tokens served from the provider prefix cache.",
+    ("provider", "model"),
+    buckets=(0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 1.0),
+)
+LLM_USAGE_ESTIMATED = REGISTRY.counter(
+    "llm_orch_llm_usage_estimated_total",
+    "Chat completions without provider usage, counted with the local tokenizer.",
+    ("model",),
+)
+LLM_QUOTA_REJECTIONS = REGISTRY.counter(
+    "llm_orch_llm_quota_rejections_total",
+    "LLM calls refused because the tenant's token budget was spent.",
+    ("tenant",),
+)
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "llm_orch_admission_rejections_total",
+    "Flow requests refused by admission control (queue_full, queue_timeout).",
+    ("reason",),
+)
+ADMISSION_QUEUE_SECONDS = REGISTRY.histogram(
+    "llm_orch_admission_queue_seconds",
+    "Time admitted flow requests waited in the admission queue.",
+)
+LLM_LIMITER_WAIT_SECONDS = REGISTRY.histogram(
+    "llm_orch_llm_limiter_wait_seconds",
+    "Time LLM calls waited for an adaptive concurrency slot.",
+)
+LLM_CASSETTE = REGISTRY.counter(
+    "llm_orch_llm_cassette_total",
+    "LLM cassette lookups and writes by result (hit, miss, recorded).",
+    ("result",),
+)
+LLM_HEDGES = REGISTRY.counter(
+    "llm_orch_llm_hedges_total",
+    "Hedged chat completions by winning request (primary, hedge).",
+    ("winner",),
+)
+LLM_HEDGES_SKIPPED = REGISTRY.counter(
+    "llm_orch_llm_hedges_skipped_total",
+    "Slow chat completions not hedged because the hedge budget was spent.",
+)
+LLM_REPLICA_REQUESTS = REGISTRY.counter(
+    "llm_orch_llm_replica_requests_total",
+    "Requests per LLM endpoint replica by outcome (ok, error).",
+    ("replica", "outcome"),
+)
+LLM_REPLICA_OUTSTANDING = REGISTRY.gauge(
+    "llm_orch_llm_replica_outstanding",
+    "Requests currently outstanding per LLM endpoint replica.",
+    ("replica",),
+)
+LLM_REPLICA_EJECTIONS = REGISTRY.counter(
+    "llm_orch_llm_replica_ejections_total",
+    "Times a failing LLM endpoint replica was ejected from rotation.",
+    ("replica",),
+)
+LLM_FAILOVERS = REGISTRY.counter(
+    "llm_orch_llm_failovers_total",
+    "LLM requests retried on another replica after a failure.",
+)
+TOOL_CALLS = REGISTRY.counter(
+    "llm_orch_tool_calls_total",
+    "FunctionRegistry tool invocations by outcome.",
+    ("tool", "outcome"),
+)
+TOOL_SECONDS = REGISTRY.histogram(
+    "llm_orch_tool_duration_seconds",
+    "FunctionRegistry tool execution time.",
+    ("tool",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+IDEA_DUPLICATE_HITS = REGISTRY.counter(
+    "llm_orch_idea_duplicate_hits_total",
+    "Idea submissions that reused the sizing of a near-duplicate.",
+)
+
+
+class NodeMetricsHandler(BaseCallbackHandler):
+    """
+    Callback handler that records per-node latency and errors.
+
+    Extension points:
+    - Add per-graph labels once multiple graphs are served.
+    """
+
+    run_inline = True
+    ignore_llm = True
+    ignore_chat_model = True
+    ignore_retriever = True
+    ignore_agent = True
+    ignore_retry = True
+    ignore_custom_event = True
+
+    def __init__(self) -> None:
+        """
+        Initialize in-flight node bookkeeping.
+
+        Extension points:
+        - Add a clock abstraction for deterministic tests.
+        """
+
+        self._runs: dict[UUID, tuple[str, float]] = {}
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and kwargs.get("name") == node:
+            self._runs[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            FLOW_NODE_SECONDS.labels(run[0]).observe(time.perf_counter() - run[1])
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            FLOW_NODE_SECONDS.labels(run[0]).observe(time.perf_counter() - run[1])
+            FLOW_NODE_ERRORS.labels(run[0]).inc()
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """
+    Callback handler attached to chat models built by ``LLMFactory``.
+
+    Extension points:
+    - Record time to first token for streamed calls.
+    """
+
+    run_inline = True
+    ignore_chain = True
+    ignore_retriever = True
+    ignore_agent = True
+    ignore_retry = True
+    ignore_custom_event = True
+
+    def __init__(self, provider: str, model: str) -> None:
+        """
+        Bind the handler to a provider/model label pair.
+
+        Extension points:
+        - Add endpoint labels for multi-endpoint deployments.
+        """
+
+        self._provider = provider
+        self._model = model
+        self._seconds = LLM_REQUEST_SECONDS.labels(provider, model)
+        self._runs: dict[UUID, float] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any] | None,
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        self._runs[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._runs.pop(run_id, None)
+        if started is None:
+            return
+        self._seconds.observe(time.perf_counter() - started)
+        LLM_REQUESTS.labels(self._provider, self._model, "ok").inc()
+        prompt = completion = cached = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+                details = usage.get("input_token_details") or {}
+                # Service tiers report e.g. "priority_cache_read" instead.
+                cached += sum(
+                    value or 0 for key, value in details.items() if key.endswith("cache_read")
+                )
+        record_token_usage(self._provider, self._model, prompt, completion, cached)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._runs.pop(run_id, None)
+        if started is not None:
+            self._seconds.observe(time.perf_counter() - started)
+        outcome = "timeout" if "timeout" in type(error).__name__.lower() else "error"
+        LLM_REQUESTS.labels(self._provider, self._model, outcome).inc()
+
+
+def record_token_usage(
+    provider: str,
+    model: str,
+    prompt: int,
+    completion: int,
+    cached: int = 0,
+) -> None:
+    """
+    Record token counts reported by a provider for one chat completion.
+
+    ``cached`` is the part of ``prompt`` served from the provider's prefix
+    cache; its per-call ratio shows whether prompt layouts keep the prefix
+    stable.
+
+    Extension points:
+    - Attribute tokens to tenants for quota accounting.
+    """
+
+    if prompt:
+        LLM_TOKENS.labels(provider, model, "prompt").inc(prompt)
+        LLM_PROMPT_CACHED_RATIO.labels(provider, model).observe(min(cached / prompt, 1.0))
+    if completion:
+        LLM_TOKENS.labels(provider, model, "completion").inc(completion)
+    if cached:
+        LLM_TOKENS.labels(provider, model, "cached").inc(cached)
+
+
+def record_openai_usage(provider: str, model: str, usage: dict[str, Any] | None) -> None:
+    """
+    Record an OpenAI-format ``usage`` object from a raw chat completion.
+
+    Extension points:
+    - Map Anthropic or Gemini usage shapes.
+    """
+
+    if not usage:
+        return
+    details = usage.get("prompt_tokens_details") or {}
+    record_token_usage(
+        provider,
+        model,
+        usage.get("prompt_tokens") or 0,
+        usage.get("completion_tokens") or 0,
+        details.get("cached_tokens") or 0,
+    )
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that counts HTTP requests and records their latency.
+
+    Routes are labelled by their path template so labels stay bounded.
+
+    Extension points:
+    - Exclude health and metrics routes from latency histograms.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self._app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self._app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, status).inc()
+
+
+def install_metrics(app: FastAPI, container_provider: Callable[[], AppContainer]) -> None:
+    """
+    Attach HTTP instrumentation and scrape-time collectors to the app.
+
+    Extension points:
+    - Register collectors for RAG or script execution backends.
+    """
+
+    app.add_middleware(MetricsMiddleware)
+
+    def cache_lookups() -> list[Sample]:
+        cache = container_provider().llm_factory().response_cache
+        if cache is None:
+            return []
+        stats = cache.stats()
+        return [
+            (("memory_hit",), stats["memory_hits"]),
+            (("sqlite_hit",), stats["sqlite_hits"]),
+            (("miss",), stats["misses"]),
+        ]
+
+    def cache_hit_ratio() -> list[Sample]:
+        cache = container_provider().llm_factory().response_cache
+        if cache is None:
+            return []
+        return [((), cache.stats()["hit_ratio"])]
+
+    REGISTRY.callback(
+        "llm_orch_llm_cache_lookups_total",
+        "LLM response cache lookups by result (memory_hit, sqlite_hit, miss).",
+        "counter",
+        ("result",),
+        cache_lookups,
+    )
+    REGISTRY.callback(
+        "llm_orch_llm_cache_hit_ratio",
+        "LLM response cache hit ratio since startup.",
+        "gauge",
+        (),
+        cache_hit_ratio,
+    )
+
+    def graph_cache() -> list[Sample]:
+        stats = container_provider().orchestration_service().graph_cache_stats()
+        return [(("hit",), stats["hits"]), (("miss",), stats["misses"])]
+
+    REGISTRY.callback(
+        "llm_orch_graph_cache_lookups_total",
+        "Compiled dynamic-graph cache lookups by result.",
+        "counter",
+        ("result",),
+        graph_cache,
+    )
+
+    def http_connections() -> list[Sample]:
+        stats = container_provider().http_clients().pool_stats()
+        return [
+            ((client, state), counts[state])
+            for client, counts in stats.items()
+            for state in ("active", "idle")
+        ]
+
+    def http_pool_utilization() -> list[Sample]:
+        stats = container_provider().http_clients().pool_stats()
+        return [((client,), counts["active"] / counts["max"]) for client, counts in stats.items()]
+
+    REGISTRY.callback(
+        "llm_orch_llm_http_connections",
+        "Open LLM HTTP connections per client (sync, async) and state (active, idle).",
+        "gauge",
+        ("client", "state"),
+        http_connections,
+    )
+    REGISTRY.callback(
+        "llm_orch_llm_http_pool_utilization",
+        "Active LLM HTTP connections as a fraction of the pool limit.",
+        "gauge",
+        ("client",),
+        http_pool_utilization,
+    )
+
+    def llm_concurrency() -> list[Sample]:
+        stats = container_provider().http_clients().limiter_stats()
+        return [
+            ((origin, key), values[key])
+            for origin, values in stats.items()
+            for key in ("limit", "in_flight", "waiting")
+        ]
+
+    def llm_rtt() -> list[Sample]:
+        stats = container_provider().http_clients().limiter_stats()
+        return [
+            ((origin, window), values[f"{window}_rtt_seconds"])
+            for origin, values in stats.items()
+            for window in ("recent", "baseline")
+        ]
+
+    REGISTRY.callback(
+        "llm_orch_llm_concurrency",
+        "Adaptive LLM concurrency per origin: limit, calls in flight, calls waiting.",
+        "gauge",
+        ("origin", "state"),
+        llm_concurrency,
+    )
+    REGISTRY.callback(
+        "llm_orch_llm_rtt_seconds",
+        "Smoothed LLM call latency per origin (recent, baseline) seen by the limiter.",
+        "gauge",
+        ("origin", "window"),
+        llm_rtt,
+    )
+
+    def admission() -> list[Sample]:
+        controller = container_provider().admission_controller()
+        if controller is None:
+            return []
+        stats = controller.stats()
+        return [((key,), stats[key]) for key in ("limit", "in_flight", "queue_depth")]
+
+    REGISTRY.callback(
+        "llm_orch_admission",
+        "Admission control state: concurrency limit, flows in flight, queue depth.",
+        "gauge",
+        ("state",),
+        admission,
+    )
+
+    def model_pool() -> list[Sample]:
+        stats = container_provider().llm_factory().model_pool_stats()
+        return [(("hit",), stats["hits"]), (("miss",), stats["misses"])]
+
+    def model_pool_size() -> list[Sample]:
+        stats = container_provider().llm_factory().model_pool_stats()
+        return [(("model",), stats["size"]), (("tool_bound",), stats["bound"])]
+
+    REGISTRY.callback(
+        "llm_orch_llm_model_pool_lookups_total",
+        "Pooled chat model lookups by result.",
+        "counter",
+        ("result",),
+        model_pool,
+    )
+    REGISTRY.callback(
+        "llm_orch_llm_model_pool_size",
+        "Pooled chat models by kind (model, tool_bound).",
+        "gauge",
+        ("kind",),
+        model_pool_size,
+    )
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _with_label(labels: str, name: str, value: str) -> str:
+    pair = f'{name}="{value}"'
+    if not labels:
+        return "{" + pair + "}"
+    return labels[:-1] + "," + pair + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1,254 @@
+"""
+Per-request execution tracing for the LangGraph flow.
+
+A ``FlowTraceCollector`` is attached as a callback handler to a single run.
+It times graph nodes and LLM calls from LangChain callbacks. Tool execution
+and cache hits happen outside LangChain, so they are reported through
+``record_tool_time`` and ``record_cache_hit``, which find the collector
+installed by ``trace_scope`` through a context variable and do nothing when
+tracing is off.
+
+Extension points:
+- Export collected steps to OpenTelemetry spans.
+- Sample traces for a fraction of requests instead of opt-in only.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from app.models.flow import FlowTraceStep
+
+
+_ACTIVE_COLLECTOR: ContextVar[FlowTraceCollector | None] = ContextVar(
+    "flow_trace_collector",
+    default=None,
+)
+
+
+class FlowTraceCollector(BaseCallbackHandler):
+    """
+    Collect per-node timing, token usage, tool time, and cache hits.
+
+    Nodes run sequentially within one flow, so tool time and cache hits are
+    attributed to the node that is currently running.
+
+    Extension points:
+    - Record per-call breakdowns instead of per-node totals.
+    - Capture node inputs for debugging sessions.
+    """
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        """
+        Initialize empty step and run bookkeeping.
+
+        Extension points:
+        - Add a clock abstraction for deterministic tests.
+        """
+
+        self._steps: list[dict[str, Any]] = []
+        self._node_runs: dict[UUID, dict[str, Any]] = {}
+        self._llm_runs: dict[UUID, tuple[float, dict[str, Any] | None]] = {}
+        self._current: dict[str, Any] | None = None
+        self._lock = threading.Lock()
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        tags: list[str] | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node is None or kwargs.get("name") != node:
+            return
+        step = {
+            "node_id": node,
+            "started": time.perf_counter(),
+            "duration_ms": None,
+            "llm_calls": 0,
+            "llm_ms": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_tokens": 0,
+            "tool_ms": 0.0,
+            "cache_hits": 0,
+            "output": None,
+        }
+        with self._lock:
+            self._steps.append(step)
+            self._node_runs[run_id] = step
+            self._current = step
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            step = self._node_runs.pop(run_id, None)
+            if step is None:
+                return
+            step["duration_ms"] = (time.perf_counter() - step["started"]) * 1000
+            if isinstance(outputs, dict):
+                step["output"] = sorted(outputs)
+            if self._current is step:
+                self._current = None
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            step = self._node_runs.pop(run_id, None)
+            if step is None:
+                return
+            step["duration_ms"] = (time.perf_counter() - step["started"]) * 1000
+            step["output"] = {"error": type(error).__name__}
+            if self._current is step:
+                self._current = None
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any] | None,
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            self._llm_runs[run_id] = (time.perf_counter(), self._current)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            started, step = self._llm_runs.pop(run_id, (None, None))
+            if step is None or started is None:
+                return
+            step["llm_calls"] += 1
+            step["llm_ms"] += (time.perf_counter() - started) * 1000
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if not usage:
+                        continue
+                    step["prompt_tokens"] += usage.get("input_tokens", 0)
+                    step["completion_tokens"] += usage.get("output_tokens", 0)
+                    details = usage.get("input_token_details") or {}
+                    step["cached_tokens"] += details.get("cache_read", 0) or 0
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            started, step = self._llm_runs.pop(run_id, (None, None))
+            if step is not None and started is not None:
+                step["llm_calls"] += 1
+                step["llm_ms"] += (time.perf_counter() - started) * 1000
+
+    def add_tool_time(self, elapsed_ms: float) -> None:
+        """
+        Attribute tool execution time to the running node.
+
+        Extension points:
+        - Track time per tool name.
+        """
+
+        with self._lock:
+            if self._current is not None:
+                self._current["tool_ms"] += elapsed_ms
+
+    def add_cache_hit(self) -> None:
+        """
+        Count a cache hit against the running node.
+
+        Extension points:
+        - Distinguish response-cache and idea-index hits.
+        """
+
+        with self._lock:
+            if self._current is not None:
+                self._current["cache_hits"] += 1
+
+    def steps(self) -> list[FlowTraceStep]:
+        """
+        Return the collected steps as response models, in execution order.
+
+        Extension points:
+        - Include still-running nodes for timeout diagnostics.
+        """
+
+        with self._lock:
+            return [
+                FlowTraceStep(
+                    node_id=step["node_id"],
+                    node_type="llm" if step["llm_calls"] else "function",
+                    input=None,
+                    output=step["output"],
+                    duration_ms=_round_ms(step["duration_ms"]),
+                    llm_calls=step["llm_calls"],
+                    llm_ms=_round_ms(step["llm_ms"]),
+                    prompt_tokens=step["prompt_tokens"],
+                    completion_tokens=step["completion_tokens"],
+                    cached_tokens=step["cached_tokens"],
+                    tool_ms=_round_ms(step["tool_ms"]),
+                    cache_hits=step["cache_hits"],
+                )
+                for step in self._steps
+            ]
+
+
+@contextmanager
+def trace_scope(collector: FlowTraceCollector | None) -> Iterator[None]:
+    """
+    Route ``record_*`` hooks to ``collector`` for the duration of the block.
+
+    Extension points:
+    - Support nested collectors for sub-flows.
+    """
+
+    if collector is None:
+        yield
+        return
+    token = _ACTIVE_COLLECTOR.set(collector)
+    try:
+        yield
+    finally:
+        _ACTIVE_COLLECTOR.reset(token)
+
+
+def record_tool_time(elapsed_ms: float) -> None:
+    """
+    Report tool execution time to the active collector, if any.
+
+    Extension points:
+    - Forward tool timings to metrics as well.
+    """
+
+    collector = _ACTIVE_COLLECTOR.get()
+    if collector is not None:
+        collector.add_tool_time(elapsed_ms)
+
+
+def record_cache_hit() -> None:
+    """
+    Report a cache hit to the active collector, if any.
+
+    Extension points:
+    - Forward cache hits to metrics as well.
+    """
+
+    collector = _ACTIVE_COLLECTOR.get()
+    if collector is not None:
+        collector.add_cache_hit()
+
+
+def _round_ms(value: float | None) -> float | None:
+    if value is None:
+        return None
+    return round(value, 3)
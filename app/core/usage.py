@@ -0,0 +1,655 @@
+"""
+Token usage accounting and per-tenant budgets.
+
+Every chat completion is attributed to the tenant of the ``usage_scope`` it
+runs in and aggregated per (window, tenant, model) in memory. With the SQLite
+backend, aggregates are flushed periodically as additive upserts, so several
+processes (API workers, ``flow_mcp``) can share one ledger file. Provider-reported usage is used
+when present; otherwise tokens are counted with the configured tokenizer
+(an offline character estimate by default) and the call is flagged as
+estimated.
+
+Budgets are token limits per tenant over a fixed window (a day by
+default). ``check_budget`` runs before each LLM call and raises
+``QuotaExceededError`` once a tenant has spent its budget. A tenant's spend
+is the ledger file's total plus this process's unflushed tokens. The flush
+thread re-reads the file totals after each flush, so ``check_budget`` only
+reads memory, and with SQLite budgets hold across processes with a lag of
+up to two flush intervals. The memory backend only sees its own process.
+
+Extension points:
+- Add Postgres or Redis backends for exact multi-instance budgets.
+- Price tokens per model to budget in currency instead of tokens.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Protocol
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from app.core.config import Settings
+from app.core.metrics import LLM_QUOTA_REJECTIONS, LLM_USAGE_ESTIMATED
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenant_usage (
+    window_start INTEGER NOT NULL,
+    tenant_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    cached_tokens INTEGER NOT NULL,
+    calls INTEGER NOT NULL,
+    estimated_calls INTEGER NOT NULL,
+    PRIMARY KEY (window_start, tenant_id, model)
+);
+"""
+
+_UPSERT = """
+INSERT INTO tenant_usage VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (window_start, tenant_id, model) DO UPDATE SET
+    prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+    completion_tokens = completion_tokens + excluded.completion_tokens,
+    cached_tokens = cached_tokens + excluded.cached_tokens,
+    calls = calls + excluded.calls,
+    estimated_calls = estimated_calls + excluded.estimated_calls
+"""
+
+# prompt, completion, cached, calls, estimated_calls
+_FIELDS = 5
+
+_ACTIVE_SCOPE: ContextVar[UsageScope | None] = ContextVar("usage_scope", default=None)
+
+
+class Tokenizer(Protocol):
+    """
+    Counts tokens of plain text.
+
+    Extension points:
+    - Add tokenizers for local models (e.g. Hugging Face ``tokenizers``).
+    """
+
+    def count_text(self, text: str) -> int:
+        ...
+
+
+class EstimateTokenizer:
+    """
+    Offline token estimate of roughly four characters per token.
+
+    Extension points:
+    - Tune the ratio per language from recorded provider usage.
+    """
+
+    def count_text(self, text: str) -> int:
+        """
+        Return an estimated token count for ``text``.
+
+        Extension points:
+        - Count CJK characters as one token each.
+        """
+
+        return len(text) // 4 + 1 if text else 0
+
+
+class TiktokenTokenizer:
+    """
+    Exact counts for OpenAI models through ``tiktoken``.
+
+    Extension points:
+    - Pick the encoding per model name.
+    """
+
+    def __init__(self, encoding: str = "o200k_base") -> None:
+        """
+        Load the encoding; raises if tiktoken or its data is unavailable.
+
+        Extension points:
+        - Load encodings from a bundled cache directory.
+        """
+
+        import tiktoken
+
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def count_text(self, text: str) -> int:
+        """
+        Return the exact token count for ``text``.
+
+        Extension points:
+        - Memoize counts for repeated system prompts.
+        """
+
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+class QuotaExceededError(RuntimeError):
+    """
+    Raised before an LLM call when the tenant has spent its token budget.
+
+    Extension points:
+    - Carry a link to the tenant's usage dashboard.
+    """
+
+    def __init__(self, tenant_id: str, used: int, budget: int, retry_after: float) -> None:
+        super().__init__(
+            f"Token budget exhausted for tenant {tenant_id!r}: {used}/{budget} tokens used"
+        )
+        self.tenant_id = tenant_id
+        self.used = used
+        self.budget = budget
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class UsageScope:
+    """
+    Tenant that LLM calls in the current context are billed to.
+
+    Extension points:
+    - Add user or API key identifiers.
+    """
+
+    tenant_id: str = DEFAULT_TENANT
+
+
+class UsageLedger:
+    """
+    In-memory usage aggregates with periodic SQLite flush and tenant budgets.
+
+    Extension points:
+    - Reserve estimated tokens at call start for stricter budgets.
+    - Alert when a tenant crosses a fraction of its budget.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Tokenizer | None = None,
+        sqlite_path: str | None = None,
+        window_seconds: int = 24 * 3600,
+        default_budget: int | None = None,
+        tenant_budgets: dict[str, int] | None = None,
+        flush_interval_seconds: float = 10.0,
+    ) -> None:
+        """
+        Initialize the ledger; with ``sqlite_path`` a flush thread starts.
+
+        Extension points:
+        - Reload tenant budgets without a restart.
+        """
+
+        self.tokenizer: Tokenizer = tokenizer or EstimateTokenizer()
+        self._window_seconds = window_seconds
+        self._default_budget = default_budget
+        self._tenant_budgets = dict(tenant_budgets or {})
+        self._pending: dict[tuple[int, str, str], list[int]] = {}
+        self._flushing: dict[tuple[int, str, str], list[int]] = {}
+        self._stored_window = 0
+        self._stored_tokens: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._stop = threading.Event()
+        self._flusher: threading.Thread | None = None
+        if sqlite_path:
+            self._conn = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._stored_window = self._window()
+            self._stored_tokens = self._file_totals(self._stored_window)
+            if flush_interval_seconds > 0:
+                self._flusher = threading.Thread(
+                    target=self._flush_loop,
+                    args=(flush_interval_seconds,),
+                    name="usage-flush",
+                    daemon=True,
+                )
+                self._flusher.start()
+
+    def budget_for(self, tenant_id: str) -> int | None:
+        """
+        Return the tenant's token budget per window, or None if unlimited.
+
+        Extension points:
+        - Resolve budgets from a tenant directory service.
+        """
+
+        return self._tenant_budgets.get(tenant_id, self._default_budget)
+
+    def check_budget(self, tenant_id: str | None = None) -> None:
+        """
+        Raise ``QuotaExceededError`` if the tenant's budget is spent.
+
+        Defaults to the tenant of the active ``usage_scope``.
+
+        Extension points:
+        - Let high-priority requests overdraw by a margin.
+        """
+
+        tenant_id = tenant_id or current_scope().tenant_id
+        budget = self.budget_for(tenant_id)
+        if budget is None:
+            return
+        window = self._window()
+        with self._lock:
+            used = self._used_tokens(tenant_id, window)
+        if used >= budget:
+            LLM_QUOTA_REJECTIONS.labels(tenant_id).inc()
+            retry_after = window + self._window_seconds - time.time()
+            raise QuotaExceededError(tenant_id, used, budget, max(retry_after, 1.0))
+
+    def record(
+        self,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0,
+        estimated: bool = False,
+        scope: UsageScope | None = None,
+    ) -> None:
+        """
+        Add one call's token counts to the scope's aggregates.
+
+        Extension points:
+        - Keep per-node breakdowns for flow graphs.
+        """
+
+        scope = scope or current_scope()
+        window = self._window()
+        key = (window, scope.tenant_id, model)
+        with self._lock:
+            counts = self._pending.get(key)
+            if counts is None:
+                counts = self._pending[key] = [0] * _FIELDS
+            counts[0] += prompt_tokens
+            counts[1] += completion_tokens
+            counts[2] += cached_tokens
+            counts[3] += 1
+            counts[4] += int(estimated)
+            if self._conn is None:
+                self._prune(window)
+        if estimated:
+            LLM_USAGE_ESTIMATED.labels(model).inc()
+
+    def record_response(
+        self,
+        model: str,
+        messages: Sequence[Any],
+        response: dict[str, Any],
+        scope: UsageScope | None = None,
+    ) -> None:
+        """
+        Record a raw OpenAI-format chat completion response.
+
+        Falls back to tokenizer counts of ``messages`` and the returned
+        message when the provider omits ``usage``.
+
+        Extension points:
+        - Parse streamed responses with a trailing usage chunk.
+        """
+
+        usage = response.get("usage")
+        if usage:
+            details = usage.get("prompt_tokens_details") or {}
+            self.record(
+                model,
+                usage.get("prompt_tokens") or 0,
+                usage.get("completion_tokens") or 0,
+                details.get("cached_tokens") or 0,
+                scope=scope,
+            )
+            return
+        message = ((response.get("choices") or [{}])[0] or {}).get("message") or {}
+        self.record(
+            model,
+            count_messages(self.tokenizer, messages),
+            count_messages(self.tokenizer, [message]),
+            estimated=True,
+            scope=scope,
+        )
+
+    def tenant_usage(self, tenant_id: str) -> dict[str, Any]:
+        """
+        Return the tenant's usage in the current window, broken down by model.
+
+        Extension points:
+        - Return previous windows for billing exports.
+        """
+
+        window = self._window()
+        self.flush()
+        by_model: dict[str, list[int]] = {}
+        with self._db_lock:
+            if self._conn is not None:
+                rows = self._conn.execute(
+                    "SELECT model, SUM(prompt_tokens), SUM(completion_tokens), SUM(cached_tokens), "
+                    "SUM(calls), SUM(estimated_calls) FROM tenant_usage "
+                    "WHERE window_start = ? AND tenant_id = ? GROUP BY model",
+                    (window, tenant_id),
+                ).fetchall()
+                for model, *counts in rows:
+                    by_model[model] = list(counts)
+            with self._lock:
+                for (key_window, key_tenant, model), counts in self._pending.items():
+                    if key_window != window or key_tenant != tenant_id:
+                        continue
+                    total = by_model.setdefault(model, [0] * _FIELDS)
+                    for index, value in enumerate(counts):
+                        total[index] += value
+                used = self._used_tokens(tenant_id, window)
+        budget = self.budget_for(tenant_id)
+        return {
+            "tenant_id": tenant_id,
+            "window_start": window,
+            "window_seconds": self._window_seconds,
+            "used_tokens": used,
+            "budget_tokens": budget,
+            "remaining_tokens": max(budget - used, 0) if budget is not None else None,
+            "models": [
+                {
+                    "model": model,
+                    "prompt_tokens": counts[0],
+                    "completion_tokens": counts[1],
+                    "cached_tokens": counts[2],
+                    "calls": counts[3],
+                    "estimated_calls": counts[4],
+                }
+                for model, counts in sorted(by_model.items())
+            ],
+        }
+
+    def flush(self) -> int:
+        """
+        Write pending aggregates to SQLite and return the number of rows.
+
+        Also re-reads the file's per-tenant totals for the current window,
+        which picks up other processes' usage for ``check_budget``. The
+        SQLite work runs without holding the lock that LLM calls take.
+        A no-op for the in-memory backend.
+
+        Extension points:
+        - Retry failed flushes with backoff instead of keeping rows pending.
+        """
+
+        if self._conn is None:
+            return 0
+        with self._db_lock:
+            with self._lock:
+                # Rows being written still count towards budgets until the
+                # refreshed file totals include them.
+                pending, self._pending = self._pending, {}
+                self._flushing = pending
+            rows = [(*key, *counts) for key, counts in pending.items()]
+            try:
+                if rows:
+                    with self._conn:
+                        self._conn.executemany(_UPSERT, rows)
+            except sqlite3.Error:
+                with self._lock:
+                    self._flushing = {}
+                    for key, counts in pending.items():
+                        merged = self._pending.setdefault(key, [0] * _FIELDS)
+                        for index, value in enumerate(counts):
+                            merged[index] += value
+                raise
+            window = self._window()
+            try:
+                totals = self._file_totals(window)
+            except sqlite3.Error:
+                with self._lock:
+                    # The rows are written; count them as stored until the next re-read.
+                    for (key_window, tenant_id, _), counts in pending.items():
+                        if key_window == self._stored_window:
+                            stored = self._stored_tokens.get(tenant_id, 0)
+                            self._stored_tokens[tenant_id] = stored + counts[0] + counts[1]
+                    self._flushing = {}
+                raise
+            with self._lock:
+                self._stored_window, self._stored_tokens = window, totals
+                self._flushing = {}
+        return len(rows)
+
+    def close(self) -> None:
+        """
+        Stop the flush thread and write remaining aggregates.
+
+        Extension points:
+        - Bound the final flush time during shutdown.
+        """
+
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush()
+
+    def _window(self) -> int:
+        return int(time.time() // self._window_seconds * self._window_seconds)
+
+    def _used_tokens(self, tenant_id: str, window: int) -> int:
+        # Memory only: called under the lock on the LLM call path.
+        used = self._stored_tokens.get(tenant_id, 0) if self._stored_window == window else 0
+        for aggregates in (self._pending, self._flushing):
+            for (key_window, key_tenant, _), counts in aggregates.items():
+                if key_window == window and key_tenant == tenant_id:
+                    used += counts[0] + counts[1]
+        return used
+
+    def _file_totals(self, window: int) -> dict[str, int]:
+        assert self._conn is not None
+        rows = self._conn.execute(
+            "SELECT tenant_id, SUM(prompt_tokens + completion_tokens) FROM tenant_usage "
+            "WHERE window_start = ? GROUP BY tenant_id",
+            (window,),
+        ).fetchall()
+        return {tenant_id: total or 0 for tenant_id, total in rows}
+
+    def _prune(self, window: int) -> None:
+        stale = [key for key in self._pending if key[0] < window]
+        for key in stale:
+            del self._pending[key]
+
+    def _flush_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                logger.exception("Usage flush failed; keeping aggregates for the next flush")
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """
+    Enforce budgets and record usage for chat models built by ``LLMFactory``.
+
+    ``raise_error`` is set so a ``QuotaExceededError`` raised at call start
+    aborts the call before any request is sent.
+
+    Extension points:
+    - Record tool-call argument tokens separately.
+    """
+
+    run_inline = True
+    raise_error = True
+    ignore_chain = True
+    ignore_retriever = True
+    ignore_agent = True
+    ignore_retry = True
+    ignore_custom_event = True
+
+    def __init__(self, ledger: UsageLedger, model: str) -> None:
+        """
+        Bind the handler to a ledger and model label.
+
+        Extension points:
+        - Add provider labels for per-provider spend.
+        """
+
+        self._ledger = ledger
+        self._model = model
+        self._runs: dict[UUID, tuple[UsageScope, list[Any]]] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any] | None,
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        scope = current_scope()
+        self._ledger.check_budget(scope.tenant_id)
+        self._runs[run_id] = (scope, messages[0] if messages else [])
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        scope, messages = self._runs.pop(run_id, (None, []))
+        if scope is None:
+            return
+        prompt = completion = cached = 0
+        reported = False
+        outputs: list[Any] = []
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                outputs.append(message if message is not None else generation.text)
+                usage = getattr(message, "usage_metadata", None)
+                if not usage:
+                    continue
+                reported = True
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+                details = usage.get("input_token_details") or {}
+                cached += sum(
+                    value or 0 for key, value in details.items() if key.endswith("cache_read")
+                )
+        if reported and not prompt and not completion:
+            # Response cache hit (served with zeroed usage): nothing was
+            # spent, as for flow_mcp, which skips hits by header.
+            return
+        if not reported:
+            prompt = count_messages(self._ledger.tokenizer, messages)
+            completion = count_messages(self._ledger.tokenizer, outputs)
+        self._ledger.record(
+            self._model,
+            prompt,
+            completion,
+            cached,
+            estimated=not reported,
+            scope=scope,
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
+
+
+@contextmanager
+def usage_scope(tenant_id: str | None) -> Iterator[UsageScope]:
+    """
+    Bill LLM calls in the block to ``tenant_id``.
+
+    Extension points:
+    - Nest scopes for sub-flows billed to a different tenant.
+    """
+
+    scope = UsageScope(tenant_id=tenant_id or DEFAULT_TENANT)
+    token = _ACTIVE_SCOPE.set(scope)
+    try:
+        yield scope
+    finally:
+        _ACTIVE_SCOPE.reset(token)
+
+
+def current_scope() -> UsageScope:
+    """
+    Return the active usage scope, or the default tenant outside any scope.
+
+    Extension points:
+    - Derive the tenant from request headers for unscoped calls.
+    """
+
+    return _ACTIVE_SCOPE.get() or UsageScope()
+
+
+def count_messages(tokenizer: Tokenizer, messages: Sequence[Any]) -> int:
+    """
+    Count tokens of chat messages (LangChain messages or OpenAI dicts).
+
+    Adds a small per-message overhead for role and formatting tokens.
+
+    Extension points:
+    - Use model-specific per-message overheads.
+    """
+
+    total = 0
+    for message in messages:
+        if isinstance(message, dict):
+            content = message.get("content")
+            tool_calls = message.get("tool_calls")
+        elif isinstance(message, str):
+            content, tool_calls = message, None
+        else:
+            content = getattr(message, "content", "")
+            tool_calls = getattr(message, "tool_calls", None)
+        text = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+        if tool_calls:
+            text += json.dumps(tool_calls, ensure_ascii=False, default=str)
+        total += tokenizer.count_text(text) + 4
+    return total
+
+
+def build_tokenizer(settings: Settings) -> Tokenizer:
+    """
+    Build the configured tokenizer, falling back to the offline estimate.
+
+    Extension points:
+    - Register additional tokenizers by name.
+    """
+
+    name = settings.usage_tokenizer
+    if name == "estimate":
+        return EstimateTokenizer()
+    if name != "tiktoken":
+        raise ValueError(f"Unsupported usage tokenizer: {name}")
+    try:
+        return TiktokenTokenizer(settings.usage_tiktoken_encoding)
+    except Exception as exc:
+        logger.warning("tiktoken unavailable (%s); falling back to estimated token counts", exc)
+        return EstimateTokenizer()
+
+
+def build_usage_ledger(settings: Settings) -> UsageLedger | None:
+    """
+    Build the configured usage ledger, or None when accounting is disabled.
+
+    Extension points:
+    - Register additional backends by name.
+    """
+
+    backend = settings.usage_backend
+    if backend == "none":
+        return None
+    if backend not in {"memory", "sqlite"}:
+        raise ValueError(f"Unsupported usage backend: {backend}")
+    return UsageLedger(
+        tokenizer=build_tokenizer(settings),
+        sqlite_path=settings.usage_path if backend == "sqlite" else None,
+        window_seconds=settings.usage_window_seconds,
+        default_budget=settings.usage_default_budget_tokens,
+        tenant_budgets=settings.usage_tenant_budgets,
+        flush_interval_seconds=settings.usage_flush_seconds,
+    )
@@ -6,11 +6,13 @@ Extension points:
 - Add automatic LangChain tool schema generation.
 """
 
+import time
 from collections.abc import Callable
 from typing import Any
 
 from pydantic import BaseModel
 
+from app.core.metrics import TOOL_CALLS, TOOL_SECONDS
 from app.models.functions import FunctionSpec
 
 
@@ -64,6 +66,38 @@ class FunctionRegistry:
 
         return self._functions[name]
 
+    def invoke(self, name: str, args: Any) -> Any:
+        """
+        Execute a registered tool and record call metrics.
+
+        Mapping arguments are passed as keyword arguments; anything else is
+        passed as the single positional argument.
+
+        Extension points:
+        - Validate arguments against the registered schema.
+        """
+
+        function = self._functions[name]
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = function(**args) if isinstance(args, dict) else function(args)
+            outcome = "ok"
+            return result
+        finally:
+            TOOL_SECONDS.labels(name).observe(time.perf_counter() - started)
+            TOOL_CALLS.labels(name, outcome).inc()
+
+    def names(self) -> list[str]:
+        """
+        Return the names of all registered tools.
+
+        Extension points:
+        - Filter by tenant or permission scope.
+        """
+
+        return list(self._functions)
+
     def list_specs(self) -> list[FunctionSpec]:
         """
         List metadata for all registered tools.
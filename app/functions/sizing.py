@@ -0,0 +1,145 @@
+"""
+Deterministic T-shirt sizing engine.
+
+The sizing LLM only extracts the five 1-5 criterion scores and the
+technical-risk flag; weighting, veto rules, and size bands are applied here.
+
+Extension points:
+- Load weights and bands from configuration per product line.
+- Persist breakdowns for calibration reports.
+"""
+
+from bisect import bisect_left
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from app.models.sizing import SizingBreakdown, SizingCriteria
+
+
+SIZES = ("XS", "S", "M", "L")
+
+CRITERION_WEIGHTS: dict[str, float] = {
+    "is_akisi_netligi": 0.5,
+    "etkilenen_sistem": 1.5,
+    "ekip_koordinasyonu": 1.0,
+    "gelistirme_derinligi": 2.5,
+    "test_etkisi": 1.0,
+}
+
+# Inclusive upper bounds for XS, S and M; anything above is L.
+DEFAULT_SIZE_BANDS: tuple[float, float, float] = (11.0, 18.0, 26.0)
+
+RULE_NOT_DEVELOPMENT = "development_degil"
+RULE_LARGE_LOCK = "buyuk_is_kilidi"
+RULE_TECHNICAL_RISK = "teknik_risk_min_m"
+RULE_XS_GUARD = "xs_korumasi"
+
+
+class SizingEngine:
+    """
+    Compute weighted scores, veto overrides, and T-shirt sizes.
+
+    Extension points:
+    - Add new veto rules or per-tenant band tables.
+    """
+
+    def __init__(
+        self,
+        weights: Mapping[str, float] | None = None,
+        bands: tuple[float, float, float] = DEFAULT_SIZE_BANDS,
+    ) -> None:
+        """
+        Initialize the engine with criterion weights and band boundaries.
+
+        Extension points:
+        - Validate that bands are strictly increasing.
+        """
+
+        self._weights = dict(weights or CRITERION_WEIGHTS)
+        self._bands = bands
+        # Precomputed weighted value per criterion and 1-5 score.
+        self._tables = {
+            name: [0.0] + [score * weight for score in range(1, 6)]
+            for name, weight in self._weights.items()
+        }
+
+    def score(self, criteria: SizingCriteria) -> SizingBreakdown:
+        """
+        Size a single request and return the full breakdown.
+
+        Extension points:
+        - Attach explanations for each applied rule.
+        """
+
+        weighted = {
+            name: table[getattr(criteria, name)] for name, table in self._tables.items()
+        }
+        total = sum(weighted.values())
+        band_size = self._band_size(total)
+        size, rules = self._apply_rules(
+            band_size,
+            criteria.talep_tipi,
+            criteria.etkilenen_sistem,
+            criteria.gelistirme_derinligi,
+            criteria.teknik_risk,
+        )
+        return SizingBreakdown(
+            talep_tipi=criteria.talep_tipi,
+            weighted_scores=weighted,
+            total_score=total,
+            band_size=band_size,
+            t_shirt_size=size,
+            applied_rules=rules,
+        )
+
+    def score_batch(self, rows: Iterable[Mapping[str, Any]]) -> list[str]:
+        """
+        Size many stored criteria rows and return only the final sizes.
+
+        Rows are plain mappings with the ``SizingCriteria`` field names and
+        are not re-validated, so thousands of stored ideas can be re-scored
+        in one pass when bands or weights change.
+
+        Extension points:
+        - Return totals alongside sizes for distribution reports.
+        """
+
+        tables = list(self._tables.items())
+        sizes: list[str] = []
+        for row in rows:
+            total = sum(table[row[name]] for name, table in tables)
+            size, _ = self._apply_rules(
+                self._band_size(total),
+                row.get("talep_tipi", "Development"),
+                row["etkilenen_sistem"],
+                row["gelistirme_derinligi"],
+                row.get("teknik_risk", False),
+            )
+            sizes.append(size)
+        return sizes
+
+    def _band_size(self, total: float) -> str:
+        return SIZES[bisect_left(self._bands, total)]
+
+    def _apply_rules(
+        self,
+        band_size: str,
+        talep_tipi: str,
+        etkilenen_sistem: int,
+        gelistirme_derinligi: int,
+        teknik_risk: bool,
+    ) -> tuple[str, list[str]]:
+        if talep_tipi != "Development":
+            return "XS", [RULE_NOT_DEVELOPMENT]
+        if etkilenen_sistem >= 3 and gelistirme_derinligi >= 4:
+            return "L", [] if band_size == "L" else [RULE_LARGE_LOCK]
+
+        size = band_size
+        rules: list[str] = []
+        if teknik_risk and SIZES.index(size) < SIZES.index("M"):
+            size = "M"
+            rules.append(RULE_TECHNICAL_RISK)
+        if gelistirme_derinligi > 1 and size == "XS":
+            size = "S"
+            rules.append(RULE_XS_GUARD)
+        return size, rules
@@ -6,11 +6,16 @@ Extension points:
 - Replace these stubs with real business logic.
 """
 
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
 from app.functions.registry import FunctionRegistry
+from app.functions.sizing import SizingEngine
+from app.models.sizing import SizingCriteria
+
+
+_SIZING_ENGINE = SizingEngine()
 
 
 class SubmitIdeaFormPayload(BaseModel):
@@ -58,11 +63,12 @@ class SubmitIdeaFormPayload(BaseModel):
 
 class ScoreComplexityPayload(BaseModel):
     """
-    Input schema for complexity scoring output.
+    Input schema for sizing criterion extraction.
+
+    The T-shirt size itself is computed by the sizing engine.
 
     Extension points:
-    - Add scoring breakdown fields or rationale metadata.
-    - Add validation for required assessment fields.
+    - Add rationale fields per criterion.
     """
 
     Talep_Tipi: Literal["Development", "Development Değil"] = Field(
@@ -72,8 +78,14 @@ class ScoreComplexityPayload(BaseModel):
         description="Kısa gerekçe",
         max_length=150,
     )
-    T_Shirt_Size: Literal["XS", "S", "M", "L"] = Field(
-        description="Belirlenen efor büyüklüğü."
+    Is_Akisi_Netligi: int = Field(ge=1, le=5, description="A. İş akışı netliği (1-5).")
+    Etkilenen_Sistem: int = Field(ge=1, le=5, description="B. Etkilenen sistem sayısı (1-5).")
+    Ekip_Koordinasyonu: int = Field(ge=1, le=5, description="C. Ekip koordinasyonu (1-5).")
+    Gelistirme_Derinligi: int = Field(ge=1, le=5, description="D. Geliştirme derinliği (1-5).")
+    Test_Etkisi: int = Field(ge=1, le=5, description="E. Test ve iş birimi etkisi (1-5).")
+    Teknik_Risk: bool = Field(
+        default=False,
+        description="SDK upgrade, framework geçişi veya refactoring ise true.",
     )
 
 
@@ -114,19 +126,34 @@ def submit_idea_form(
 def score_complexity(
     Talep_Tipi: str,
     Analiz_Notu: str,
-    T_Shirt_Size: str,
-) -> dict[str, str]:
+    Is_Akisi_Netligi: int,
+    Etkilenen_Sistem: int,
+    Ekip_Koordinasyonu: int,
+    Gelistirme_Derinligi: int,
+    Test_Etkisi: int,
+    Teknik_Risk: bool = False,
+) -> dict[str, Any]:
     """
-    Persist or forward the complexity scoring decision.
+    Compute the T-shirt size from the extracted sizing criteria.
 
     Extension points:
     - Store scoring decisions in a database.
     - Trigger downstream estimation workflows.
     """
 
-    _ = (Talep_Tipi, Analiz_Notu, T_Shirt_Size)
+    _ = Analiz_Notu
+    criteria = SizingCriteria(
+        talep_tipi=Talep_Tipi,
+        is_akisi_netligi=Is_Akisi_Netligi,
+        etkilenen_sistem=Etkilenen_Sistem,
+        ekip_koordinasyonu=Ekip_Koordinasyonu,
+        gelistirme_derinligi=Gelistirme_Derinligi,
+        test_etkisi=Test_Etkisi,
+        teknik_risk=Teknik_Risk,
+    )
+    breakdown = _SIZING_ENGINE.score(criteria)
     # TODO: Implement persistence or notification logic.
-    return {"status": "scored"}
+    return {"status": "scored", **breakdown.model_dump()}
 
 
 def register_builtin_tools(registry: FunctionRegistry) -> None:
@@ -147,6 +174,6 @@ def register_builtin_tools(registry: FunctionRegistry) -> None:
     registry.register(
         name="score_complexity",
         func=score_complexity,
-        description="Talebi efor büyüklüğüne göre puanlar.",
+        description="Talebin efor kriterlerini puanlar; beden hesaplaması sistemde yapılır.",
         args_schema=ScoreComplexityPayload,
     )
@@ -0,0 +1,415 @@
+"""
+Client-side load balancing and failover across LLM endpoint replicas.
+
+Requests addressed to a provider's configured base URL are rewritten to one
+of its replicas, chosen by least outstanding requests or by an EWMA of
+response latency weighted by load. Failures (transport errors and 5xx) are
+tracked passively: a replica that fails several times in a row is ejected
+for a cool-down period, and the failed request is retried on another
+replica, so a single bad node does not fail user requests.
+
+Extension points:
+- Add active health probes against ``/models``.
+- Add weighted replicas for mixed hardware.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from typing import Any
+
+import httpx
+
+from app.core.config import Settings
+from app.core.metrics import (
+    LLM_FAILOVERS,
+    LLM_REPLICA_EJECTIONS,
+    LLM_REPLICA_OUTSTANDING,
+    LLM_REPLICA_REQUESTS,
+)
+
+STRATEGIES = ("least_outstanding", "ewma")
+
+
+class Replica:
+    """
+    Live load and health state for one endpoint replica.
+
+    Extension points:
+    - Track per-model latency on shared replicas.
+    """
+
+    def __init__(self, base_url: str) -> None:
+        """
+        Initialize an idle, healthy replica.
+
+        Extension points:
+        - Seed latency from a previous run.
+        """
+
+        self.base_url = base_url.rstrip("/")
+        self.outstanding = 0
+        self.ewma_seconds: float | None = None
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+
+class ReplicaSet:
+    """
+    Pick replicas for one logical base URL and track their health.
+
+    Extension points:
+    - Share health state across workers through a sidecar or Redis.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        replica_urls: list[str],
+        strategy: str = "least_outstanding",
+        failure_threshold: int = 3,
+        ejection_seconds: float = 30.0,
+        ewma_alpha: float = 0.3,
+    ) -> None:
+        """
+        Initialize the set for ``base_url`` with its replica URLs.
+
+        Extension points:
+        - Validate that replicas serve the same models.
+        """
+
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unsupported load-balancing strategy: {strategy}")
+        self.base_url = base_url.rstrip("/")
+        self._replicas = [Replica(url) for url in replica_urls]
+        self._strategy = strategy
+        self._failure_threshold = failure_threshold
+        self._ejection_seconds = ejection_seconds
+        self._ewma_alpha = ewma_alpha
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._replicas)
+
+    def matches(self, url: httpx.URL) -> bool:
+        """
+        Return whether a request URL is addressed to this set's base URL.
+
+        Extension points:
+        - Match on host aliases as well as the configured URL.
+        """
+
+        target = str(url)
+        return target == self.base_url or target.startswith(self.base_url + "/")
+
+    def acquire(self, exclude: set[Replica]) -> Replica:
+        """
+        Pick a replica and count a request as outstanding on it.
+
+        Ejected replicas are skipped unless no healthy one remains, and
+        replicas in ``exclude`` (already tried) are skipped when possible.
+
+        Extension points:
+        - Add zone-aware preference.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            untried = [r for r in self._replicas if r not in exclude] or list(self._replicas)
+            candidates = [r for r in untried if r.ejected_until <= now] or untried
+            random.shuffle(candidates)
+            replica = min(candidates, key=self._score)
+            replica.outstanding += 1
+        LLM_REPLICA_OUTSTANDING.labels(replica.base_url).inc()
+        return replica
+
+    def release(self, replica: Replica) -> None:
+        """
+        Stop counting a finished request against a replica.
+
+        Extension points:
+        - Record per-request byte counts.
+        """
+
+        with self._lock:
+            replica.outstanding -= 1
+        LLM_REPLICA_OUTSTANDING.labels(replica.base_url).dec()
+
+    def record_success(self, replica: Replica, seconds: float) -> None:
+        """
+        Record a healthy response and update the replica's latency EWMA.
+
+        Extension points:
+        - Decay the EWMA by wall time rather than per sample.
+        """
+
+        with self._lock:
+            replica.consecutive_failures = 0
+            replica.ejected_until = 0.0
+            if replica.ewma_seconds is None:
+                replica.ewma_seconds = seconds
+            else:
+                replica.ewma_seconds += self._ewma_alpha * (seconds - replica.ewma_seconds)
+        LLM_REPLICA_REQUESTS.labels(replica.base_url, "ok").inc()
+
+    def record_failure(self, replica: Replica) -> None:
+        """
+        Record a failed request, ejecting the replica past the threshold.
+
+        Extension points:
+        - Back off ejection time exponentially for flapping replicas.
+        """
+
+        ejected = False
+        now = time.monotonic()
+        with self._lock:
+            replica.consecutive_failures += 1
+            if replica.consecutive_failures >= self._failure_threshold:
+                ejected = replica.ejected_until <= now
+                replica.ejected_until = now + self._ejection_seconds
+        LLM_REPLICA_REQUESTS.labels(replica.base_url, "error").inc()
+        if ejected:
+            LLM_REPLICA_EJECTIONS.labels(replica.base_url).inc()
+
+    def rewrite(self, request: httpx.Request, replica: Replica) -> httpx.Request:
+        """
+        Build a copy of ``request`` addressed to ``replica``.
+
+        Extension points:
+        - Add per-replica authentication headers.
+        """
+
+        url = replica.base_url + str(request.url)[len(self.base_url):]
+        headers = request.headers.copy()
+        headers.pop("host", None)
+        return httpx.Request(
+            request.method,
+            url,
+            headers=headers,
+            content=request.content,
+            extensions=request.extensions,
+        )
+
+    def _score(self, replica: Replica) -> tuple[float, float]:
+        latency = replica.ewma_seconds or 0.0
+        if self._strategy == "ewma":
+            return latency * (replica.outstanding + 1), replica.outstanding
+        return replica.outstanding, latency
+
+
+class LoadBalancingTransport(httpx.BaseTransport):
+    """
+    httpx transport that spreads requests over replica sets with failover.
+
+    Extension points:
+    - Retry only idempotent requests on read timeouts.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        replica_sets: list[ReplicaSet],
+        max_attempts: int = 2,
+    ) -> None:
+        self._transport = transport
+        self._replica_sets = replica_sets
+        self._max_attempts = max_attempts
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        replica_set = _replica_set_for(self._replica_sets, request)
+        if replica_set is None:
+            return self._transport.handle_request(request)
+
+        tried: set[Replica] = set()
+        attempts = min(self._max_attempts, len(replica_set))
+        for attempt in range(attempts):
+            replica = replica_set.acquire(tried)
+            tried.add(replica)
+            started = time.perf_counter()
+            try:
+                response = self._transport.handle_request(replica_set.rewrite(request, replica))
+            except httpx.TransportError:
+                replica_set.release(replica)
+                replica_set.record_failure(replica)
+                if attempt == attempts - 1:
+                    raise
+                LLM_FAILOVERS.labels().inc()
+                continue
+            except BaseException:
+                replica_set.release(replica)
+                raise
+            if response.status_code >= 500:
+                replica_set.record_failure(replica)
+                if attempt < attempts - 1:
+                    response.close()
+                    replica_set.release(replica)
+                    LLM_FAILOVERS.labels().inc()
+                    continue
+            else:
+                replica_set.record_success(replica, time.perf_counter() - started)
+            return httpx.Response(
+                response.status_code,
+                headers=response.headers,
+                stream=ReleasingStream(response.stream, _once(replica_set.release, replica)),
+                extensions=response.extensions,
+            )
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncLoadBalancingTransport(httpx.AsyncBaseTransport):
+    """
+    Async variant of ``LoadBalancingTransport``.
+
+    Extension points:
+    - Race a second replica when the first is slow to connect.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        replica_sets: list[ReplicaSet],
+        max_attempts: int = 2,
+    ) -> None:
+        self._transport = transport
+        self._replica_sets = replica_sets
+        self._max_attempts = max_attempts
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        replica_set = _replica_set_for(self._replica_sets, request)
+        if replica_set is None:
+            return await self._transport.handle_async_request(request)
+
+        tried: set[Replica] = set()
+        attempts = min(self._max_attempts, len(replica_set))
+        for attempt in range(attempts):
+            replica = replica_set.acquire(tried)
+            tried.add(replica)
+            started = time.perf_counter()
+            try:
+                response = await self._transport.handle_async_request(
+                    replica_set.rewrite(request, replica)
+                )
+            except httpx.TransportError:
+                replica_set.release(replica)
+                replica_set.record_failure(replica)
+                if attempt == attempts - 1:
+                    raise
+                LLM_FAILOVERS.labels().inc()
+                continue
+            except BaseException:
+                replica_set.release(replica)
+                raise
+            if response.status_code >= 500:
+                replica_set.record_failure(replica)
+                if attempt < attempts - 1:
+                    await response.aclose()
+                    replica_set.release(replica)
+                    LLM_FAILOVERS.labels().inc()
+                    continue
+            else:
+                replica_set.record_success(replica, time.perf_counter() - started)
+            return httpx.Response(
+                response.status_code,
+                headers=response.headers,
+                stream=AsyncReleasingStream(response.stream, _once(replica_set.release, replica)),
+                extensions=response.extensions,
+            )
+        raise AssertionError("unreachable")
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def build_replica_sets(settings: Settings) -> list[ReplicaSet]:
+    """
+    Build replica sets for providers configured with several base URLs.
+
+    Extension points:
+    - Load replica lists from service discovery.
+    """
+
+    pairs = (
+        (settings.local_base_url, settings.local_base_urls),
+        (settings.openai_base_url, settings.openai_base_urls),
+    )
+    return [
+        ReplicaSet(
+            base_url=base_url,
+            replica_urls=replica_urls,
+            strategy=settings.llm_lb_strategy,
+            failure_threshold=settings.llm_lb_failure_threshold,
+            ejection_seconds=settings.llm_lb_ejection_seconds,
+        )
+        for base_url, replica_urls in pairs
+        if replica_urls
+    ]
+
+
+class ReleasingStream(httpx.SyncByteStream):
+    """
+    Response stream that runs a release callback when closed.
+
+    Extension points:
+    - Release on the final chunk for clients that never close streams.
+    """
+
+    def __init__(self, stream: Any, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class AsyncReleasingStream(httpx.AsyncByteStream):
+    """
+    Async variant of ``ReleasingStream``.
+
+    Extension points:
+    - Release on the final chunk for clients that never close streams.
+    """
+
+    def __init__(self, stream: Any, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _replica_set_for(replica_sets: list[ReplicaSet], request: httpx.Request) -> ReplicaSet | None:
+    for replica_set in replica_sets:
+        if replica_set.matches(request.url):
+            return replica_set
+    return None
+
+
+def _once(release: Callable[[Replica], None], replica: Replica) -> Callable[[], None]:
+    released = False
+
+    def run() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            release(replica)
+
+    return run
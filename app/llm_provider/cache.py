@@ -0,0 +1,376 @@
+"""
+Content-addressed cache for deterministic chat completion responses.
+
+Only non-streaming requests with ``temperature == 0`` are cached. Keys are
+derived from the target origin and path plus the canonical request body
+(model, normalized messages, tools, temperature, and the remaining sampling
+parameters), so the LangGraph flow and the MCP step engine share entries for
+identical calls to the same endpoint. Hits carry
+``x-llm-cache: hit`` and zeroed ``usage``, so they add no provider tokens to
+metrics or budgets.
+
+Extension points:
+- Add a Redis tier for multi-instance deployments.
+- Add semantic (embedding-based) lookup on top of exact matches.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any
+
+import httpx
+
+from app.core.config import Settings
+from app.core.tracing import record_cache_hit
+
+# Trimming the SQLite tier scans it, so it runs periodically, not per store.
+_PRUNE_INTERVAL_SECONDS = 60.0
+
+
+class LLMResponseCache:
+    """
+    Two-tier response cache: an in-memory LRU and an optional SQLite tier.
+
+    Extension points:
+    - Add per-model TTL overrides.
+    - Add cache warming from recorded traffic.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        max_entries: int,
+        sqlite_path: str | None = None,
+        max_sqlite_entries: int = 100_000,
+    ) -> None:
+        """
+        Initialize cache tiers and counters.
+
+        Extension points:
+        - Add compression for large responses.
+        """
+
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._max_sqlite_entries = max_sqlite_entries
+        self._memory: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "memory_hits": 0,
+            "sqlite_hits": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+        self._conn: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self._next_prune = 0.0
+        if sqlite_path:
+            self._conn = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, created_at REAL NOT NULL, body BLOB NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Return a cached response body, or None on a miss or expired entry.
+
+        Extension points:
+        - Add stale-while-revalidate semantics.
+        """
+
+        body = self._memory_get(key)
+        if body is None and self._conn is not None:
+            body = self._sqlite_get(key)
+        if body is None:
+            self._count_miss()
+        return body
+
+    async def aget(self, key: str) -> bytes | None:
+        """
+        Async ``get``; the SQLite lookup runs in a worker thread.
+
+        Extension points:
+        - Bound concurrent SQLite lookups.
+        """
+
+        body = self._memory_get(key)
+        if body is None and self._conn is not None:
+            body = await asyncio.to_thread(self._sqlite_get, key)
+        if body is None:
+            self._count_miss()
+        return body
+
+    def set(self, key: str, body: bytes) -> None:
+        """
+        Store a response body in every configured tier.
+
+        The SQLite tier drops expired rows and trims itself to
+        ``max_sqlite_entries`` at most once per ``_PRUNE_INTERVAL_SECONDS``,
+        so it may briefly exceed the cap.
+
+        Extension points:
+        - Skip storing oversized responses.
+        """
+
+        now = self._memory_set(key, body)
+        if self._conn is not None:
+            self._sqlite_set(key, now, body)
+
+    async def aset(self, key: str, body: bytes) -> None:
+        """
+        Async ``set``; the SQLite write runs in a worker thread.
+
+        Extension points:
+        - Batch SQLite writes from concurrent requests.
+        """
+
+        now = self._memory_set(key, body)
+        if self._conn is not None:
+            await asyncio.to_thread(self._sqlite_set, key, now, body)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return hit/miss counters and the current in-memory size.
+
+        Extension points:
+        - Add per-model breakdowns.
+        """
+
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._memory),
+                "hit_ratio": self._counters["hits"] / lookups if lookups else 0.0,
+            }
+
+    def _memory_get(self, key: str) -> bytes | None:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if now - entry[0] > self._ttl_seconds:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self._counters["hits"] += 1
+            self._counters["memory_hits"] += 1
+        record_cache_hit()
+        return entry[1]
+
+    def _sqlite_get(self, key: str) -> bytes | None:
+        now = time.time()
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT created_at, body FROM responses WHERE key = ? AND created_at >= ?",
+                (key, now - self._ttl_seconds),
+            ).fetchone()
+        if row is None:
+            return None
+        with self._lock:
+            self._remember(key, row[0], row[1])
+            self._counters["hits"] += 1
+            self._counters["sqlite_hits"] += 1
+        record_cache_hit()
+        return row[1]
+
+    def _count_miss(self) -> None:
+        with self._lock:
+            self._counters["misses"] += 1
+
+    def _memory_set(self, key: str, body: bytes) -> float:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, body)
+            self._counters["stores"] += 1
+        return now
+
+    def _sqlite_set(self, key: str, now: float, body: bytes) -> None:
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                (key, now, body),
+            )
+            if time.monotonic() < self._next_prune:
+                return
+            self._next_prune = time.monotonic() + _PRUNE_INTERVAL_SECONDS
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ? OR key IN ("
+                "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (now - self._ttl_seconds, self._max_sqlite_entries),
+            )
+
+    def _remember(self, key: str, created_at: float, body: bytes) -> None:
+        self._memory[key] = (created_at, body)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+
+class CachingTransport(httpx.BaseTransport):
+    """
+    httpx transport that serves cacheable chat completions from the cache.
+
+    Extension points:
+    - Cache embeddings or other deterministic endpoints.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, cache: LLMResponseCache) -> None:
+        self._transport = transport
+        self._cache = cache
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = _request_cache_key(request)
+        if key is None:
+            return self._transport.handle_request(request)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return _cached_response(request, cached)
+        response = self._transport.handle_request(request)
+        if response.status_code == 200:
+            self._cache.set(key, response.read())
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    """
+    Async variant of ``CachingTransport``.
+
+    Extension points:
+    - Coalesce concurrent misses for the same key.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: LLMResponseCache) -> None:
+        self._transport = transport
+        self._cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = _request_cache_key(request)
+        if key is None:
+            return await self._transport.handle_async_request(request)
+        cached = await self._cache.aget(key)
+        if cached is not None:
+            return _cached_response(request, cached)
+        response = await self._transport.handle_async_request(request)
+        if response.status_code == 200:
+            await self._cache.aset(key, await response.aread())
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def is_cacheable(body: dict[str, Any]) -> bool:
+    """
+    Return whether a chat completion request body may be served from cache.
+
+    Extension points:
+    - Allow caching seeded requests with non-zero temperature.
+    """
+
+    return body.get("temperature") == 0 and not body.get("stream")
+
+
+def response_cache_key(body: dict[str, Any]) -> str:
+    """
+    Build the content-addressed key for a chat completion request body.
+
+    Extension points:
+    - Ignore fields that do not affect the output for a given provider.
+    """
+
+    canonical = dict(body)
+    canonical["messages"] = [_normalize_message(m) for m in body.get("messages") or []]
+    encoded = json.dumps(canonical, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def build_response_cache(settings: Settings) -> LLMResponseCache | None:
+    """
+    Build the configured response cache, or None when caching is disabled.
+
+    Extension points:
+    - Register additional cache backends by name.
+    """
+
+    backend = settings.llm_cache_backend
+    if backend == "none":
+        return None
+    if backend not in {"memory", "sqlite"}:
+        raise ValueError(f"Unsupported LLM cache backend: {backend}")
+    return LLMResponseCache(
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        max_entries=settings.llm_cache_max_entries,
+        sqlite_path=settings.llm_cache_path if backend == "sqlite" else None,
+        max_sqlite_entries=settings.llm_cache_max_sqlite_entries,
+    )
+
+
+def _normalize_message(message: Any) -> Any:
+    if not isinstance(message, dict):
+        return message
+    normalized = {key: value for key, value in message.items() if value is not None}
+    content = normalized.get("content")
+    if isinstance(content, str):
+        normalized["content"] = unicodedata.normalize("NFC", content.strip())
+    return normalized
+
+
+def _request_cache_key(request: httpx.Request) -> str | None:
+    if request.method != "POST" or not request.url.path.endswith("/chat/completions"):
+        return None
+    try:
+        body = json.loads(request.content)
+    except (ValueError, httpx.RequestNotRead):
+        return None
+    if not isinstance(body, dict) or not is_cacheable(body):
+        return None
+    # The same body sent to another provider or endpoint is a different call.
+    url = request.url
+    target = f"{url.scheme}://{url.netloc.decode('ascii')}{url.path}\n{response_cache_key(body)}"
+    return hashlib.sha256(target.encode("utf-8")).hexdigest()
+
+
+def _cached_response(request: httpx.Request, body: bytes) -> httpx.Response:
+    return httpx.Response(
+        status_code=200,
+        headers={"content-type": "application/json", "x-llm-cache": "hit"},
+        content=_without_usage(body),
+        request=request,
+    )
+
+
+def _without_usage(body: bytes) -> bytes:
+    # A hit spends no provider tokens. LangChain callbacks never see the
+    # x-llm-cache header, so zero the usage instead of replaying the original
+    # counts into token metrics and tenant budgets.
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(payload, dict) or not payload.get("usage"):
+        return body
+    payload["usage"] = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,394 @@
+"""
+Record/replay cassettes for LLM HTTP traffic.
+
+In ``record`` mode every LLM request passes through and its response
+(status, content type and encoding, raw body chunks with their arrival
+offsets) is appended to a gzip-compressed JSON file named after the request
+hash. In ``replay`` mode responses come from those files and the provider is
+never contacted; ``auto`` replays hits and records misses. Replay can reproduce the recorded
+timing (``original``) or return immediately (``none``), which isolates our
+own overhead (graph, parsing, serialization) from provider latency.
+
+Request hashes cover method, path and the canonical JSON body (the response
+cache's key), but not the host or headers, so cassettes recorded against one
+endpoint replay against any other. A request recorded several times replays
+its responses in recorded order, cycling.
+
+Extension points:
+- Redact message content before writing cassettes to shared storage.
+- Match requests fuzzily (ignore ``max_tokens``, tool order).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from app.core.config import Settings
+from app.core.metrics import LLM_CASSETTE
+from app.llm_provider.cache import response_cache_key
+
+MODES = {"record", "replay", "auto"}
+LATENCIES = {"original", "none"}
+
+
+class CassetteMissError(httpx.TransportError):
+    """
+    Raised in replay mode for a request that has no recording.
+
+    Extension points:
+    - Suggest the closest recorded request.
+    """
+
+
+class Cassette:
+    """
+    Directory of recorded interactions keyed by request hash.
+
+    Extension points:
+    - Pack all interactions of a run into one archive.
+    """
+
+    def __init__(self, directory: str, mode: str = "replay", latency: str = "original") -> None:
+        """
+        Initialize a cassette rooted at ``directory``.
+
+        Extension points:
+        - Scale replayed latency by a factor.
+        """
+
+        if mode not in MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        if latency not in LATENCIES:
+            raise ValueError(f"Unsupported cassette latency: {latency}")
+        self._directory = Path(directory)
+        self.mode = mode
+        self.latency = latency
+        self._entries: dict[str, list[dict[str, Any]]] = {}
+        self._positions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def key(self, request: httpx.Request) -> str:
+        """
+        Return the hash identifying ``request`` in the cassette.
+
+        Extension points:
+        - Include selected headers (API version) in the hash.
+        """
+
+        content = request.read()
+        try:
+            body: Any = json.loads(content) if content else None
+        except ValueError:
+            body = None
+        if isinstance(body, dict):
+            digest = response_cache_key(body)
+        else:
+            digest = hashlib.sha256(content).hexdigest()
+        prefix = f"{request.method} {request.url.path}\n".encode("utf-8")
+        return hashlib.sha256(prefix + digest.encode("ascii")).hexdigest()
+
+    def next_recording(self, key: str) -> dict[str, Any] | None:
+        """
+        Return the next recorded response for ``key``, or None.
+
+        Extension points:
+        - Fail instead of cycling once recordings are exhausted.
+        """
+
+        with self._lock:
+            recordings = self._load(key)
+            if not recordings:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return recordings[position % len(recordings)]
+
+    def record(self, key: str, request: httpx.Request, recording: dict[str, Any]) -> None:
+        """
+        Append a recorded response for ``key`` and write its file.
+
+        Extension points:
+        - Buffer writes and flush in the background.
+        """
+
+        with self._lock:
+            recordings = self._load(key)
+            recordings.append(recording)
+            payload = {
+                "request": {
+                    "method": request.method,
+                    "path": request.url.path,
+                    "body": _decode_body(request.content),
+                },
+                "responses": recordings,
+            }
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_suffix(".tmp")
+            encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+            temporary.write_bytes(gzip.compress(encoded.encode("utf-8")))
+            temporary.replace(path)
+        LLM_CASSETTE.labels("recorded").inc()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the mode and the number of loaded request hashes.
+
+        Extension points:
+        - Count hits and misses per model.
+        """
+
+        with self._lock:
+            return {"mode": self.mode, "latency": self.latency, "loaded": len(self._entries)}
+
+    def _load(self, key: str) -> list[dict[str, Any]]:
+        recordings = self._entries.get(key)
+        if recordings is None:
+            path = self._path(key)
+            recordings = []
+            if path.exists():
+                recordings = json.loads(gzip.decompress(path.read_bytes()))["responses"]
+            self._entries[key] = recordings
+        return recordings
+
+    def _path(self, key: str) -> Path:
+        return self._directory / key[:2] / f"{key}.json.gz"
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """
+    httpx transport that records to or replays from a cassette.
+
+    Extension points:
+    - Record only requests matching a path filter.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, cassette: Cassette) -> None:
+        self._transport = transport
+        self._cassette = cassette
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = self._cassette.key(request)
+        if self._cassette.mode != "record":
+            recording = self._cassette.next_recording(key)
+            if recording is not None:
+                LLM_CASSETTE.labels("hit").inc()
+                if self._cassette.latency == "original":
+                    time.sleep(recording["first_byte_seconds"])
+                return _replayed_response(
+                    request, recording, _ReplayStream(recording, self._cassette.latency)
+                )
+            LLM_CASSETTE.labels("miss").inc()
+            if self._cassette.mode == "replay":
+                raise CassetteMissError(f"No cassette recording for {request.method} {request.url.path}")
+        started = time.perf_counter()
+        response = self._transport.handle_request(request)
+        if response.status_code >= 500:
+            return response
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(
+                response, started, lambda rec: self._cassette.record(key, request, rec)
+            ),
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """
+    Async variant of ``CassetteTransport``.
+
+    Extension points:
+    - Write recordings off the event loop.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cassette: Cassette) -> None:
+        self._transport = transport
+        self._cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = self._cassette.key(request)
+        if self._cassette.mode != "record":
+            recording = self._cassette.next_recording(key)
+            if recording is not None:
+                LLM_CASSETTE.labels("hit").inc()
+                if self._cassette.latency == "original":
+                    await asyncio.sleep(recording["first_byte_seconds"])
+                return _replayed_response(
+                    request, recording, _AsyncReplayStream(recording, self._cassette.latency)
+                )
+            LLM_CASSETTE.labels("miss").inc()
+            if self._cassette.mode == "replay":
+                raise CassetteMissError(f"No cassette recording for {request.method} {request.url.path}")
+        started = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        if response.status_code >= 500:
+            return response
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_AsyncRecordingStream(
+                response, started, lambda rec: self._cassette.record(key, request, rec)
+            ),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def build_cassette(settings: Settings) -> Cassette | None:
+    """
+    Build the configured cassette, or None when record/replay is off.
+
+    Extension points:
+    - Pick cassettes per benchmark scenario.
+    """
+
+    if settings.llm_cassette_mode == "off":
+        return None
+    return Cassette(
+        directory=settings.llm_cassette_dir,
+        mode=settings.llm_cassette_mode,
+        latency=settings.llm_cassette_latency,
+    )
+
+
+class _Recorder:
+    def __init__(self, response: httpx.Response, started: float, save: Any) -> None:
+        self._response = response
+        self._started = started
+        self._first_byte = time.perf_counter() - started
+        self._save = save
+        self._chunks: list[list[Any]] = []
+        self._complete = False
+
+    def add(self, chunk: bytes) -> None:
+        offset = time.perf_counter() - self._started - self._first_byte
+        self._chunks.append([round(offset, 4), _decode_body(chunk)])
+
+    def finish(self) -> None:
+        if self._complete:
+            return
+        self._complete = True
+        self._save(
+            {
+                "status": self._response.status_code,
+                "content_type": self._response.headers.get("content-type", "application/json"),
+                "content_encoding": self._response.headers.get("content-encoding"),
+                "first_byte_seconds": round(self._first_byte, 4),
+                "chunks": self._chunks,
+            }
+        )
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    def __init__(self, response: httpx.Response, started: float, save: Any) -> None:
+        self._stream = response.stream
+        self._recorder = _Recorder(response, started, save)
+        self._exhausted = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._stream:
+            self._recorder.add(chunk)
+            yield chunk
+        self._exhausted = True
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            # Partially read bodies would replay truncated; skip them.
+            if self._exhausted:
+                self._recorder.finish()
+
+
+class _AsyncRecordingStream(httpx.AsyncByteStream):
+    def __init__(self, response: httpx.Response, started: float, save: Any) -> None:
+        self._stream = response.stream
+        self._recorder = _Recorder(response, started, save)
+        self._exhausted = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._recorder.add(chunk)
+            yield chunk
+        self._exhausted = True
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._exhausted:
+                self._recorder.finish()
+
+
+class _ReplayStream(httpx.SyncByteStream):
+    def __init__(self, recording: dict[str, Any], latency: str) -> None:
+        self._chunks = recording["chunks"]
+        self._timed = latency == "original"
+
+    def __iter__(self) -> Iterator[bytes]:
+        started = time.perf_counter()
+        for offset, data in self._chunks:
+            if self._timed:
+                delay = offset - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield _encode_body(data)
+
+
+class _AsyncReplayStream(httpx.AsyncByteStream):
+    def __init__(self, recording: dict[str, Any], latency: str) -> None:
+        self._chunks = recording["chunks"]
+        self._timed = latency == "original"
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        started = time.perf_counter()
+        for offset, data in self._chunks:
+            if self._timed:
+                delay = offset - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield _encode_body(data)
+
+
+def _replayed_response(request: httpx.Request, recording: dict[str, Any], stream: Any) -> httpx.Response:
+    headers = {"content-type": recording["content_type"], "x-llm-cassette": "replay"}
+    # Chunks are the raw (possibly gzip/br) bytes, so the client must decode them again.
+    if recording.get("content_encoding"):
+        headers["content-encoding"] = recording["content_encoding"]
+    return httpx.Response(
+        status_code=recording["status"],
+        headers=headers,
+        stream=stream,
+        request=request,
+    )
+
+
+def _decode_body(data: bytes) -> Any:
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(data).decode("ascii")}
+
+
+def _encode_body(data: Any) -> bytes:
+    if isinstance(data, dict):
+        return base64.b64decode(data["base64"])
+    return data.encode("utf-8")
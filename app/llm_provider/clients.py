@@ -0,0 +1,223 @@
+"""
+Shared HTTP clients for LLM traffic.
+
+Both LLMFactory and flow_mcp.py send requests through the same stack, so
+pooling, keep-alive and timeout settings apply to every LLM call:
+
+    response cache -> cassette -> hedging -> concurrency limiter
+        -> replica balancer -> connection pool
+
+The connection pool honours ``HTTPClientConfig`` limits, HTTP/2 and proxy
+settings; each layer above it is optional. The limiter sits below hedging,
+so a hedge takes its own slot and each attempt's latency feeds the RTT
+estimate.
+
+Extension points:
+- Add retry-with-backoff as another transport layer.
+- Add mTLS client certificates for internal gateways.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import httpx
+
+from app.core.config import Settings
+from app.llm_provider.balancer import (
+    AsyncLoadBalancingTransport,
+    LoadBalancingTransport,
+    ReplicaSet,
+    build_replica_sets,
+)
+from app.llm_provider.cache import AsyncCachingTransport, CachingTransport, LLMResponseCache
+from app.llm_provider.cassette import (
+    AsyncCassetteTransport,
+    Cassette,
+    CassetteTransport,
+    build_cassette,
+)
+from app.llm_provider.hedging import (
+    AsyncHedgingTransport,
+    HedgePolicy,
+    HedgingTransport,
+    build_hedge_policy,
+)
+from app.llm_provider.limiter import (
+    AsyncLimitingTransport,
+    ConcurrencyLimiter,
+    LimitingTransport,
+    build_concurrency_limiter,
+)
+from app.llm_provider.models import HTTPClientConfig
+
+
+class LLMHttpClients:
+    """
+    Pooled sync and async httpx clients sharing one transport configuration.
+
+    Extension points:
+    - Partition pools per provider to isolate noisy backends.
+    """
+
+    def __init__(
+        self,
+        config: HTTPClientConfig,
+        response_cache: LLMResponseCache | None = None,
+        hedge_policy: HedgePolicy | None = None,
+        replica_sets: list[ReplicaSet] | None = None,
+        max_attempts: int = 2,
+        limiter: ConcurrencyLimiter | None = None,
+        cassette: Cassette | None = None,
+    ) -> None:
+        """
+        Build both clients and their transport stacks.
+
+        Extension points:
+        - Add event hooks for request/response logging.
+        """
+
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry_seconds,
+        )
+        self._config = config
+        self._response_cache = response_cache
+        self._limiter = limiter
+        self.timeout = httpx.Timeout(
+            config.read_timeout_seconds,
+            connect=config.connect_timeout_seconds,
+        )
+        self._pool = httpx.HTTPTransport(
+            verify=config.ssl_verify,
+            http2=config.http2,
+            limits=limits,
+            proxy=config.proxy,
+        )
+        self._async_pool = httpx.AsyncHTTPTransport(
+            verify=config.ssl_verify,
+            http2=config.http2,
+            limits=limits,
+            proxy=config.proxy,
+        )
+
+        transport: httpx.BaseTransport = self._pool
+        async_transport: httpx.AsyncBaseTransport = self._async_pool
+        if replica_sets:
+            transport = LoadBalancingTransport(transport, replica_sets, max_attempts)
+            async_transport = AsyncLoadBalancingTransport(async_transport, replica_sets, max_attempts)
+        if limiter is not None:
+            transport = LimitingTransport(transport, limiter)
+            async_transport = AsyncLimitingTransport(async_transport, limiter)
+        if hedge_policy is not None:
+            transport = HedgingTransport(transport, hedge_policy, config.max_connections)
+            async_transport = AsyncHedgingTransport(async_transport, hedge_policy)
+        if cassette is not None:
+            transport = CassetteTransport(transport, cassette)
+            async_transport = AsyncCassetteTransport(async_transport, cassette)
+        if response_cache is not None:
+            transport = CachingTransport(transport, response_cache)
+            async_transport = AsyncCachingTransport(async_transport, response_cache)
+
+        self.client = httpx.Client(transport=transport, timeout=self.timeout)
+        self.async_client = httpx.AsyncClient(transport=async_transport, timeout=self.timeout)
+
+    @property
+    def response_cache(self) -> LLMResponseCache | None:
+        """
+        Return the response cache in the transport stack, if any.
+
+        Extension points:
+        - Expose per-layer statistics alongside the cache.
+        """
+
+        return self._response_cache
+
+    def pool_stats(self) -> dict[str, dict[str, int]]:
+        """
+        Return active and idle connection counts for both pools.
+
+        Extension points:
+        - Add per-origin breakdowns for multi-replica setups.
+        """
+
+        return {
+            "sync": _connection_counts(self._pool, self._config.max_connections),
+            "async": _connection_counts(self._async_pool, self._config.max_connections),
+        }
+
+    def limiter_stats(self) -> dict[str, dict[str, float]]:
+        """
+        Return adaptive concurrency statistics per origin.
+
+        Extension points:
+        - Merge in provider-reported rate-limit headers.
+        """
+
+        if self._limiter is None:
+            return {}
+        return self._limiter.stats()
+
+    async def aclose(self) -> None:
+        """
+        Close both clients and their connection pools.
+
+        Extension points:
+        - Drain in-flight requests before closing.
+        """
+
+        self.client.close()
+        await self.async_client.aclose()
+
+
+def build_http_client_config(settings: Settings) -> HTTPClientConfig:
+    """
+    Map ``LLM_ORCH_LLM_HTTP_*`` settings onto an HTTP client config.
+
+    Extension points:
+    - Read per-provider overrides.
+    """
+
+    return HTTPClientConfig(
+        ssl_verify=settings.ssl_verify,
+        max_connections=settings.llm_http_max_connections,
+        max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+        keepalive_expiry_seconds=settings.llm_http_keepalive_expiry_seconds,
+        http2=settings.llm_http2,
+        connect_timeout_seconds=settings.llm_http_connect_timeout_seconds,
+        read_timeout_seconds=settings.llm_http_read_timeout_seconds,
+        proxy=settings.llm_http_proxy,
+    )
+
+
+def build_http_clients(
+    settings: Settings,
+    response_cache: LLMResponseCache | None = None,
+) -> LLMHttpClients:
+    """
+    Build the configured HTTP client stack for LLM traffic.
+
+    Extension points:
+    - Toggle individual transport layers per deployment.
+    """
+
+    return LLMHttpClients(
+        config=build_http_client_config(settings),
+        response_cache=response_cache,
+        hedge_policy=build_hedge_policy(settings),
+        replica_sets=build_replica_sets(settings),
+        max_attempts=settings.llm_lb_max_attempts,
+        limiter=build_concurrency_limiter(settings),
+        cassette=build_cassette(settings),
+    )
+
+
+def _connection_counts(transport: Any, max_connections: int) -> dict[str, int]:
+    connections = getattr(getattr(transport, "_pool", None), "connections", [])
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {
+        "active": len(connections) - idle,
+        "idle": idle,
+        "max": max_connections,
+    }
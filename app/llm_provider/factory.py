@@ -2,48 +2,135 @@
 Factory for constructing chat model instances from configuration.
 
 Extension points:
-- Add retry, timeout, or logging configuration.
+- Add retry or logging configuration.
 - Add provider-specific defaults and validation.
 """
 
-import httpx
+from collections.abc import Sequence
+from typing import Any
+
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 
-from app.llm_provider.models import LLMProviderConfig
+from app.core.metrics import LLMMetricsHandler
+from app.core.usage import UsageCallbackHandler, UsageLedger
+from app.llm_provider.cache import LLMResponseCache
+from app.llm_provider.clients import LLMHttpClients
+from app.llm_provider.models import HTTPClientConfig, LLMProviderConfig
+from app.llm_provider.pool import ChatModelPool
 
 
 class LLMFactory:
     """
     Build ChatOpenAI clients for both OpenAI and local endpoints.
 
+    Chat models are pooled per provider configuration and share one pair of
+    HTTP clients, so identical configurations reuse a single client object
+    and every model reuses the same connection pool.
+
     Extension points:
-    - Add caching to reuse clients across flows.
     - Add structured tracing hooks for request/response metadata.
     """
 
-    def __init__(self, ssl_verify: bool = True) -> None:
+    def __init__(
+        self,
+        ssl_verify: bool = True,
+        response_cache: LLMResponseCache | None = None,
+        model_pool_size: int = 32,
+        http_clients: LLMHttpClients | None = None,
+        usage_ledger: UsageLedger | None = None,
+    ) -> None:
         """
         Initialize the factory with HTTP client configuration.
 
+        ``http_clients`` carries the shared transport stack (connection
+        pool, replica balancing, hedging, response cache) and its timeouts.
+        Without it, default pooled clients are built from ``ssl_verify``
+        and ``response_cache``. With ``usage_ledger``, every built model
+        checks the caller's tenant budget before a call and records its
+        token usage.
+
+        Extension points:
+        - Add per-provider HTTP client stacks.
+        """
+
+        if http_clients is None:
+            http_clients = LLMHttpClients(
+                HTTPClientConfig(ssl_verify=ssl_verify),
+                response_cache=response_cache,
+            )
+        self._http_clients = http_clients
+        self._model_pool = ChatModelPool(max_size=model_pool_size)
+        self._usage_ledger = usage_ledger
+
+    @property
+    def response_cache(self) -> LLMResponseCache | None:
+        """
+        Return the shared response cache, if caching is enabled.
+
+        Extension points:
+        - Expose cache statistics through metrics endpoints.
+        """
+
+        return self._http_clients.response_cache
+
+    @property
+    def http_clients(self) -> LLMHttpClients:
+        """
+        Return the shared HTTP clients used by every built chat model.
+
         Extension points:
-        - Add proxy or custom transport configuration.
+        - Hand the same clients to embedding or RAG providers.
         """
 
-        self._http_client = httpx.Client(verify=ssl_verify)
+        return self._http_clients
 
     def build_chat_model(self, config: LLMProviderConfig):
         """
-        Create a chat model instance from the provided configuration.
+        Return the pooled chat model for the provided configuration.
 
         Extension points:
         - Add model-specific parameter mapping.
         - Add safe defaults for system prompts or tool settings.
         """
 
+        return self._model_pool.get_or_create(config, lambda: self._create_chat_model(config))
+
+    def build_tool_model(self, config: LLMProviderConfig, tools: Sequence[Any]):
+        """
+        Return the pooled chat model for ``config`` with ``tools`` bound.
+
+        Extension points:
+        - Accept tool_choice or strict-schema options.
+        """
+
+        return self._model_pool.get_or_bind(
+            config,
+            tools,
+            lambda: self._create_chat_model(config),
+            lambda model: model.bind_tools(list(tools)),
+        )
+
+    def model_pool_stats(self) -> dict[str, Any]:
+        """
+        Return chat model pool size and lookup counters.
+
+        Extension points:
+        - Expose per-provider pool occupancy.
+        """
+
+        return self._model_pool.stats()
+
+    def _create_chat_model(self, config: LLMProviderConfig):
         if config.provider == "azure":
             return self._build_azure_chat_model(config)
         return self._build_openai_compatible_model(config)
 
+    def _callbacks(self, provider: str, model: str) -> list[Any]:
+        callbacks: list[Any] = [LLMMetricsHandler(provider, model)]
+        if self._usage_ledger is not None:
+            callbacks.append(UsageCallbackHandler(self._usage_ledger, model))
+        return callbacks
+
     def _build_openai_compatible_model(self, config: LLMProviderConfig) -> ChatOpenAI:
         """
         Build a ChatOpenAI client for OpenAI-compatible endpoints.
@@ -56,7 +143,10 @@ class LLMFactory:
             "model": config.model,
             "api_key": config.api_key,
             "base_url": config.base_url,
-            "http_client": self._http_client,
+            "http_client": self._http_clients.client,
+            "http_async_client": self._http_clients.async_client,
+            "timeout": self._http_clients.timeout,
+            "callbacks": self._callbacks(config.provider, config.model),
         }
         if config.temperature is not None:
             params["temperature"] = config.temperature
@@ -77,10 +167,59 @@ class LLMFactory:
             "azure_endpoint": config.azure_endpoint,
             "api_version": config.azure_api_version,
             "deployment_name": config.azure_deployment_name,
-            "http_client": self._http_client,
+            "http_client": self._http_clients.client,
+            "http_async_client": self._http_clients.async_client,
+            "timeout": self._http_clients.timeout,
+            "callbacks": self._callbacks(
+                config.provider,
+                config.azure_deployment_name or config.model,
+            ),
         }
         if config.temperature is not None:
             params["temperature"] = config.temperature
         if config.max_tokens is not None:
             params["max_tokens"] = config.max_tokens
         return AzureChatOpenAI(**params)
+
+    async def aopen_connection(self, config: LLMProviderConfig) -> None:
+        """
+        Open a pooled keep-alive connection to the provider endpoint.
+
+        Sends a lightweight GET (``/models`` for OpenAI-compatible endpoints,
+        the resource root for Azure) so DNS, TCP and TLS setup happen before
+        the first chat completion. The response status is ignored.
+
+        Extension points:
+        - Open several connections to match expected startup concurrency.
+        """
+
+        if config.provider == "azure":
+            url = config.azure_endpoint
+            headers = {"api-key": config.api_key}
+        else:
+            url = f"{config.base_url.rstrip('/')}/models"
+            headers = {"Authorization": f"Bearer {config.api_key}"}
+        if url:
+            await self._http_clients.async_client.get(url, headers=headers)
+
+    async def awarm_completion(self, config: LLMProviderConfig) -> None:
+        """
+        Send a one-token chat completion through a freshly built model.
+
+        Extension points:
+        - Warm every configured deployment, not only the default one.
+        """
+
+        model = self._create_chat_model(config.model_copy(update={"max_tokens": 1}))
+        await model.ainvoke("ping")
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled HTTP clients shared by built chat models.
+
+        Extension points:
+        - Flush tracing or metrics buffers before shutdown.
+        """
+
+        self._model_pool.clear()
+        await self._http_clients.aclose()
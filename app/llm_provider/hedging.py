@@ -0,0 +1,343 @@
+"""
+Hedged chat completion requests for tail-latency control.
+
+When a non-streaming chat completion has not answered within a rolling
+latency percentile for its host and model, a duplicate request is sent
+(optionally to an alternate origin) and whichever answers first wins; the
+other is cancelled. A token bucket caps hedges to a fraction of traffic so
+a slow backend is not hit with twice the load.
+
+Extension points:
+- Hedge streaming requests on time-to-first-token.
+- Pick the hedge target from the least-loaded replica.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import httpx
+
+from app.core.config import Settings
+from app.core.metrics import LLM_HEDGES, LLM_HEDGES_SKIPPED
+
+
+class HedgePolicy:
+    """
+    Decide when and where to hedge, from observed request latencies.
+
+    Extension points:
+    - Use per-tenant budgets instead of one shared bucket.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        initial_delay_seconds: float = 5.0,
+        min_delay_seconds: float = 0.5,
+        min_samples: int = 20,
+        window: int = 512,
+        budget_ratio: float = 0.1,
+        hedge_origin: str | None = None,
+    ) -> None:
+        """
+        Initialize the policy with delay bounds and a hedge budget.
+
+        ``budget_ratio`` tokens accrue per request (up to a burst of ten)
+        and each hedge spends one, so at most that fraction of requests is
+        duplicated over time.
+
+        Extension points:
+        - Load per-model overrides from configuration.
+        """
+
+        self._percentile = percentile
+        self._initial_delay = initial_delay_seconds
+        self._min_delay = min_delay_seconds
+        self._min_samples = min_samples
+        self._window = window
+        self._budget_ratio = budget_ratio
+        self._hedge_origin = httpx.URL(hedge_origin) if hedge_origin else None
+        self._samples: dict[tuple[str, str], deque[float]] = {}
+        self._tokens = 1.0
+        self._lock = threading.Lock()
+
+    def applies(self, request: httpx.Request) -> tuple[str, str] | None:
+        """
+        Return the latency key for a hedgeable request, or None.
+
+        Only non-streaming chat completions are hedged.
+
+        Extension points:
+        - Hedge embeddings and other idempotent endpoints.
+        """
+
+        if request.method != "POST" or not request.url.path.endswith("/chat/completions"):
+            return None
+        try:
+            body = json.loads(request.content)
+        except (ValueError, httpx.RequestNotRead):
+            return None
+        if not isinstance(body, dict) or body.get("stream"):
+            return None
+        return request.url.host, str(body.get("model", ""))
+
+    def delay(self, key: tuple[str, str]) -> float:
+        """
+        Return how long to wait for the primary before hedging.
+
+        Extension points:
+        - Decay old samples faster after a deployment change.
+        """
+
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < self._min_samples:
+            return self._initial_delay
+        index = min(len(samples) - 1, int(len(samples) * self._percentile / 100))
+        return max(self._min_delay, samples[index])
+
+    def observe(self, key: tuple[str, str], seconds: float) -> None:
+        """
+        Record a completed request's latency and earn hedge budget.
+
+        Extension points:
+        - Exclude error responses from the latency window.
+        """
+
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self._window)
+            samples.append(seconds)
+            self._tokens = min(10.0, self._tokens + self._budget_ratio)
+
+    def try_acquire(self) -> bool:
+        """
+        Spend one hedge token, returning False when the budget is exhausted.
+
+        Extension points:
+        - Always allow hedges for high-priority requests.
+        """
+
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def hedge_request(self, request: httpx.Request) -> httpx.Request:
+        """
+        Build the duplicate request, retargeted to the hedge origin if set.
+
+        Extension points:
+        - Rotate hedges across several alternate origins.
+        """
+
+        url = request.url
+        if self._hedge_origin is not None:
+            url = url.copy_with(
+                scheme=self._hedge_origin.scheme,
+                host=self._hedge_origin.host,
+                port=self._hedge_origin.port,
+            )
+        headers = request.headers.copy()
+        headers.pop("host", None)
+        return httpx.Request(
+            request.method,
+            url,
+            headers=headers,
+            content=request.content,
+            extensions=request.extensions,
+        )
+
+
+class HedgingTransport(httpx.BaseTransport):
+    """
+    httpx transport that hedges slow chat completions on a worker thread.
+
+    The pool gets one worker per pooled connection (``max_workers``), since
+    every attempt holds a connection anyway; a smaller pool would queue
+    requests that the connection pool could send. The hedge delay counts
+    from when the primary attempt starts running, not from when it was
+    queued. Threads cannot be cancelled, so a losing request runs to
+    completion in the background and its response is discarded.
+
+    Extension points:
+    - Bound the number of in-flight losing requests.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        policy: HedgePolicy,
+        max_workers: int | None = None,
+    ) -> None:
+        self._transport = transport
+        self._policy = policy
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="llm-hedge",
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = self._policy.applies(request)
+        if key is None:
+            return self._transport.handle_request(request)
+
+        started = threading.Event()
+        primary = self._executor.submit(self._send, request, started)
+        # Set on completion too, so a future cancelled while queued cannot block us.
+        primary.add_done_callback(lambda _: started.set())
+        started.wait()
+        done, _ = wait([primary], timeout=self._policy.delay(key))
+        if done or not self._policy.try_acquire():
+            if not done:
+                LLM_HEDGES_SKIPPED.labels().inc()
+            response, elapsed = primary.result()
+            self._policy.observe(key, elapsed)
+            return response
+
+        hedge = self._executor.submit(self._send, self._policy.hedge_request(request))
+        pending: set[Future] = {primary, hedge}
+        fallback: tuple[str, httpx.Response, float] | None = None
+        failure: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                winner = "hedge" if future is hedge else "primary"
+                try:
+                    response, elapsed = future.result()
+                except Exception as exc:
+                    failure = exc
+                    continue
+                if response.status_code >= 500:
+                    fallback = (winner, response, elapsed)
+                    continue
+                return _settle(self._policy, key, winner, response, elapsed)
+        if fallback is not None:
+            return _settle(self._policy, key, *fallback)
+        assert failure is not None
+        raise failure
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._transport.close()
+
+    def _send(
+        self,
+        request: httpx.Request,
+        running: threading.Event | None = None,
+    ) -> tuple[httpx.Response, float]:
+        if running is not None:
+            running.set()
+        started = time.perf_counter()
+        response = self._transport.handle_request(request)
+        response.read()
+        return response, time.perf_counter() - started
+
+
+class AsyncHedgingTransport(httpx.AsyncBaseTransport):
+    """
+    Async variant of ``HedgingTransport``; the losing request is cancelled.
+
+    Extension points:
+    - Propagate cancellation to the backend via a provider abort API.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: HedgePolicy) -> None:
+        self._transport = transport
+        self._policy = policy
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = self._policy.applies(request)
+        if key is None:
+            return await self._transport.handle_async_request(request)
+
+        primary = asyncio.create_task(self._send(request))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self._policy.delay(key))
+            if done or not self._policy.try_acquire():
+                if not done:
+                    LLM_HEDGES_SKIPPED.labels().inc()
+                response, elapsed = await primary
+                self._policy.observe(key, elapsed)
+                return response
+        except BaseException:
+            primary.cancel()
+            raise
+
+        hedge = asyncio.create_task(self._send(self._policy.hedge_request(request)))
+        pending: set[asyncio.Task] = {primary, hedge}
+        fallback: tuple[str, httpx.Response, float] | None = None
+        failure: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    winner = "hedge" if task is hedge else "primary"
+                    try:
+                        response, elapsed = task.result()
+                    except Exception as exc:
+                        failure = exc
+                        continue
+                    if response.status_code >= 500:
+                        fallback = (winner, response, elapsed)
+                        continue
+                    return _settle(self._policy, key, winner, response, elapsed)
+        finally:
+            for task in pending:
+                task.cancel()
+        if fallback is not None:
+            return _settle(self._policy, key, *fallback)
+        assert failure is not None
+        raise failure
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    async def _send(self, request: httpx.Request) -> tuple[httpx.Response, float]:
+        started = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        try:
+            await response.aread()
+        except BaseException:
+            await response.aclose()
+            raise
+        return response, time.perf_counter() - started
+
+
+def build_hedge_policy(settings: Settings) -> HedgePolicy | None:
+    """
+    Build the configured hedge policy, or None when hedging is disabled.
+
+    Extension points:
+    - Build separate policies per provider.
+    """
+
+    if not settings.llm_hedge_enabled:
+        return None
+    return HedgePolicy(
+        percentile=settings.llm_hedge_percentile,
+        initial_delay_seconds=settings.llm_hedge_initial_delay_seconds,
+        min_delay_seconds=settings.llm_hedge_min_delay_seconds,
+        min_samples=settings.llm_hedge_min_samples,
+        budget_ratio=settings.llm_hedge_budget_ratio,
+        hedge_origin=settings.llm_hedge_origin,
+    )
+
+
+def _settle(
+    policy: HedgePolicy,
+    key: tuple[str, str],
+    winner: str,
+    response: httpx.Response,
+    elapsed: float,
+) -> httpx.Response:
+    policy.observe(key, elapsed)
+    LLM_HEDGES.labels(winner).inc()
+    return response
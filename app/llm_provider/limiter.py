@@ -0,0 +1,380 @@
+"""
+Adaptive concurrency limits for outbound LLM calls.
+
+Each provider origin (scheme, host and port of the configured base URL) gets
+an AIMD limit on in-flight calls. Every completed call is a sample: the limit
+grows by roughly one per window of ``limit`` successful calls while calls
+are actually using the allowance, and is cut multiplicatively when a call
+fails (transport error, 429 or 5xx) or when recent latency drifts well above
+the long-run baseline. Cuts happen at most once per baseline RTT, so one
+burst of failures counts as a single congestion signal. Calls over the limit
+wait for a slot instead of piling onto a degraded backend.
+
+Extension points:
+- Add a gradient limiter (Vegas/Gradient2) as an alternative algorithm.
+- Normalize latency by completion tokens for long generations.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+import httpx
+
+from app.core.config import Settings
+from app.core.metrics import LLM_LIMITER_WAIT_SECONDS
+from app.llm_provider.balancer import AsyncReleasingStream, ReleasingStream
+
+
+class AIMDLimit:
+    """
+    Additive-increase/multiplicative-decrease limit for one origin.
+
+    Extension points:
+    - Persist the learned limit across restarts.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 128,
+        backoff_ratio: float = 0.9,
+        latency_tolerance: float = 2.0,
+        max_wait_seconds: float = 30.0,
+    ) -> None:
+        """
+        Initialize the limit and its latency trackers.
+
+        Extension points:
+        - Accept separate backoff ratios for errors and latency.
+        """
+
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._backoff_ratio = backoff_ratio
+        self._latency_tolerance = latency_tolerance
+        self._max_wait_seconds = max_wait_seconds
+        self._in_flight = 0
+        self._recent_rtt: float | None = None
+        self._baseline_rtt: float | None = None
+        self._last_decrease = 0.0
+        self._waiters: deque[tuple[asyncio.AbstractEventLoop | None, Any]] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """
+        Return the current whole-number limit.
+
+        Extension points:
+        - Expose the fractional limit for debugging.
+        """
+
+        return max(self._min_limit, int(self._limit))
+
+    def acquire(self) -> float:
+        """
+        Block until a slot is free and return the start time for ``release``.
+
+        Raises ``httpx.PoolTimeout`` after ``max_wait_seconds``.
+
+        Extension points:
+        - Let high-priority calls jump the wait queue.
+        """
+
+        event: threading.Event | None = None
+        with self._lock:
+            if not self._try_take():
+                event = threading.Event()
+                self._waiters.append((None, event))
+        if event is not None:
+            started = time.perf_counter()
+            granted = event.wait(self._max_wait_seconds)
+            if not granted and not self._abandon(event):
+                raise httpx.PoolTimeout("Timed out waiting for an LLM concurrency slot")
+            LLM_LIMITER_WAIT_SECONDS.labels().observe(time.perf_counter() - started)
+        return time.perf_counter()
+
+    async def aacquire(self) -> float:
+        """
+        Async variant of ``acquire``.
+
+        Extension points:
+        - Propagate the caller's deadline into the wait.
+        """
+
+        future: asyncio.Future | None = None
+        with self._lock:
+            if not self._try_take():
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+        if future is not None:
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(future, self._max_wait_seconds)
+            except asyncio.TimeoutError:
+                if not self._abandon(future):
+                    raise httpx.PoolTimeout(
+                        "Timed out waiting for an LLM concurrency slot"
+                    ) from None
+            except BaseException:
+                if self._abandon(future):
+                    self.release(None, failed=False)
+                raise
+            LLM_LIMITER_WAIT_SECONDS.labels().observe(time.perf_counter() - started)
+        return time.perf_counter()
+
+    def release(self, started: float | None, failed: bool) -> None:
+        """
+        Free a slot and feed the call's outcome into the limit.
+
+        ``started`` is None for calls that never ran; they free the slot
+        without producing a sample.
+
+        Extension points:
+        - Ignore client-side cancellations as congestion signals.
+        """
+
+        now = time.perf_counter()
+        with self._lock:
+            self._in_flight -= 1
+            if started is not None:
+                self._sample(now - started, failed, now)
+            self._wake()
+
+    def stats(self) -> dict[str, float]:
+        """
+        Return limit, in-flight count, waiters and RTT estimates.
+
+        Extension points:
+        - Add counts of increases and decreases.
+        """
+
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "recent_rtt_seconds": self._recent_rtt or 0.0,
+                "baseline_rtt_seconds": self._baseline_rtt or 0.0,
+            }
+
+    def _sample(self, rtt: float, failed: bool, now: float) -> None:
+        if not failed:
+            self._recent_rtt = _ewma(self._recent_rtt, rtt, 0.3)
+            self._baseline_rtt = _ewma(self._baseline_rtt, rtt, 0.02)
+        slow = (
+            self._baseline_rtt is not None
+            and self._recent_rtt is not None
+            and self._recent_rtt > self._latency_tolerance * self._baseline_rtt
+        )
+        if failed or slow:
+            if now - self._last_decrease >= (self._baseline_rtt or 0.0):
+                self._limit = max(float(self._min_limit), self._limit * self._backoff_ratio)
+                self._last_decrease = now
+            return
+        # Only grow while the allowance is actually used.
+        if self._in_flight + 1 >= self.limit / 2:
+            self._limit = min(float(self._max_limit), self._limit + 1.0 / self._limit)
+
+    def _try_take(self) -> bool:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return True
+        return False
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            loop, waiter = self._waiters.popleft()
+            self._in_flight += 1
+            if loop is None:
+                waiter.set()
+            else:
+                loop.call_soon_threadsafe(_resolve, waiter)
+
+    def _abandon(self, waiter: Any) -> bool:
+        # True when the slot was granted before the waiter gave up.
+        with self._lock:
+            for index, (_, queued) in enumerate(self._waiters):
+                if queued is waiter:
+                    del self._waiters[index]
+                    return False
+        return True
+
+
+class ConcurrencyLimiter:
+    """
+    Per-origin AIMD limits for LLM endpoints.
+
+    Extension points:
+    - Key limits by model as well as origin for shared gateways.
+    """
+
+    def __init__(self, limit_factory: Callable[[], AIMDLimit]) -> None:
+        """
+        Initialize with a factory for new per-origin limits.
+
+        Extension points:
+        - Seed known origins from configuration.
+        """
+
+        self._limit_factory = limit_factory
+        self._limits: dict[str, AIMDLimit] = {}
+        self._lock = threading.Lock()
+
+    def for_request(self, request: httpx.Request) -> AIMDLimit:
+        """
+        Return the limit for the request's origin, creating it on first use.
+
+        Extension points:
+        - Exempt lightweight endpoints such as ``/models``.
+        """
+
+        origin = f"{request.url.scheme}://{request.url.netloc.decode('ascii')}"
+        limit = self._limits.get(origin)
+        if limit is None:
+            with self._lock:
+                limit = self._limits.setdefault(origin, self._limit_factory())
+        return limit
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        Return per-origin limiter statistics.
+
+        Extension points:
+        - Drop origins idle for a long time.
+        """
+
+        with self._lock:
+            limits = dict(self._limits)
+        return {origin: limit.stats() for origin, limit in limits.items()}
+
+
+class LimitingTransport(httpx.BaseTransport):
+    """
+    httpx transport that holds a concurrency slot for each call.
+
+    The slot is released when the response stream closes, so streamed
+    completions count until their last chunk.
+
+    Extension points:
+    - Treat slow time-to-first-token as a latency signal for streams.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, limiter: ConcurrencyLimiter) -> None:
+        self._transport = transport
+        self._limiter = limiter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        limit = self._limiter.for_request(request)
+        started = limit.acquire()
+        try:
+            response = self._transport.handle_request(request)
+        except httpx.TransportError:
+            limit.release(started, failed=True)
+            raise
+        except BaseException:
+            limit.release(None, failed=False)
+            raise
+        release = _once(limit, started, _is_congestion(response))
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=ReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncLimitingTransport(httpx.AsyncBaseTransport):
+    """
+    Async variant of ``LimitingTransport``.
+
+    Extension points:
+    - Shed calls whose caller already gave up while waiting.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: ConcurrencyLimiter) -> None:
+        self._transport = transport
+        self._limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limit = self._limiter.for_request(request)
+        started = await limit.aacquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError:
+            limit.release(started, failed=True)
+            raise
+        except BaseException:
+            limit.release(None, failed=False)
+            raise
+        release = _once(limit, started, _is_congestion(response))
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=AsyncReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def build_concurrency_limiter(settings: Settings) -> ConcurrencyLimiter | None:
+    """
+    Build the configured adaptive limiter, or None when disabled.
+
+    Extension points:
+    - Configure limits per provider.
+    """
+
+    if not settings.llm_limiter_enabled:
+        return None
+    return ConcurrencyLimiter(
+        lambda: AIMDLimit(
+            initial_limit=settings.llm_limiter_initial_limit,
+            min_limit=settings.llm_limiter_min_limit,
+            max_limit=settings.llm_limiter_max_limit,
+            backoff_ratio=settings.llm_limiter_backoff_ratio,
+            latency_tolerance=settings.llm_limiter_latency_tolerance,
+            max_wait_seconds=settings.llm_limiter_max_wait_seconds,
+        )
+    )
+
+
+def _is_congestion(response: httpx.Response) -> bool:
+    return response.status_code == 429 or response.status_code >= 500
+
+
+def _once(limit: AIMDLimit, started: float, failed: bool) -> Callable[[], None]:
+    released = False
+
+    def run() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            limit.release(started, failed)
+
+    return run
+
+
+def _ewma(current: float | None, sample: float, alpha: float) -> float:
+    if current is None:
+        return sample
+    return current + alpha * (sample - current)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
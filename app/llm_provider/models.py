@@ -49,3 +49,42 @@ class LLMProviderConfig(BaseModel):
         default=None,
         description="Maximum tokens to generate per response.",
     )
+
+
+class HTTPClientConfig(BaseModel):
+    """
+    Connection pool, protocol and timeout settings for LLM HTTP clients.
+
+    Extension points:
+    - Add per-provider overrides for mixed local and hosted traffic.
+    """
+
+    ssl_verify: bool = Field(default=True, description="Verify TLS certificates.")
+    max_connections: int = Field(
+        default=100,
+        description="Maximum concurrent connections per client.",
+    )
+    max_keepalive_connections: int = Field(
+        default=20,
+        description="Idle connections kept open for reuse.",
+    )
+    keepalive_expiry_seconds: float = Field(
+        default=30.0,
+        description="Seconds an idle connection is kept before closing.",
+    )
+    http2: bool = Field(
+        default=False,
+        description="Negotiate HTTP/2 (requires the h2 package).",
+    )
+    connect_timeout_seconds: float = Field(
+        default=10.0,
+        description="Timeout for establishing a connection.",
+    )
+    read_timeout_seconds: float = Field(
+        default=90.0,
+        description="Timeout for reading, writing, and waiting on the pool.",
+    )
+    proxy: str | None = Field(
+        default=None,
+        description="Proxy URL for all LLM traffic.",
+    )
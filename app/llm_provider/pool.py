@@ -0,0 +1,165 @@
+"""
+Keyed LRU pool of chat model instances and their tool-bound variants.
+
+Models are keyed by a hash of the full provider configuration, and
+tool-bound variants by the ordered tool names and descriptions, so
+identical configurations reuse one client object (and its validated
+parameters and converted tool schemas) across flows.
+
+Extension points:
+- Add time-based expiry for rarely used tenant configurations.
+- Add per-tenant pool partitions.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.llm_provider.models import LLMProviderConfig
+
+
+@dataclass
+class _PoolEntry:
+    model: Any
+    bound: dict[tuple[tuple[str, str], ...], Any] = field(default_factory=dict)
+
+
+class ChatModelPool:
+    """
+    Thread-safe LRU cache of chat models keyed by provider configuration.
+
+    Evicting a model also drops its tool-bound variants. Pooled models
+    share the owner's HTTP clients, so eviction only releases the model
+    objects; connections stay pooled per origin until the owner closes.
+
+    Extension points:
+    - Track per-key usage for capacity planning.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Initialize an empty pool with the given capacity.
+
+        Extension points:
+        - Pre-populate with models for known deployments.
+        """
+
+        self._max_size = max_size
+        self._entries: OrderedDict[str, _PoolEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_or_create(self, config: LLMProviderConfig, builder: Callable[[], Any]) -> Any:
+        """
+        Return the pooled model for ``config``, building it on a miss.
+
+        Extension points:
+        - Validate configuration before building new clients.
+        """
+
+        return self._entry(config, builder).model
+
+    def get_or_bind(
+        self,
+        config: LLMProviderConfig,
+        tools: Sequence[Any],
+        builder: Callable[[], Any],
+        binder: Callable[[Any], Any],
+    ) -> Any:
+        """
+        Return the pooled tool-bound variant of the model for ``config``.
+
+        ``binder`` receives the pooled base model and runs only when this
+        tool set has not been bound for the configuration yet.
+
+        Extension points:
+        - Include tool_choice or parallel-call options in the key.
+        """
+
+        tools_key = tuple(
+            (str(getattr(tool, "name", tool)), str(getattr(tool, "description", "")))
+            for tool in tools
+        )
+        entry = self._entry(config, builder, count=False)
+        with self._lock:
+            bound = entry.bound.get(tools_key)
+            if bound is not None:
+                self._hits += 1
+                return bound
+            self._misses += 1
+        bound = binder(entry.model)
+        with self._lock:
+            return entry.bound.setdefault(tools_key, bound)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return pool size, bound-variant count and lookup counters.
+
+        Extension points:
+        - Break down counters by provider.
+        """
+
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "bound": sum(len(entry.bound) for entry in self._entries.values()),
+                "max_size": self._max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """
+        Drop every pooled model and its tool-bound variants.
+
+        Extension points:
+        - Drop only entries for a given provider.
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+    def _entry(
+        self,
+        config: LLMProviderConfig,
+        builder: Callable[[], Any],
+        count: bool = True,
+    ) -> _PoolEntry:
+        key = chat_model_key(config)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += count
+                return entry
+            self._misses += count
+
+        created = _PoolEntry(model=builder())
+        with self._lock:
+            entry = self._entries.setdefault(key, created)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return entry
+
+
+def chat_model_key(config: LLMProviderConfig) -> str:
+    """
+    Build a stable hash of a provider configuration.
+
+    Extension points:
+    - Exclude fields that do not affect the built client.
+    """
+
+    return hashlib.sha256(config.model_dump_json().encode("utf-8")).hexdigest()
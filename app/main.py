@@ -13,6 +13,9 @@ Example usage:
 from fastapi import FastAPI
 
 from app.api.router import api_router
+from app.core.dependencies import get_container
+from app.core.lifecycle import build_lifespan
+from app.core.metrics import install_metrics
 
 
 def create_app() -> FastAPI:
@@ -25,8 +28,13 @@ def create_app() -> FastAPI:
     - Add additional routers for new domains.
     """
 
-    app = FastAPI(title="LLM Orchestration Platform", version="0.1.0")
+    app = FastAPI(
+        title="LLM Orchestration Platform",
+        version="0.1.0",
+        lifespan=build_lifespan(get_container),
+    )
     app.include_router(api_router)
+    install_metrics(app, get_container)
     return app
 
 
@@ -10,6 +10,8 @@ from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
+from app.models.sizing import SizingBreakdown
+
 
 class FlowNodeSpec(BaseModel):
     """
@@ -44,12 +46,25 @@ class FlowRunRequest(BaseModel):
     """
 
     nodes: list[FlowNodeSpec] = Field(
-        description="Ordered list of nodes to execute."
+        default_factory=list,
+        description="Ordered list of nodes to execute; empty runs the default idea flow.",
     )
     input: Any = Field(
         default_factory=dict,
         description="Initial payload for the flow.",
     )
+    thread_id: str | None = Field(
+        default=None,
+        description="Conversation identifier for server-side state checkpointing.",
+    )
+    include_trace: bool = Field(
+        default=False,
+        description="Return per-node timing, token, and cache data in trace.",
+    )
+    tenant_id: str | None = Field(
+        default=None,
+        description="Tenant billed for LLM tokens and checked against its budget.",
+    )
 
 
 class FlowTraceStep(BaseModel):
@@ -57,13 +72,45 @@ class FlowTraceStep(BaseModel):
     Trace information for a single node execution.
 
     Extension points:
-    - Add timing metrics, errors, or resource usage.
+    - Add errors or resource usage.
     """
 
     node_id: str = Field(description="Executed node identifier.")
     node_type: str = Field(description="Executed node type name.")
     input: Any = Field(description="Input payload for the node.")
     output: Any = Field(description="Output payload from the node.")
+    duration_ms: float | None = Field(
+        default=None,
+        description="Wall time of the node in milliseconds.",
+    )
+    llm_calls: int = Field(default=0, description="Number of LLM calls made by the node.")
+    llm_ms: float = Field(default=0.0, description="Time spent in LLM calls in milliseconds.")
+    prompt_tokens: int = Field(default=0, description="Prompt tokens reported by the provider.")
+    completion_tokens: int = Field(
+        default=0,
+        description="Completion tokens reported by the provider.",
+    )
+    cached_tokens: int = Field(
+        default=0,
+        description="Prompt tokens served from the provider's prefix cache.",
+    )
+    tool_ms: float = Field(default=0.0, description="Time spent executing tools in milliseconds.")
+    cache_hits: int = Field(
+        default=0,
+        description="LLM response cache and duplicate-idea hits within the node.",
+    )
+
+
+class DuplicateIdea(BaseModel):
+    """
+    Previously sized idea whose result was reused for a near-duplicate form.
+
+    Extension points:
+    - Add a link to the original idea record.
+    """
+
+    idea_id: str = Field(description="Opaque identifier of the matched idea.")
+    similarity: float = Field(description="Estimated Jaccard similarity (0-1).")
 
 
 class FlowRunResponse(BaseModel):
@@ -88,7 +135,59 @@ class FlowRunResponse(BaseModel):
         default=None,
         description="Collected idea form fields from the analyst node.",
     )
+    sizing: SizingBreakdown | None = Field(
+        default=None,
+        description="Score breakdown behind the complexity value.",
+    )
+    duplicate_of: DuplicateIdea | None = Field(
+        default=None,
+        description="Matched idea when sizing was reused for a near-duplicate.",
+    )
+    outputs: dict[str, Any] | None = Field(
+        default=None,
+        description="Per-node outputs of a dynamic flow, keyed by node_id.",
+    )
     trace: list[FlowTraceStep] = Field(
         default_factory=list,
-        description="Execution trace for each node.",
+        description="Execution trace for each node (when include_trace is set).",
+    )
+    thread_id: str | None = Field(
+        default=None,
+        description="Conversation identifier to send with the next turn.",
+    )
+
+
+class FlowBatchRequest(BaseModel):
+    """
+    Request payload for running many flows over one connection.
+
+    Extension points:
+    - Add a batch identifier for resumable nightly jobs.
+    """
+
+    items: list[FlowRunRequest] = Field(description="Flow run requests to execute.")
+    concurrency: int | None = Field(
+        default=None,
+        ge=1,
+        description="Maximum flows in flight; defaults to the server setting.",
+    )
+
+
+class FlowBatchItemResult(BaseModel):
+    """
+    Outcome of a single batch item, streamed as one NDJSON line.
+
+    Extension points:
+    - Add per-item timing for batch reports.
+    """
+
+    index: int = Field(description="Position of the item in the batch request.")
+    ok: bool = Field(description="Whether the flow completed without error.")
+    response: FlowRunResponse | None = Field(
+        default=None,
+        description="Flow response when the item succeeded.",
+    )
+    error: str | None = Field(
+        default=None,
+        description="Error type and message when the item failed.",
     )
@@ -0,0 +1,42 @@
+"""
+Pydantic models for liveness and readiness responses.
+
+Extension points:
+- Add dependency-level health details (vector store, checkpointer).
+"""
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class WarmupCheck(BaseModel):
+    """
+    Outcome of a single startup warm-up step.
+
+    Extension points:
+    - Add retry counts for steps that recovered after failures.
+    """
+
+    name: str = Field(description="Warm-up step name.")
+    status: Literal["ok", "error", "skipped"] = Field(description="Step outcome.")
+    duration_ms: float = Field(default=0.0, description="Wall time spent in the step.")
+    error: str | None = Field(default=None, description="Error message when the step failed.")
+
+
+class ReadinessResponse(BaseModel):
+    """
+    Readiness state reported by the health endpoint.
+
+    Extension points:
+    - Add build or version metadata for rollout dashboards.
+    """
+
+    status: Literal["starting", "ready", "stopping"] = Field(
+        description="Application lifecycle state."
+    )
+    ready: bool = Field(description="Whether the instance accepts traffic.")
+    checks: list[WarmupCheck] = Field(
+        default_factory=list,
+        description="Warm-up steps completed so far, in execution order.",
+    )
@@ -0,0 +1,44 @@
+"""
+Pydantic models for prompt registry inspection and reload responses.
+
+Extension points:
+- Add request models for registering prompt versions over the API.
+"""
+
+from pydantic import BaseModel, Field
+
+
+class PromptInfo(BaseModel):
+    """
+    Current version of one registered prompt.
+
+    Extension points:
+    - Include a short preview of the template text.
+    """
+
+    prompt_id: str = Field(description="Stable prompt identifier.")
+    version: str = Field(description="Current version (explicit or content hash).")
+    origin: str = Field(description="Where the version came from: builtin, runtime or a file path.")
+
+
+class PromptListResponse(BaseModel):
+    """
+    Registered prompts and render memoization statistics.
+
+    Extension points:
+    - Add per-prompt render counts.
+    """
+
+    prompts: list[PromptInfo] = Field(description="Current version of every prompt.")
+    render_cache: dict[str, int | float] = Field(description="Render memo size, hits, misses and hit ratio.")
+
+
+class PromptReloadResponse(BaseModel):
+    """
+    Result of re-reading prompt files from disk.
+
+    Extension points:
+    - Report files that failed to compile.
+    """
+
+    changed: list[str] = Field(description="Prompt IDs whose current version changed.")
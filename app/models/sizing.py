@@ -0,0 +1,56 @@
+"""
+Pydantic models for deterministic T-shirt sizing.
+
+Extension points:
+- Add per-product-line weight profiles.
+- Add historical calibration metadata.
+"""
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class SizingCriteria(BaseModel):
+    """
+    Criterion scores extracted by the sizing LLM.
+
+    Extension points:
+    - Add optional confidence values per criterion.
+    """
+
+    talep_tipi: Literal["Development", "Development Değil"] = Field(
+        default="Development",
+        description="Whether the request requires development effort.",
+    )
+    is_akisi_netligi: int = Field(ge=1, le=5, description="A. Workflow clarity score.")
+    etkilenen_sistem: int = Field(ge=1, le=5, description="B. Affected systems score.")
+    ekip_koordinasyonu: int = Field(ge=1, le=5, description="C. Team coordination score.")
+    gelistirme_derinligi: int = Field(ge=1, le=5, description="D. Development depth score.")
+    test_etkisi: int = Field(ge=1, le=5, description="E. Test and business impact score.")
+    teknik_risk: bool = Field(
+        default=False,
+        description="SDK upgrade, framework migration, or refactoring work.",
+    )
+
+
+class SizingBreakdown(BaseModel):
+    """
+    Deterministic sizing result with the full score breakdown.
+
+    Extension points:
+    - Add band boundaries used for the decision.
+    """
+
+    talep_tipi: str = Field(description="Request type used for sizing.")
+    weighted_scores: dict[str, float] = Field(
+        default_factory=dict,
+        description="Criterion score multiplied by its weight.",
+    )
+    total_score: float = Field(description="Sum of weighted criterion scores.")
+    band_size: str = Field(description="T-shirt size from the score bands alone.")
+    t_shirt_size: str = Field(description="Final T-shirt size after veto rules.")
+    applied_rules: list[str] = Field(
+        default_factory=list,
+        description="Veto rules that changed the band size.",
+    )
@@ -0,0 +1,43 @@
+"""
+Pydantic models for token usage and tenant budget responses.
+
+Extension points:
+- Add per-thread breakdowns for support investigations.
+"""
+
+from pydantic import BaseModel, Field
+
+
+class ModelUsage(BaseModel):
+    """
+    Token usage of one model within the current budget window.
+
+    Extension points:
+    - Add estimated cost per model.
+    """
+
+    model: str = Field(description="Model or deployment name.")
+    prompt_tokens: int = Field(description="Prompt tokens, provider-reported or estimated.")
+    completion_tokens: int = Field(description="Completion tokens, provider-reported or estimated.")
+    cached_tokens: int = Field(description="Prompt tokens served from the provider's prefix cache.")
+    calls: int = Field(description="Number of chat completions.")
+    estimated_calls: int = Field(
+        description="Calls whose tokens were counted locally because the provider omitted usage."
+    )
+
+
+class TenantUsageResponse(BaseModel):
+    """
+    A tenant's token usage and budget for the current window.
+
+    Extension points:
+    - Include previous windows for trend views.
+    """
+
+    tenant_id: str = Field(description="Tenant identifier.")
+    window_start: int = Field(description="Start of the budget window (Unix seconds).")
+    window_seconds: int = Field(description="Length of the budget window in seconds.")
+    used_tokens: int = Field(description="Prompt plus completion tokens used in the window.")
+    budget_tokens: int | None = Field(description="Token budget per window; null when unlimited.")
+    remaining_tokens: int | None = Field(description="Tokens left in the window; null when unlimited.")
+    models: list[ModelUsage] = Field(description="Usage broken down by model.")
@@ -0,0 +1,409 @@
+"""
+Checkpoint persistence for multi-turn flow conversations.
+
+Extension points:
+- Add Redis or Postgres savers for multi-instance deployments.
+- Add encryption for persisted conversation state.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from app.core.config import Settings
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns)
+);
+CREATE INDEX IF NOT EXISTS checkpoints_updated_at ON checkpoints (updated_at);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    Persist the latest checkpoint per conversation thread in SQLite.
+
+    Only the most recent checkpoint is kept for each thread, serialized with
+    the LangGraph serializer and zlib-compressed. Threads idle for longer than
+    the TTL are treated as missing and periodically garbage collected.
+
+    Extension points:
+    - Keep a bounded checkpoint history for time-travel debugging.
+    - Move garbage collection to a background task.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: int | None = None,
+        gc_interval_seconds: int = 300,
+        compression_level: int = 6,
+    ) -> None:
+        """
+        Open the SQLite database and ensure the schema exists.
+
+        Extension points:
+        - Add schema migrations when the table layout changes.
+        """
+
+        super().__init__()
+        self._ttl_seconds = ttl_seconds
+        self._gc_interval_seconds = gc_interval_seconds
+        self._compression_level = compression_level
+        self._last_gc = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """
+        Return the latest checkpoint for the configured thread.
+
+        Extension points:
+        - Add read-through caching for hot threads.
+        """
+
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata, updated_at "
+                "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+            if row is None:
+                return None
+            checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata, updated_at = row
+            requested_id = get_checkpoint_id(config)
+            if requested_id and requested_id != checkpoint_id:
+                return None
+            if self._is_expired(updated_at, time.time()):
+                return None
+            writes = self._conn.execute(
+                "SELECT task_id, channel, type, value FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+                "ORDER BY task_id, idx",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchall()
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self._loads(type_, checkpoint),
+            metadata=self._loads(metadata_type, metadata),
+            pending_writes=[
+                (task_id, channel, self._loads(value_type, value))
+                for task_id, channel, value_type, value in writes
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+        )
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        """
+        Yield the stored checkpoint for a thread, if it matches the filters.
+
+        Extension points:
+        - Support listing across all threads for admin tooling.
+        """
+
+        if config is None or limit == 0:
+            return
+        checkpoint_tuple = self.get_tuple(config)
+        if checkpoint_tuple is None:
+            return
+        before_id = get_checkpoint_id(before) if before else None
+        if before_id and checkpoint_tuple.config["configurable"]["checkpoint_id"] >= before_id:
+            return
+        if filter and any(checkpoint_tuple.metadata.get(k) != v for k, v in filter.items()):
+            return
+        yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """
+        Replace the thread's checkpoint and drop writes of superseded ones.
+
+        Extension points:
+        - Batch writes for high-frequency supersteps.
+        """
+
+        _ = new_versions
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, checkpoint_blob = self._dumps(checkpoint)
+        metadata_type, metadata_blob = self._dumps(get_checkpoint_metadata(config, metadata))
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    checkpoint_blob,
+                    metadata_type,
+                    metadata_blob,
+                    now,
+                ),
+            )
+            self._conn.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?",
+                (thread_id, checkpoint_ns, checkpoint["id"]),
+            )
+        if now - self._last_gc >= self._gc_interval_seconds:
+            with self._lock:
+                self._prune_expired_locked(now)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """
+        Store intermediate task writes for the current checkpoint.
+
+        Extension points:
+        - Skip persistence for writes that are never replayed.
+        """
+
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self._dumps(value)
+            rows.append(
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint_id,
+                    task_id,
+                    WRITES_IDX_MAP.get(channel, idx),
+                    channel,
+                    type_,
+                    blob,
+                    task_path,
+                )
+            )
+        # Special writes (negative idx) overwrite; regular writes are idempotent.
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] < 0],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] >= 0],
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """
+        Delete the checkpoint and writes stored for a thread.
+
+        Extension points:
+        - Add audit logging for user-initiated deletions.
+        """
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+
+    def prune_expired(self) -> int:
+        """
+        Delete threads idle for longer than the TTL and return their count.
+
+        Extension points:
+        - Archive expired threads instead of deleting them.
+        """
+
+        with self._lock:
+            return self._prune_expired_locked(time.time())
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        _ = channel
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}"
+
+    def close(self) -> None:
+        """
+        Close the underlying SQLite connection.
+
+        Extension points:
+        - Checkpoint the WAL file before closing.
+        """
+
+        with self._lock:
+            self._conn.close()
+
+    def _prune_expired_locked(self, now: float) -> int:
+        self._last_gc = now
+        if not self._ttl_seconds:
+            return 0
+        cutoff = now - self._ttl_seconds
+        with self._conn:
+            expired = self._conn.execute(
+                "DELETE FROM checkpoints WHERE updated_at < ?",
+                (cutoff,),
+            ).rowcount
+            self._conn.execute(
+                "DELETE FROM writes WHERE thread_id NOT IN (SELECT thread_id FROM checkpoints)"
+            )
+        return expired
+
+    def _is_expired(self, updated_at: float, now: float) -> bool:
+        return bool(self._ttl_seconds) and updated_at < now - self._ttl_seconds
+
+    def _dumps(self, value: Any) -> tuple[str, bytes]:
+        type_, blob = self.serde.dumps_typed(value)
+        return type_, zlib.compress(blob, self._compression_level)
+
+    def _loads(self, type_: str, blob: bytes) -> Any:
+        return self.serde.loads_typed((type_, zlib.decompress(blob)))
+
+
+def build_checkpointer(settings: Settings) -> BaseCheckpointSaver | None:
+    """
+    Build the configured checkpoint saver for flow graphs.
+
+    ``memory`` is an in-process SQLite database with the same latest-only
+    storage and TTL garbage collection as ``sqlite``, so a long-running
+    server does not accumulate checkpoints; it is lost on restart.
+
+    Extension points:
+    - Register additional backends by name.
+    """
+
+    backend = settings.checkpoint_backend
+    if backend == "none":
+        return None
+    if backend in {"memory", "sqlite"}:
+        return SQLiteCheckpointSaver(
+            path=":memory:" if backend == "memory" else settings.checkpoint_path,
+            ttl_seconds=settings.checkpoint_ttl_seconds,
+        )
+    raise ValueError(f"Unsupported checkpoint backend: {backend}")
@@ -0,0 +1,363 @@
+"""
+Dynamic LangGraph flows compiled from ``FlowRunRequest.nodes``.
+
+Nodes run in the order given. Each node writes its result to
+``outputs[node_id]`` and to ``final_answer``, so the last node's output is
+the flow's answer. Compiled graphs are cached by a canonical hash of the
+node specs, so repeat flows skip graph construction and tool binding.
+
+Node ``config`` keys by type:
+- llm: ``system_prompt`` (sandboxed Jinja, rendered with ``input`` and
+  ``outputs``), ``tools`` (registry names to bind; calls to other tools,
+  and calls that raise, come back to the model as error tool messages),
+  ``model``, ``temperature``, ``max_tokens``.
+- function: ``function`` (defaults to ``name`` then ``node_id``) and
+  ``args``; without ``args`` a mapping ``input`` is passed as arguments.
+- script: ``script`` (defaults to ``name`` then ``node_id``).
+- rag: ``query`` (sandboxed Jinja, defaults to the question), ``top_k``,
+  ``filters``.
+
+Extension points:
+- Add edges and conditional routing between nodes.
+- Add per-node retry and timeout policies.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Annotated, Any, TypedDict
+
+from jinja2 import TemplateError
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph import END, StateGraph
+
+from app.functions.registry import FunctionRegistry
+from app.llm_provider.factory import LLMFactory
+from app.llm_provider.models import LLMProviderConfig
+from app.models.flow import FlowNodeSpec
+from app.models.rag import RAGQueryRequest
+from app.orchestration.graph import append_messages
+from app.orchestration.prompts import render_prompt
+from app.rag.service import RAGService
+from app.scripts.executor import ScriptExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class FlowDefinitionError(ValueError):
+    """
+    Raised when a node list cannot be compiled into a flow.
+
+    Extension points:
+    - Add the offending node ID for client-side highlighting.
+    """
+
+
+class DynamicFlowState(TypedDict, total=False):
+    """
+    Shared state for dynamic flows.
+
+    Extension points:
+    - Add typed per-node output schemas.
+    """
+
+    messages: Annotated[list[BaseMessage], append_messages]
+    input: Any
+    outputs: dict[str, Any]
+    final_answer: Any
+
+
+class GraphCache:
+    """
+    Thread-safe LRU cache of compiled graphs keyed by node-spec hash.
+
+    Extension points:
+    - Pre-warm frequently used product-line flows at startup.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Initialize an empty cache with the given capacity.
+
+        Extension points:
+        - Add time-based expiry for rarely used flows.
+        """
+
+        self._max_size = max_size
+        self._graphs: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._compile_seconds = 0.0
+
+    def get_or_build(self, key: str, builder: Callable[[], Any]) -> Any:
+        """
+        Return the cached graph for ``key``, compiling it on a miss.
+
+        Extension points:
+        - Coalesce concurrent compiles of the same key.
+        """
+
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is not None:
+                self._graphs.move_to_end(key)
+                self._hits += 1
+                return graph
+            self._misses += 1
+
+        started = time.perf_counter()
+        graph = builder()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._compile_seconds += elapsed
+            graph = self._graphs.setdefault(key, graph)
+            self._graphs.move_to_end(key)
+            while len(self._graphs) > self._max_size:
+                self._graphs.popitem(last=False)
+                self._evictions += 1
+        return graph
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return hit/miss counters, size, and total compile time.
+
+        Extension points:
+        - Add per-key hit counts for flow popularity reports.
+        """
+
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._graphs),
+                "max_size": self._max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "compile_seconds": round(self._compile_seconds, 6),
+            }
+
+
+def graph_cache_key(nodes: list[FlowNodeSpec]) -> str:
+    """
+    Build a canonical hash of an ordered node list.
+
+    Extension points:
+    - Include a flow schema version to invalidate old entries.
+    """
+
+    payload = json.dumps(
+        [node.model_dump() for node in nodes],
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_dynamic_graph(
+    nodes: list[FlowNodeSpec],
+    llm_factory: LLMFactory,
+    function_registry: FunctionRegistry,
+    script_executor: ScriptExecutor,
+    rag_service: RAGService,
+    config: LLMProviderConfig,
+    checkpointer: BaseCheckpointSaver | None = None,
+):
+    """
+    Compile an ordered node list into a linear LangGraph flow.
+
+    Extension points:
+    - Add parallel fan-out for independent nodes.
+    """
+
+    if not nodes:
+        raise FlowDefinitionError("Dynamic flows need at least one node")
+    node_ids = [spec.node_id for spec in nodes]
+    if len(set(node_ids)) != len(node_ids):
+        raise FlowDefinitionError("Node IDs must be unique")
+    reserved = set(node_ids) & set(DynamicFlowState.__annotations__)
+    if reserved:
+        raise FlowDefinitionError(f"Node IDs clash with state keys: {sorted(reserved)}")
+
+    graph = StateGraph(DynamicFlowState)
+    for spec in nodes:
+        graph.add_node(
+            spec.node_id,
+            _build_node(spec, llm_factory, function_registry, script_executor, rag_service, config),
+        )
+    graph.set_entry_point(nodes[0].node_id)
+    for current, following in zip(nodes, nodes[1:]):
+        graph.add_edge(current.node_id, following.node_id)
+    graph.add_edge(nodes[-1].node_id, END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def _build_node(
+    spec: FlowNodeSpec,
+    llm_factory: LLMFactory,
+    function_registry: FunctionRegistry,
+    script_executor: ScriptExecutor,
+    rag_service: RAGService,
+    config: LLMProviderConfig,
+) -> Any:
+    if spec.type == "llm":
+        return _build_llm_node(spec, llm_factory, function_registry, config)
+
+    if spec.type == "function":
+        function_name = spec.config.get("function") or spec.name or spec.node_id
+        if function_name not in function_registry.names():
+            raise FlowDefinitionError(f"Unknown function for node {spec.node_id}: {function_name}")
+
+        def function_node(state: DynamicFlowState) -> DynamicFlowState:
+            args = spec.config.get("args")
+            if args is None:
+                payload = state.get("input")
+                args = payload if isinstance(payload, dict) else {}
+            return _output_update(state, spec.node_id, function_registry.invoke(function_name, args))
+
+        return function_node
+
+    if spec.type == "script":
+        script_name = spec.config.get("script") or spec.name or spec.node_id
+
+        def script_node(state: DynamicFlowState) -> DynamicFlowState:
+            context = {"input": state.get("input"), "outputs": state.get("outputs", {})}
+            return _output_update(state, spec.node_id, script_executor.execute(script_name, context))
+
+        return script_node
+
+    def rag_node(state: DynamicFlowState) -> DynamicFlowState:
+        query_template = spec.config.get("query")
+        if query_template:
+            query = _render_template(spec, query_template, state)
+        else:
+            query = _question(state.get("input"))
+        request = RAGQueryRequest(
+            query=query,
+            top_k=spec.config.get("top_k", 5),
+            filters=spec.config.get("filters"),
+        )
+        return _output_update(state, spec.node_id, rag_service.query(request).model_dump())
+
+    return rag_node
+
+
+def _build_llm_node(
+    spec: FlowNodeSpec,
+    llm_factory: LLMFactory,
+    function_registry: FunctionRegistry,
+    config: LLMProviderConfig,
+) -> RunnableLambda:
+    overrides = {
+        key: spec.config[key]
+        for key in ("model", "temperature", "max_tokens")
+        if key in spec.config
+    }
+    node_config = config.model_copy(update=overrides)
+    tool_names = list(spec.config.get("tools") or [])
+    if tool_names:
+        unknown = set(tool_names) - set(function_registry.names())
+        if unknown:
+            raise FlowDefinitionError(f"Unknown tools for node {spec.node_id}: {sorted(unknown)}")
+        tools = [tool for tool in function_registry.as_langchain_tools() if tool.name in tool_names]
+        llm = llm_factory.build_tool_model(node_config, tools)
+    else:
+        llm = llm_factory.build_chat_model(node_config)
+    system_prompt = spec.config.get("system_prompt")
+
+    def llm_messages(state: DynamicFlowState) -> list[BaseMessage]:
+        messages = list(state.get("messages", []))
+        if system_prompt:
+            rendered = _render_template(spec, system_prompt, state)
+            messages.insert(0, SystemMessage(content=rendered))
+        return messages
+
+    def llm_update(state: DynamicFlowState, response: BaseMessage) -> DynamicFlowState:
+        produced: list[BaseMessage] = [response]
+        output: Any = response.content
+        calls = response.tool_calls if isinstance(response, AIMessage) else []
+        if calls:
+            results = []
+            for call in calls:
+                entry, message = _run_tool_call(function_registry, tool_names, call)
+                results.append(entry)
+                produced.append(message)
+            output = {"content": response.content, "tool_calls": results}
+        update = _output_update(state, spec.node_id, output)
+        update["messages"] = produced
+        return update
+
+    def llm_node(state: DynamicFlowState) -> DynamicFlowState:
+        return llm_update(state, llm.invoke(llm_messages(state)))
+
+    async def llm_node_async(state: DynamicFlowState) -> DynamicFlowState:
+        return llm_update(state, await llm.ainvoke(llm_messages(state)))
+
+    return RunnableLambda(llm_node, afunc=llm_node_async)
+
+
+def _run_tool_call(
+    function_registry: FunctionRegistry,
+    tool_names: list[str],
+    call: dict[str, Any],
+) -> tuple[dict[str, Any], ToolMessage]:
+    # The model may name tools the node never bound, or pass bad arguments;
+    # report those back as tool errors instead of failing the whole run.
+    name, args = call["name"], call.get("args")
+    tool_call_id = str(call.get("id") or name)
+    if name not in tool_names:
+        error = f"Tool not available for this node: {name}"
+    else:
+        try:
+            result = function_registry.invoke(name, args or {})
+        except Exception as exc:
+            logger.warning("Tool %s failed", name, exc_info=True)
+            error = f"Tool {name} failed: {type(exc).__name__}"
+        else:
+            content = json.dumps(result, ensure_ascii=False, default=str)
+            return (
+                {"name": name, "args": args, "result": result},
+                ToolMessage(content=content, tool_call_id=tool_call_id),
+            )
+    return (
+        {"name": name, "args": args, "error": error},
+        ToolMessage(content=error, tool_call_id=tool_call_id, status="error"),
+    )
+
+
+def _output_update(state: DynamicFlowState, node_id: str, output: Any) -> DynamicFlowState:
+    return {
+        "outputs": {**state.get("outputs", {}), node_id: output},
+        "final_answer": output,
+    }
+
+
+def _template_context(state: DynamicFlowState) -> dict[str, Any]:
+    return {"input": state.get("input"), "outputs": state.get("outputs", {})}
+
+
+def _render_template(spec: FlowNodeSpec, template: str, state: DynamicFlowState) -> str:
+    # Node templates come from the request, so they never see the
+    # unsandboxed environment used for the repo's own prompts.
+    try:
+        return render_prompt(template, _template_context(state), sandboxed=True)
+    except TemplateError as exc:
+        raise FlowDefinitionError(f"Invalid template for node {spec.node_id}: {exc}") from exc
+
+
+def _question(payload: Any) -> str:
+    if isinstance(payload, dict):
+        return str(payload.get("question", "") or "")
+    return str(payload or "")
@@ -3,21 +3,50 @@ LangGraph-based orchestration flow definitions.
 
 Extension points:
 - Add additional nodes or branches for new workflows.
-- Add persistence for state between requests.
+- Add branch-specific checkpoint namespaces.
 """
 
 from __future__ import annotations
 
 import json
-from typing import Any, TypedDict
+import time
+from typing import Annotated, Any, TypedDict
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, StateGraph
 
+from app.core.metrics import IDEA_DUPLICATE_HITS
+from app.core.tracing import record_cache_hit, record_tool_time
+from app.core.usage import current_scope
 from app.functions.registry import FunctionRegistry
 from app.llm_provider.factory import LLMFactory
 from app.llm_provider.models import LLMProviderConfig
-from app.orchestration.prompts import ANALYST_SYSTEM_PROMPT, SIZING_SYSTEM_PROMPT, render_prompt
+from app.orchestration.memory import HistoryCompactor
+from app.orchestration.prompts import ANALYST_SYSTEM, SIZING_REQUEST, SIZING_SYSTEM, PromptRegistry
+from app.orchestration.similarity import IdeaIndex
+
+
+def append_messages(
+    left: list[BaseMessage],
+    right: list[BaseMessage] | BaseMessage,
+) -> list[BaseMessage]:
+    """
+    Append-only reducer for ``FlowState.messages``.
+
+    Nodes return only the messages they produced. The merged list is a new
+    object because LangGraph shares channel values with checkpoints.
+
+    Extension points:
+    - Add message trimming or ID-based replacement.
+    """
+
+    if isinstance(right, BaseMessage):
+        right = [right]
+    if not right:
+        return left
+    return left + right
 
 
 class FlowState(TypedDict, total=False):
@@ -29,19 +58,27 @@ class FlowState(TypedDict, total=False):
     - Add persistence hooks for audit logging.
     """
 
-    messages: list[BaseMessage]
+    messages: Annotated[list[BaseMessage], append_messages]
     idea_form: dict[str, Any] | None
     form_submitted: bool
     complexity: str | None
     analysis_note: str | None
+    sizing: dict[str, Any] | None
+    duplicate_of: dict[str, Any] | None
     final_answer: str | None
     last_tool_calls: list[dict[str, Any]]
+    history_summary: str | None
+    summarized_count: int
 
 
-def build_initial_state(payload: Any) -> FlowState:
+def build_initial_state(payload: Any, resume: bool = False) -> FlowState:
     """
     Build the initial LangGraph state from the request payload.
 
+    The returned messages are appended to the thread's existing messages.
+    When ``resume`` is set the thread already holds a checkpointed
+    transcript, so the client-supplied ``chat_history`` is ignored.
+
     Extension points:
     - Support additional input fields or metadata.
     """
@@ -56,6 +93,9 @@ def build_initial_state(payload: Any) -> FlowState:
     else:
         question = str(payload)
 
+    if resume:
+        chat_history = []
+
     for item in chat_history:
         if not isinstance(item, dict):
             continue
@@ -75,6 +115,8 @@ def build_initial_state(payload: Any) -> FlowState:
         "form_submitted": False,
         "complexity": None,
         "analysis_note": None,
+        "sizing": None,
+        "duplicate_of": None,
         "final_answer": None,
         "last_tool_calls": [],
     }
@@ -84,31 +126,65 @@ def build_flow_graph(
     llm_factory: LLMFactory,
     function_registry: FunctionRegistry,
     config: LLMProviderConfig,
+    checkpointer: BaseCheckpointSaver | None = None,
+    history_compactor: HistoryCompactor | None = None,
+    idea_index: IdeaIndex | None = None,
+    prompts: PromptRegistry | None = None,
 ):
     """
     Build and compile the LangGraph orchestration flow.
 
+    LLM nodes carry both sync and async implementations, so the compiled
+    graph supports ``invoke`` as well as non-blocking ``ainvoke``. With an
+    ``idea_index``, submitted forms that nearly duplicate an idea already
+    sized for the same tenant (the active ``usage_scope``) reuse its size
+    and skip the sizing LLM call. System prompts are looked up in
+    ``prompts`` on every call, so registry reloads apply to the compiled
+    graph; constant renders are served from the registry's memo. System
+    prompts are static and per-request data (the idea JSON) follows them in
+    a user message, so the system prefix stays cacheable.
+
     Extension points:
     - Add additional nodes for RAG or script execution.
     - Swap prompts or models for specific tenants.
     """
 
     tools = function_registry.as_langchain_tools()
-    analyst_llm = llm_factory.build_chat_model(config).bind_tools(tools)
-    sizing_llm = llm_factory.build_chat_model(config).bind_tools(tools)
+    analyst_llm = llm_factory.build_tool_model(config, tools)
+    sizing_llm = llm_factory.build_tool_model(config, tools)
 
-    def analyst_node(state: FlowState) -> FlowState:
-        system_prompt = render_prompt(
-            ANALYST_SYSTEM_PROMPT,
-            {"question": "", "chat_history": []},
-        )
-        messages = [SystemMessage(content=system_prompt)] + state.get("messages", [])
-        response = analyst_llm.invoke(messages)
+    prompts = prompts or PromptRegistry()
+
+    def analyst_messages(state: FlowState, summary: str | None, count: int) -> list[BaseMessage]:
+        messages = state.get("messages", [])
+        if history_compactor is not None:
+            messages = history_compactor.window(messages, summary, count)
+        return [SystemMessage(content=prompts.render(ANALYST_SYSTEM)), *messages]
+
+    def analyst_update(response: BaseMessage, summary: str | None, count: int) -> FlowState:
         tool_calls = _normalize_tool_calls(response)
-        return {
-            "messages": state.get("messages", []) + [response],
+        update: FlowState = {
+            "messages": [response],
             "last_tool_calls": tool_calls,
         }
+        if history_compactor is not None:
+            update["history_summary"] = summary
+            update["summarized_count"] = count
+        return update
+
+    def analyst_node(state: FlowState) -> FlowState:
+        summary, count = state.get("history_summary"), state.get("summarized_count", 0)
+        if history_compactor is not None:
+            summary, count = history_compactor.compact(state.get("messages", []), summary, count)
+        response = analyst_llm.invoke(analyst_messages(state, summary, count))
+        return analyst_update(response, summary, count)
+
+    async def analyst_node_async(state: FlowState) -> FlowState:
+        summary, count = state.get("history_summary"), state.get("summarized_count", 0)
+        if history_compactor is not None:
+            summary, count = await history_compactor.acompact(state.get("messages", []), summary, count)
+        response = await analyst_llm.ainvoke(analyst_messages(state, summary, count))
+        return analyst_update(response, summary, count)
 
     def submit_tool_node(state: FlowState) -> FlowState:
         tool_calls = state.get("last_tool_calls", [])
@@ -123,30 +199,50 @@ def build_flow_graph(
                     tool_call_id=_extract_tool_id(tool_calls, "submit_idea_form"),
                 )
             )
-        return {
+        update: FlowState = {
             "idea_form": idea_payload,
             "form_submitted": idea_payload is not None,
-            "messages": state.get("messages", []) + tool_messages,
+            "messages": tool_messages,
         }
-
-    def sizing_node(state: FlowState) -> FlowState:
+        tenant_id = current_scope().tenant_id
+        match = idea_index.match(idea_payload, tenant_id) if idea_index and idea_payload else None
+        if match is not None:
+            record_cache_hit()
+            IDEA_DUPLICATE_HITS.labels().inc()
+            update["complexity"] = match.complexity
+            update["analysis_note"] = match.analysis_note
+            update["sizing"] = match.sizing
+            update["duplicate_of"] = {"idea_id": match.idea_id, "similarity": match.similarity}
+        return update
+
+    def sizing_messages(state: FlowState) -> list[BaseMessage]:
         idea = state.get("idea_form") or {}
-        system_prompt = render_prompt(SIZING_SYSTEM_PROMPT, {"idea": json.dumps(idea, ensure_ascii=False, indent=2)})
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"Talep Bilgileri:\n{json.dumps(idea, ensure_ascii=False, indent=2)}"),
+        idea_json = json.dumps(idea, ensure_ascii=False, indent=2)
+        return [
+            SystemMessage(content=prompts.render(SIZING_SYSTEM)),
+            HumanMessage(content=prompts.render(SIZING_REQUEST, {"idea": idea_json})),
         ]
-        response = sizing_llm.invoke(messages)
+
+    def sizing_update(response: BaseMessage) -> FlowState:
         tool_calls = _normalize_tool_calls(response)
         return {
-            "messages": state.get("messages", []) + [response],
+            "messages": [response],
             "last_tool_calls": tool_calls,
         }
 
+    def sizing_node(state: FlowState) -> FlowState:
+        response = sizing_llm.invoke(sizing_messages(state))
+        return sizing_update(response)
+
+    async def sizing_node_async(state: FlowState) -> FlowState:
+        response = await sizing_llm.ainvoke(sizing_messages(state))
+        return sizing_update(response)
+
     def score_tool_node(state: FlowState) -> FlowState:
         tool_calls = state.get("last_tool_calls", [])
         score_args = _extract_tool_args(tool_calls, "score_complexity") or {}
         tool_messages: list[BaseMessage] = []
+        sizing: dict[str, Any] | None = None
         if isinstance(score_args, dict) and score_args:
             result = _execute_tool(function_registry, "score_complexity", score_args)
             tool_messages.append(
@@ -155,10 +251,17 @@ def build_flow_graph(
                     tool_call_id=_extract_tool_id(tool_calls, "score_complexity"),
                 )
             )
+            sizing = {key: value for key, value in result.items() if key != "status"}
+        complexity = _safe_get(sizing, "t_shirt_size")
+        analysis_note = _safe_get(score_args, "Analiz_Notu")
+        idea_form = state.get("idea_form")
+        if idea_index is not None and complexity and isinstance(idea_form, dict):
+            idea_index.add(idea_form, current_scope().tenant_id, complexity, analysis_note, sizing)
         return {
-            "complexity": _safe_get(score_args, "T_Shirt_Size"),
-            "analysis_note": _safe_get(score_args, "Analiz_Notu"),
-            "messages": state.get("messages", []) + tool_messages,
+            "complexity": complexity,
+            "analysis_note": analysis_note,
+            "sizing": sizing,
+            "messages": tool_messages,
         }
 
     def finalize_node(state: FlowState) -> FlowState:
@@ -172,6 +275,13 @@ def build_flow_graph(
                 "Sürecinizin devam etmesi için, 'Fikirlerim' sekmesi altından, "
                 "oluşturduğunuz fikrin olgunlaştırmasını sağlamasınız."
             )
+            duplicate_of = state.get("duplicate_of")
+            if duplicate_of:
+                similarity = round(duplicate_of.get("similarity", 0) * 100)
+                final_answer += (
+                    "\nBenzer bir fikir daha önce değerlendirildiği için aynı kompleksite "
+                    f"kullanılmıştır (benzerlik %{similarity})."
+                )
         else:
             final_answer = _last_ai_message_content(state.get("messages", [])) or ""
         return {"final_answer": final_answer}
@@ -181,15 +291,20 @@ def build_flow_graph(
             return "submit_tool_node"
         return "finalize"
 
+    def route_after_submit(state: FlowState) -> str:
+        if state.get("duplicate_of"):
+            return "finalize"
+        return "sizing_llm"
+
     def route_after_sizing(state: FlowState) -> str:
         if _has_tool_call(state, "score_complexity"):
             return "score_tool_node"
         return "finalize"
 
     graph = StateGraph(FlowState)
-    graph.add_node("analyst_llm", analyst_node)
+    graph.add_node("analyst_llm", RunnableLambda(analyst_node, afunc=analyst_node_async))
     graph.add_node("submit_tool_node", submit_tool_node)
-    graph.add_node("sizing_llm", sizing_node)
+    graph.add_node("sizing_llm", RunnableLambda(sizing_node, afunc=sizing_node_async))
     graph.add_node("score_tool_node", score_tool_node)
     graph.add_node("finalize", finalize_node)
 
@@ -199,7 +314,11 @@ def build_flow_graph(
         route_after_analyst,
         {"submit_tool_node": "submit_tool_node", "finalize": "finalize"},
     )
-    graph.add_edge("submit_tool_node", "sizing_llm")
+    graph.add_conditional_edges(
+        "submit_tool_node",
+        route_after_submit,
+        {"sizing_llm": "sizing_llm", "finalize": "finalize"},
+    )
     graph.add_conditional_edges(
         "sizing_llm",
         route_after_sizing,
@@ -207,7 +326,7 @@ def build_flow_graph(
     )
     graph.add_edge("score_tool_node", "finalize")
     graph.add_edge("finalize", END)
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
 
 
 def _normalize_tool_calls(message: BaseMessage) -> list[dict[str, Any]]:
@@ -271,10 +390,11 @@ def _extract_tool_id(tool_calls: list[dict[str, Any]], name: str) -> str:
 
 
 def _execute_tool(registry: FunctionRegistry, name: str, args: Any) -> Any:
-    function = registry.get(name)
-    if isinstance(args, dict):
-        return function(**args)
-    return function(args)
+    started = time.perf_counter()
+    try:
+        return registry.invoke(name, args)
+    finally:
+        record_tool_time((time.perf_counter() - started) * 1000)
 
 
 def _safe_get(data: Any, key: str) -> Any:
@@ -0,0 +1,243 @@
+"""
+Token-budgeted conversation memory for the analyst node.
+
+Extension points:
+- Plug in a provider tokenizer instead of the character estimate.
+- Persist the summary cache in a shared store.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langgraph.constants import TAG_NOSTREAM
+
+from app.orchestration.prompts import HISTORY_SUMMARY, PromptRegistry
+
+
+@dataclass(frozen=True)
+class CompactionPlan:
+    """
+    Result of splitting a transcript into a summary part and a verbatim window.
+
+    Extension points:
+    - Add token counts for tracing and metrics.
+    """
+
+    window_start: int
+    base_summary: str | None
+    base_count: int
+
+    @property
+    def needs_summary(self) -> bool:
+        return self.window_start > self.base_count
+
+
+class HistoryCompactor:
+    """
+    Keep the last turns verbatim and fold older turns into a rolling summary.
+
+    The verbatim window holds at most ``keep_turns`` user turns and is shrunk
+    further while it exceeds ``token_budget``. Older messages are folded into
+    a summary that is only recomputed when the window slides. Summaries are
+    carried in the checkpointed flow state and also cached by transcript
+    prefix, so requests that resend their history reuse them as well.
+
+    Extension points:
+    - Summarize on a background task instead of inline.
+    - Add per-tenant budgets.
+    """
+
+    def __init__(
+        self,
+        summarizer_llm: Any,
+        token_budget: int,
+        keep_turns: int,
+        cache_size: int = 512,
+        prompts: PromptRegistry | None = None,
+    ) -> None:
+        """
+        Initialize the compactor with a summarizer model and budget settings.
+
+        Extension points:
+        - Use a smaller, cheaper model for summarization.
+        """
+
+        self._summarizer_llm = summarizer_llm.with_config(tags=[TAG_NOSTREAM])
+        self._token_budget = token_budget
+        self._keep_turns = max(keep_turns, 1)
+        self._cache_size = cache_size
+        self._prompts = prompts or PromptRegistry()
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def plan(
+        self,
+        messages: list[BaseMessage],
+        summary: str | None,
+        summarized_count: int,
+    ) -> CompactionPlan:
+        """
+        Choose the verbatim window and the summary it should build on.
+
+        Extension points:
+        - Keep pinned messages (e.g. form summaries) inside the window.
+        """
+
+        window_start = max(self._window_start(messages), summarized_count)
+        if summary is not None or window_start == 0:
+            return CompactionPlan(window_start, summary, summarized_count)
+
+        cached_summary, cached_count = self._lookup_prefix(messages, window_start)
+        return CompactionPlan(window_start, cached_summary, cached_count)
+
+    def compact(
+        self,
+        messages: list[BaseMessage],
+        summary: str | None,
+        summarized_count: int,
+    ) -> tuple[str | None, int]:
+        """
+        Return the summary and summarized message count for the transcript.
+
+        Extension points:
+        - Fall back to truncation when the summarizer fails.
+        """
+
+        plan = self.plan(messages, summary, summarized_count)
+        if not plan.needs_summary:
+            return plan.base_summary, plan.window_start
+        response = self._summarizer_llm.invoke(self._summary_request(messages, plan))
+        return self._store(messages, plan, response), plan.window_start
+
+    async def acompact(
+        self,
+        messages: list[BaseMessage],
+        summary: str | None,
+        summarized_count: int,
+    ) -> tuple[str | None, int]:
+        """
+        Async variant of ``compact``.
+
+        Extension points:
+        - Add a deadline so slow summaries do not delay the reply.
+        """
+
+        plan = self.plan(messages, summary, summarized_count)
+        if not plan.needs_summary:
+            return plan.base_summary, plan.window_start
+        response = await self._summarizer_llm.ainvoke(self._summary_request(messages, plan))
+        return self._store(messages, plan, response), plan.window_start
+
+    def window(
+        self,
+        messages: list[BaseMessage],
+        summary: str | None,
+        summarized_count: int,
+    ) -> list[BaseMessage]:
+        """
+        Build the prompt history: the summary followed by the verbatim window.
+
+        Extension points:
+        - Render the summary as a user message for models without system turns.
+        """
+
+        recent = messages[summarized_count:]
+        if not summary:
+            return recent
+        return [SystemMessage(content=f"Önceki konuşmanın özeti:\n{summary}"), *recent]
+
+    def _window_start(self, messages: list[BaseMessage]) -> int:
+        turns = 0
+        tokens = 0
+        window_start = len(messages)
+        for index in range(len(messages) - 1, -1, -1):
+            tokens += estimate_tokens(messages[index])
+            if not isinstance(messages[index], HumanMessage):
+                continue
+            if turns and (turns >= self._keep_turns or tokens > self._token_budget):
+                break
+            turns += 1
+            window_start = index
+        if turns == 0:
+            return 0
+        return window_start
+
+    def _summary_request(
+        self,
+        messages: list[BaseMessage],
+        plan: CompactionPlan,
+    ) -> list[BaseMessage]:
+        transcript = _render_transcript(messages[plan.base_count : plan.window_start])
+        previous = plan.base_summary or "(yok)"
+        return [
+            SystemMessage(content=self._prompts.render(HISTORY_SUMMARY)),
+            HumanMessage(content=f"Önceki özet:\n{previous}\n\nYeni mesajlar:\n{transcript}"),
+        ]
+
+    def _store(self, messages: list[BaseMessage], plan: CompactionPlan, response: Any) -> str:
+        summary = str(getattr(response, "content", response) or "").strip()
+        key = _prefix_hashes(messages, plan.window_start)[-1]
+        with self._lock:
+            self._cache[key] = summary
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return summary
+
+    def _lookup_prefix(self, messages: list[BaseMessage], limit: int) -> tuple[str | None, int]:
+        hashes = _prefix_hashes(messages, limit)
+        with self._lock:
+            for count in range(limit, 0, -1):
+                summary = self._cache.get(hashes[count])
+                if summary is not None:
+                    self._cache.move_to_end(hashes[count])
+                    return summary, count
+        return None, 0
+
+
+def estimate_tokens(message: BaseMessage) -> int:
+    """
+    Estimate the prompt tokens of a message without a tokenizer.
+
+    Extension points:
+    - Replace with a model-specific tokenizer.
+    """
+
+    text = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += json.dumps(tool_calls, ensure_ascii=False, default=str)
+    return len(text) // 4 + 4
+
+
+def _prefix_hashes(messages: list[BaseMessage], limit: int) -> list[str]:
+    hashes = [""]
+    digest = hashlib.sha1()
+    for message in messages[:limit]:
+        digest.update(message.type.encode())
+        digest.update(str(message.content).encode())
+        hashes.append(digest.copy().hexdigest())
+    return hashes
+
+
+def _render_transcript(messages: list[BaseMessage]) -> str:
+    lines: list[str] = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            lines.append(f"# user:\n{message.content}")
+        elif isinstance(message, AIMessage):
+            if message.content:
+                lines.append(f"# assistant:\n{message.content}")
+            for call in message.tool_calls or []:
+                args = json.dumps(call.get("args"), ensure_ascii=False)
+                lines.append(f"# assistant tool_call {call.get('name')}:\n{args}")
+        else:
+            lines.append(f"# {message.type}:\n{message.content}")
+    return "\n\n".join(lines)
@@ -1,13 +1,30 @@
 """
 Prompt templates for orchestration nodes.
 
+Built-in prompts are registered in a ``PromptRegistry`` under stable IDs.
+Templates are compiled once in a shared jinja2 ``Environment``, rendered
+output is memoized per (ID, version, context), and prompts can be
+overridden from ``*.j2`` files and reloaded at runtime.
+
+System prompts carry no per-request variables, so they form a byte-stable
+prefix that provider prefix caches (vLLM, OpenAI) can reuse; per-request
+data such as the idea JSON goes into trailing messages (``sizing_request``).
+
 Extension points:
-- Add prompt registry with IDs and versioning.
-- Externalize prompts to files or a database for runtime updates.
+- Load prompts from a database or remote config service.
+- Add A/B selection between prompt versions.
 """
 
-from typing import Any
+from __future__ import annotations
+
+import hashlib
 import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
 
 
 ANALYST_SYSTEM_PROMPT = """
@@ -124,31 +141,29 @@ SIZING_SYSTEM_PROMPT = """
 # system:
 🎯 ROL VE BAĞLAM:
 Sen bankacılık sektöründe uzmanlaşmış Kıdemli Teknik Analist ve Takım Liderisin.
-Görevin, gelen talepleri analiz ederek geliştirici ekipler için en doğru efor büyüklüğünü (T-Shirt Size) belirlemektir.
-
-TEMEL PRENSİBİN: "Eşitlik değil, Adalet."
-(Bir metin değişikliği ile bir API entegrasyonu matematiksel olarak eşit puanlanamaz. Teknik zorluğu yüksek olanın puanı katlanarak artmalıdır.)
+Görevin, gelen talebi analiz ederek efor kriterlerini puanlamaktır.
+Ağırlıklandırma, veto kuralları ve T-Shirt Size hesabı sistem tarafından yapılır; sen hesaplama yapma.
 
 ---
 
 📚 BÖLÜM 1: REFERANS ÖRNEKLER (BENCHMARK)
-Analiz yaparken aşağıdaki "Altın Standart" örnekleri baz al:
+Puanlarken aşağıdaki "Altın Standart" örnekleri baz al:
 
 1. ÖRNEK (XS): "Müşteri iletişim ekranındaki 'Telefon' label'ı 'GSM' olarak değiştirilsin."
    -> Analiz: Sadece UI text değişimi. Logic yok, DB yok.
-   -> Karar: XS
+   -> Puanlar: A=1, B=1, C=1, D=1, E=1, Teknik_Risk=false
 
 2. ÖRNEK (S): "Kredi başvuru formuna 'Referans Kodu' adında opsiyonel bir alan eklensin."
    -> Analiz: DB'de kolon açılacak, ekrana eklenecek. Validasyon yok, karmaşık logic yok.
-   -> Karar: S
+   -> Puanlar: A=1, B=1, C=1, D=2, E=1, Teknik_Risk=false
 
 3. ÖRNEK (M): "Müşteri adres bilgileri artık MERNİS servisinden otomatik sorgulanıp güncellensin."
    -> Analiz: Dış servis entegrasyonu (Entegrasyon), data update (Logic).
-   -> Karar: M
+   -> Puanlar: A=3, B=3, C=2, D=3, E=3, Teknik_Risk=false
 
 4. ÖRNEK (L): "Tüm mobil uygulamada kullanılan Login SDK'sı v2.0'dan v3.0'a yükseltilsin."
    -> Analiz: Tüm kanalları etkiler, breaking change riski var, test eforu çok yüksek.
-   -> Karar: L (Teknik iş olduğu için)
+   -> Puanlar: A=2, B=5, C=4, D=4, E=5, Teknik_Risk=true
 
 ---
 
@@ -167,110 +182,302 @@ Talep teknik bir efor gerektiriyor mu?
 - Versiyon geçişleri
 - Güvenlik yamaları
 
-Eğer "Development Değil" ise analizi bitir.
-
 ---
 
-🧮 BÖLÜM 3: AĞIRLIKLI PUANLAMA MOTORU (YENİ FORMÜL)
-
-Her kriteri 1-5 arasında puanla, sonra yanındaki KATSAYI ile çarp.
-
-A. İş Akışı Netliği (Katsayı: 0.5)
-(Belirsizlik eforu artırır ama kod kadar değil)
-1 = Çok Net -> (1 x 0.5 = 0.5 Puan)
-3 = Analiz Gerekli -> (3 x 0.5 = 1.5 Puan)
-5 = Çok Belirsiz -> (5 x 0.5 = 2.5 Puan)
+🧮 BÖLÜM 3: KRİTERLER (her biri 1-5)
 
-B. Etkilenen Sistem Sayısı (Katsayı: 1.5)
-(Entegrasyon riski üssel artar)
-1 = Tek Sistem -> (1.5 Puan)
-3 = 2-3 Sistem -> (4.5 Puan)
-5 = 4+ Sistem / Core Banking -> (7.5 Puan)
+A. Is_Akisi_Netligi: 1 = Çok Net, 3 = Analiz Gerekli, 5 = Çok Belirsiz
+B. Etkilenen_Sistem: 1 = Tek Sistem, 3 = 2-3 Sistem, 5 = 4+ Sistem / Core Banking
+C. Ekip_Koordinasyonu: 1 = Tek Ekip, 3 = 2-3 Ekip, 5 = 4+ Ekip
+D. Gelistirme_Derinligi:
+   1 = UI / Metin / Kozmetik
+   2 = Basit DB / Küçük Kural
+   3 = Yeni API / SDK Minor Update / Orta Logic
+   4 = Yeni Ekran / Karmaşık Akış / SDK Major
+   5 = Mimari Değişiklik / Refactoring / Yeni Entegrasyon
+E. Test_Etkisi: 1 = Sadece IT, 3 = 2-3 Birim, 5 = Tüm Banka
 
-C. Ekip Koordinasyonu (Katsayı: 1.0)
-1 = Tek Ekip -> (1 Puan)
-3 = 2-3 Ekip -> (3 Puan)
-5 = 4+ Ekip -> (5 Puan)
+Teknik_Risk: İş "SDK Upgrade", "Framework Geçişi" veya "Refactoring" ise true.
 
-D. Geliştirme Derinliği (Katsayı: 2.5) - EN KRİTİK MADDE
-1 = UI / Metin / Kozmetik -> (2.5 Puan)
-2 = Basit DB / Küçük Kural -> (5.0 Puan)
-3 = Yeni API / SDK Minor Update / Orta Logic -> (7.5 Puan)
-4 = Yeni Ekran / Karmaşık Akış / SDK Major -> (10.0 Puan)
-5 = Mimari Değişiklik / Refactoring / Yeni Entegrasyon -> (12.5 Puan)
+---
 
-E. Test & İş Birimi Etkisi (Katsayı: 1.0)
-1 = Sadece IT -> (1 Puan)
-3 = 2-3 Birim -> (3 Puan)
-5 = Tüm Banka -> (5 Puan)
+Talep bilgileri kullanıcı mesajında "Talep Bilgileri" başlığıyla verilir.
 
-🧮 TOPLAM SKOR FORMÜLÜ:
-(A*0.5) + (B*1.5) + (C*1.0) + (D*2.5) + (E*1.0) = ?
+📝 ÇIKTI
+score_complexity fonksiyonunu Talep_Tipi, Analiz_Notu (en fazla 150 karakter), A-E puanları ve Teknik_Risk ile çağır.
+"""
 
----
+SIZING_REQUEST_PROMPT = """Talep Bilgileri:
+{{idea}}
 
-🛡️ BÖLÜM 4: VETO VE GÜVENLİK KURALLARI (Override)
+Yukarıdaki kurallara göre talebi değerlendir ve score_complexity fonksiyonunu çağır."""
 
-Hesaplanan skora bakmaksızın aşağıdaki durumları kontrol et:
 
-1. TEKNİK RİSK KURALI:
-   Eğer iş "SDK Upgrade", "Framework Geçişi" veya "Refactoring" ise -> Minimum Size: M.
-   (Sebep: Kod az olsa bile test ve risk büyüktür.)
+HISTORY_SUMMARY_PROMPT = """
+Bir analist asistan ile kullanıcı arasında geçen fikir formu toplama konuşmasını özetliyorsun.
 
-2. BÜYÜK İŞ KURALI (L KİLİDİ):
-   Eğer (Etkilenen Sistem >= 3) VE (Geliştirme Derinliği >= 4) ise -> Direkt Size: L.
+- Önceki özet ve yeni mesajları tek bir güncel özette birleştir.
+- Kullanıcının verdiği bilgileri ilgili form alanlarıyla (problem, mevcut_durum, fikrin_ozeti, amac,
+  fikrin_aciklamasi, cozum_tipi, kanallar, hedef_kitle, kpi) eşleştirerek koru.
+- Hangi alanların henüz sorulmadığını veya netleştirilmesi gerektiğini belirt.
+- Yorum ekleme, yeni bilgi uydurma.
+- En fazla 150 kelime yaz, sadece özet metnini döndür.
+"""
 
-3. XS KORUMASI:
-   Eğer (Geliştirme Derinliği > 1) ise -> ASLA XS verme (Minimum S).
-   (Sebep: UI dışındaki her şeyin testi vardır.)
 
----
+ANALYST_SYSTEM = "analyst_system"
+SIZING_SYSTEM = "sizing_system"
+SIZING_REQUEST = "sizing_request"
+HISTORY_SUMMARY = "history_summary"
 
-👕 BÖLÜM 5: BEDEN TABLOSU (GÜNCELLENMİŞ ARALIKLAR)
+BUILTIN_PROMPTS: dict[str, str] = {
+    ANALYST_SYSTEM: ANALYST_SYSTEM_PROMPT,
+    SIZING_SYSTEM: SIZING_SYSTEM_PROMPT,
+    SIZING_REQUEST: SIZING_REQUEST_PROMPT,
+    HISTORY_SUMMARY: HISTORY_SUMMARY_PROMPT,
+}
 
-Veto kuralları devreye girmediyse, hesaplanan "Toplam Skor"a göre karar ver:
 
-6.5 - 11.0 Puan  👉 XS (Çok Basit - Sadece UI/Metin)
-11.5 - 18.0 Puan 👉 S  (Standart - Küçük eklemeler)
-18.5 - 26.0 Puan 👉 M  (Orta - Yeni özellik/API/SDK)
-26.5 - 32.5 Puan 👉 L  (Büyük - Proje/Entegrasyon)
+@dataclass(frozen=True)
+class PromptVersion:
+    """
+    One registered version of a prompt.
 
----
+    Extension points:
+    - Add author and change notes for prompt review.
+    """
 
-Talep Bilgileri :
-{{idea}}
+    prompt_id: str
+    version: str
+    source: str
+    origin: str
 
-📝 ÇIKTI FORMATI (JSON veya TEXT)
-MAKSİMUM 1000 KARAKTER.
-{
-  "Talep_Tipi": "Development" veya "Development Değil",
-  "T_Shirt_Size": "XS" / "S" / "M" / "L",
-  "Analiz_Notu": "Kısa değerlendirme notu"
-}
 
-# user:
-Talep Bilgileri:
-{{idea}}
+class PromptRegistry:
+    """
+    Versioned prompt store with compiled templates and render memoization.
 
-Yukarıdaki kurallara göre talebi değerlendir ve score_complexity fonksiyonunu çağır.
-"""
+    Prompts are addressed as ``"<id>"`` (current version) or
+    ``"<id>@<version>"`` (pinned). Registering a new version makes it
+    current; older versions stay addressable.
 
+    Extension points:
+    - Add per-tenant prompt overlays.
+    - Validate required context variables at registration time.
+    """
 
-def render_prompt(template: str, context: dict[str, Any]) -> str:
+    def __init__(self, prompt_dir: str | None = None, render_cache_size: int = 256) -> None:
+        """
+        Initialize the registry with built-ins, then load ``prompt_dir``.
+
+        Extension points:
+        - Watch the directory and reload on change.
+        """
+
+        self._prompt_dir = Path(prompt_dir) if prompt_dir else None
+        self._versions: dict[str, dict[str, PromptVersion]] = {}
+        self._current: dict[str, str] = {}
+        self._file_mtimes: dict[Path, float] = {}
+        self._rendered: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._render_cache_size = render_cache_size
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        for prompt_id, source in BUILTIN_PROMPTS.items():
+            self.register(prompt_id, source, version="builtin", origin="builtin")
+        self.reload()
+
+    def register(
+        self,
+        prompt_id: str,
+        source: str,
+        version: str | None = None,
+        origin: str = "runtime",
+    ) -> PromptVersion:
+        """
+        Register a prompt version and make it current.
+
+        Without an explicit version, a short content hash is used, so
+        re-registering identical text is a no-op. Re-registering an explicit
+        version with different text replaces it and drops its memoized
+        render.
+
+        Extension points:
+        - Reject templates that fail to compile.
+        """
+
+        version = version or hashlib.sha256(source.encode("utf-8")).hexdigest()[:12]
+        prompt = PromptVersion(prompt_id=prompt_id, version=version, source=source, origin=origin)
+        _compile(source)
+        with self._lock:
+            versions = self._versions.setdefault(prompt_id, {})
+            previous = versions.get(version)
+            if previous is not None and previous.source != source:
+                self._rendered.pop((prompt_id, version), None)
+            versions[version] = prompt
+            self._current[prompt_id] = version
+        return prompt
+
+    def get(self, prompt_ref: str) -> PromptVersion:
+        """
+        Return the prompt version for ``"<id>"`` or ``"<id>@<version>"``.
+
+        Extension points:
+        - Add fallbacks to the built-in version on lookup errors.
+        """
+
+        prompt_id, _, version = prompt_ref.partition("@")
+        with self._lock:
+            versions = self._versions.get(prompt_id)
+            if versions is None:
+                raise KeyError(f"Unknown prompt: {prompt_id}")
+            version = version or self._current[prompt_id]
+            if version not in versions:
+                raise KeyError(f"Unknown prompt version: {prompt_ref}")
+            return versions[version]
+
+    def render(self, prompt_ref: str, context: dict[str, Any] | None = None) -> str:
+        """
+        Render a registered prompt; context-free renders are memoized.
+
+        Only renders without a context are memoized, per prompt version:
+        those are the constant system prompts. Renders with a context carry
+        per-request data (e.g. the idea JSON), would not repeat, and are
+        rendered from the compiled template directly.
+
+        Extension points:
+        - Memoize contexts that callers mark as constant.
+        """
+
+        prompt = self.get(prompt_ref)
+        if context:
+            return render_prompt(prompt.source, context)
+
+        key = (prompt.prompt_id, prompt.version)
+        with self._lock:
+            rendered = self._rendered.get(key)
+            if rendered is not None:
+                self._rendered.move_to_end(key)
+                self._hits += 1
+                return rendered
+            self._misses += 1
+        rendered = render_prompt(prompt.source, {})
+        with self._lock:
+            self._rendered[key] = rendered
+            while len(self._rendered) > self._render_cache_size:
+                self._rendered.popitem(last=False)
+        return rendered
+
+    def reload(self) -> list[str]:
+        """
+        Re-read changed ``*.j2`` files from the prompt directory.
+
+        ``<id>.j2`` registers a content-hashed version of ``<id>``;
+        ``<id>@<version>.j2`` registers an explicit version. Returns the
+        IDs whose current version or its text changed. Concurrent reloads
+        run one at a time.
+
+        Extension points:
+        - Remove versions whose files were deleted.
+        """
+
+        if self._prompt_dir is None or not self._prompt_dir.is_dir():
+            return []
+        changed: list[str] = []
+        with self._reload_lock:
+            for path in sorted(self._prompt_dir.glob("*.j2")):
+                mtime = path.stat().st_mtime
+                prompt_id, _, version = path.stem.partition("@")
+                with self._lock:
+                    if self._file_mtimes.get(path) == mtime:
+                        continue
+                    version_id = self._current.get(prompt_id)
+                    before = self._versions[prompt_id][version_id] if version_id else None
+                prompt = self.register(
+                    prompt_id,
+                    path.read_text(encoding="utf-8"),
+                    version=version or None,
+                    origin=str(path),
+                )
+                with self._lock:
+                    self._file_mtimes[path] = mtime
+                if before is None or (prompt.version, prompt.source) != (
+                    before.version,
+                    before.source,
+                ):
+                    changed.append(prompt_id)
+        return changed
+
+    def list_prompts(self) -> list[PromptVersion]:
+        """
+        Return the current version of every registered prompt.
+
+        Extension points:
+        - Include all versions for audit views.
+        """
+
+        with self._lock:
+            return [self._versions[pid][version] for pid, version in sorted(self._current.items())]
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return render memoization counters.
+
+        Extension points:
+        - Break down hits per prompt ID.
+        """
+
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._rendered),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
+
+
+def render_prompt(template: str, context: dict[str, Any], sandboxed: bool = False) -> str:
     """
     Render a prompt template using the provided context.
 
+    Templates are compiled once per distinct source in a shared
+    ``Environment`` and reused across calls. Pass ``sandboxed=True`` for
+    templates that arrive in requests (dynamic flow node configs): they are
+    rendered in an ``ImmutableSandboxedEnvironment``, which blocks attribute
+    access to internals and mutating calls, and raises
+    ``jinja2.exceptions.SecurityError`` on attempts.
+
     Extension points:
-    - Replace this with a fully featured templating engine.
     - Add strict validation for required context keys.
     """
 
+    compiled = _compile(template, sandboxed)
+    if compiled is None:
+        return _render_prompt_fallback(template, context)
+    return compiled.render(**context)
+
+
+@lru_cache(maxsize=256)
+def _compile(template: str, sandboxed: bool = False) -> Any:
+    environment = _environment(sandboxed)
+    if environment is None:
+        return None
+    return environment.from_string(template)
+
+
+@lru_cache(maxsize=2)
+def _environment(sandboxed: bool = False) -> Any:
     try:
-        from jinja2 import Template
+        from jinja2 import Environment
+        from jinja2.sandbox import ImmutableSandboxedEnvironment
     except ModuleNotFoundError:
         # TODO: Add jinja2 as a dependency for full template rendering.
-        return _render_prompt_fallback(template, context)
-    return Template(template).render(**context)
+        return None
+    if sandboxed:
+        return ImmutableSandboxedEnvironment(autoescape=False, keep_trailing_newline=True)
+    return Environment(autoescape=False, keep_trailing_newline=True)
 
 
 def _render_prompt_fallback(template: str, context: dict[str, Any]) -> str:
@@ -6,12 +6,35 @@ Extension points:
 - Add observability hooks and execution telemetry.
 """
 
+import asyncio
+import threading
+from collections.abc import AsyncIterator
+from typing import Any
+
+from langchain_core.messages import AIMessageChunk
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from app.core.admission import AdmissionController
 from app.core.config import Settings
+from app.core.metrics import FLOWS_IN_FLIGHT, NodeMetricsHandler
+from app.core.tracing import FlowTraceCollector, trace_scope
+from app.core.usage import UsageLedger, usage_scope
 from app.functions.registry import FunctionRegistry
 from app.llm_provider.factory import LLMFactory
 from app.llm_provider.models import LLMProviderConfig
-from app.models.flow import FlowRunRequest, FlowRunResponse
+from app.models.flow import (
+    DuplicateIdea,
+    FlowBatchItemResult,
+    FlowBatchRequest,
+    FlowRunRequest,
+    FlowRunResponse,
+)
+from app.models.sizing import SizingBreakdown
+from app.orchestration.dynamic import GraphCache, build_dynamic_graph, graph_cache_key
 from app.orchestration.graph import build_flow_graph, build_initial_state
+from app.orchestration.memory import HistoryCompactor
+from app.orchestration.prompts import PromptRegistry
+from app.orchestration.similarity import IdeaIndex
 from app.rag.service import RAGService
 from app.scripts.executor import ScriptExecutor
 
@@ -32,6 +55,10 @@ class OrchestrationService:
         script_executor: ScriptExecutor,
         rag_service: RAGService,
         settings: Settings,
+        checkpointer: BaseCheckpointSaver | None = None,
+        prompt_registry: PromptRegistry | None = None,
+        usage_ledger: UsageLedger | None = None,
+        admission: AdmissionController | None = None,
     ) -> None:
         """
         Initialize the service with dependencies.
@@ -45,7 +72,14 @@ class OrchestrationService:
         self._script_executor = script_executor
         self._rag_service = rag_service
         self._settings = settings
+        self._checkpointer = checkpointer
+        self._prompt_registry = prompt_registry or PromptRegistry()
+        self._usage_ledger = usage_ledger
+        self._admission = admission
+        self._node_metrics = NodeMetricsHandler()
         self._graph = None
+        self._graph_lock = threading.Lock()
+        self._graph_cache = GraphCache(max_size=settings.graph_cache_size)
 
     def run_flow(self, request: FlowRunRequest) -> FlowRunResponse:
         """
@@ -55,21 +89,361 @@ class OrchestrationService:
         - Add per-node overrides and runtime configuration merging.
         """
 
-        graph = self._get_graph()
-        initial_state = build_initial_state(request.input)
-        result_state = graph.invoke(initial_state)
+        graph = self._resolve_graph(request)
+        collector = FlowTraceCollector() if request.include_trace else None
+        run_config = self._build_run_config(request, collector)
+        initial_state = self._build_state(request, self._is_resume(request))
+        usage = self._usage_scope(request)
+        in_flight = FLOWS_IN_FLIGHT.labels("sync")
+        in_flight.inc()
+        try:
+            with trace_scope(collector), usage:
+                result_state = graph.invoke(
+                    initial_state, run_config, durability=_durability(graph)
+                )
+        finally:
+            in_flight.dec()
+        return self._build_response(result_state, run_config, collector)
+
+    async def arun_flow(self, request: FlowRunRequest) -> FlowRunResponse:
+        """
+        Execute a flow run request without blocking the event loop.
+
+        Extension points:
+        - Add cancellation or deadline propagation for long runs.
+        """
+
+        graph = self._resolve_graph(request)
+        collector = FlowTraceCollector() if request.include_trace else None
+        run_config = self._build_run_config(request, collector)
+        initial_state = self._build_state(request, await self._ais_resume(request))
+        usage = self._usage_scope(request)
+        in_flight = FLOWS_IN_FLIGHT.labels("async")
+        in_flight.inc()
+        try:
+            with trace_scope(collector), usage:
+                result_state = await graph.ainvoke(
+                    initial_state, run_config, durability=_durability(graph)
+                )
+        finally:
+            in_flight.dec()
+        return self._build_response(result_state, run_config, collector)
+
+    def check_run(self, request: FlowRunRequest) -> None:
+        """
+        Validate a run before any output is produced.
+
+        Compiles (or fetches) the flow graph and checks the tenant's token
+        budget, raising ``FlowDefinitionError`` or ``QuotaExceededError``.
+        Streaming routes call this before sending response headers, so these
+        errors keep their HTTP status instead of becoming an in-stream event.
+
+        Extension points:
+        - Validate ``input`` against per-flow schemas.
+        """
+
+        self._resolve_graph(request)
+        if self._usage_ledger is not None:
+            self._usage_ledger.check_budget(request.tenant_id)
+
+    async def astream_flow(self, request: FlowRunRequest) -> AsyncIterator[dict[str, Any]]:
+        """
+        Execute a flow run and yield LLM tokens followed by a final event.
+
+        Tokens come from the analyst node, or from every ``llm`` node of a
+        dynamic flow.
+
+        Token events carry ``{"content": ...}``; the closing ``final`` event
+        carries the same fields as ``FlowRunResponse``.
+
+        Extension points:
+        - Stream node progress or tool-call events to the client.
+        """
+
+        graph = self._resolve_graph(request)
+        collector = FlowTraceCollector() if request.include_trace else None
+        run_config = self._build_run_config(request, collector)
+        initial_state = self._build_state(request, await self._ais_resume(request))
+        stream_nodes = self._stream_nodes(request)
+        result_state: dict[str, Any] = {}
+        usage = self._usage_scope(request)
+        in_flight = FLOWS_IN_FLIGHT.labels("stream")
+        in_flight.inc()
+        try:
+            with trace_scope(collector), usage:
+                async for mode, chunk in graph.astream(
+                    initial_state,
+                    run_config,
+                    stream_mode=["messages", "values"],
+                    durability=_durability(graph),
+                ):
+                    if mode == "values":
+                        result_state = chunk
+                        continue
+                    message, metadata = chunk
+                    if not isinstance(message, AIMessageChunk):
+                        continue
+                    if metadata.get("langgraph_node") not in stream_nodes:
+                        continue
+                    content = message.content if isinstance(message.content, str) else ""
+                    if content:
+                        yield {"event": "token", "data": {"content": content}}
+        finally:
+            in_flight.dec()
+        response = self._build_response(result_state, run_config, collector)
+        yield {"event": "final", "data": response.model_dump()}
+
+    async def astream_batch(self, request: FlowBatchRequest) -> AsyncIterator[FlowBatchItemResult]:
+        """
+        Run batch items concurrently and yield results in completion order.
+
+        At most ``concurrency`` items run at once (capped by settings), and
+        each item also takes an admission slot, so batches share the flow
+        concurrency limit with single runs. A failing or rejected item
+        yields an error result without affecting the others.
+        Pending items are cancelled if the consumer stops iterating.
+
+        Extension points:
+        - Add per-item deadlines or retry policies.
+        """
+
+        concurrency = min(
+            request.concurrency or self._settings.flow_batch_concurrency,
+            self._settings.flow_batch_max_concurrency,
+        )
+        pending: asyncio.Queue[int] = asyncio.Queue()
+        for index in range(len(request.items)):
+            pending.put_nowait(index)
+        results: asyncio.Queue[FlowBatchItemResult] = asyncio.Queue()
+
+        async def worker() -> None:
+            while True:
+                try:
+                    index = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    if self._admission is None:
+                        response = await self.arun_flow(request.items[index])
+                    else:
+                        async with self._admission.slot():
+                            response = await self.arun_flow(request.items[index])
+                    result = FlowBatchItemResult(index=index, ok=True, response=response)
+                except Exception as exc:
+                    result = FlowBatchItemResult(
+                        index=index,
+                        ok=False,
+                        error=f"{type(exc).__name__}: {exc}",
+                    )
+                await results.put(result)
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(concurrency, len(request.items)))
+        ]
+        try:
+            for _ in range(len(request.items)):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def warm_up(self) -> None:
+        """
+        Compile the default graph and bind its tools ahead of the first run.
+
+        Extension points:
+        - Pre-compile frequently used dynamic flows.
+        """
+
+        self._get_graph()
+
+    async def aopen_llm_connection(self) -> None:
+        """
+        Pre-open a pooled connection to the default LLM provider.
+
+        Extension points:
+        - Open connections for per-node model overrides as well.
+        """
+
+        await self._llm_factory.aopen_connection(self._build_default_llm_config())
+
+    async def awarm_llm_completion(self) -> None:
+        """
+        Send a tiny completion to the default LLM provider.
+
+        Extension points:
+        - Warm provider-side prompt caches with the real system prompt.
+        """
+
+        await self._llm_factory.awarm_completion(self._build_default_llm_config())
+
+    def graph_cache_stats(self) -> dict[str, Any]:
+        """
+        Return statistics of the compiled dynamic-graph cache.
+
+        Extension points:
+        - Add the default graph's build time.
+        """
+
+        return self._graph_cache.stats()
+
+    def _resolve_graph(self, request: FlowRunRequest):
+        """
+        Return the default flow, or the compiled graph for ``request.nodes``.
+
+        Requests without a ``thread_id`` get a copy without the
+        checkpointer, so stateless callers (batch items, integrations that
+        send ``chat_history``) leave no checkpoints behind.
+
+        Extension points:
+        - Resolve named flows from a flow registry.
+        """
+
+        if not request.nodes:
+            graph = self._get_graph()
+        else:
+            graph = self._graph_cache.get_or_build(
+                graph_cache_key(request.nodes),
+                lambda: build_dynamic_graph(
+                    nodes=request.nodes,
+                    llm_factory=self._llm_factory,
+                    function_registry=self._function_registry,
+                    script_executor=self._script_executor,
+                    rag_service=self._rag_service,
+                    config=self._build_default_llm_config(),
+                    checkpointer=self._checkpointer,
+                ),
+            )
+        if self._checkpointer is not None and request.thread_id is None:
+            # Nobody can resume a thread the client did not name; do not
+            # write a checkpoint for it. The copy is shallow and cheap.
+            return graph.copy(update={"checkpointer": None})
+        return graph
+
+    def _build_state(self, request: FlowRunRequest, resume: bool) -> dict[str, Any]:
+        """
+        Build the initial state for the default or dynamic flow.
+
+        ``resume`` is set when the thread already has a checkpoint.
+
+        Extension points:
+        - Validate input against per-flow schemas.
+        """
+
+        state = build_initial_state(request.input, resume=resume)
+        if not request.nodes:
+            return state
+        return {
+            "messages": state["messages"],
+            "input": request.input,
+            "outputs": {},
+            "final_answer": None,
+        }
+
+    def _stream_nodes(self, request: FlowRunRequest) -> set[str]:
+        if not request.nodes:
+            return {"analyst_llm"}
+        return {node.node_id for node in request.nodes if node.type == "llm"}
+
+    def _is_resume(self, request: FlowRunRequest) -> bool:
+        """
+        Return whether the request continues a checkpointed thread.
+
+        A named thread without a checkpoint is new, so its ``chat_history``
+        seeds it.
+
+        Extension points:
+        - Validate that the thread belongs to the calling tenant.
+        """
+
+        if self._checkpointer is None or request.thread_id is None:
+            return False
+        config = {"configurable": {"thread_id": request.thread_id}}
+        return self._checkpointer.get_tuple(config) is not None
+
+    async def _ais_resume(self, request: FlowRunRequest) -> bool:
+        """
+        Async variant of ``_is_resume`` using the saver's async lookup.
+
+        Extension points:
+        - Reuse the loaded checkpoint for the run instead of reading it twice.
+        """
+
+        if self._checkpointer is None or request.thread_id is None:
+            return False
+        config = {"configurable": {"thread_id": request.thread_id}}
+        return await self._checkpointer.aget_tuple(config) is not None
+
+    def _build_run_config(
+        self,
+        request: FlowRunRequest,
+        collector: FlowTraceCollector | None = None,
+    ) -> dict[str, Any]:
+        """
+        Build the LangGraph run config keyed by the conversation thread.
+
+        Extension points:
+        - Add tenant-scoped checkpoint namespaces.
+        """
+
+        configurable = {"thread_id": request.thread_id} if request.thread_id else {}
+        callbacks: list[Any] = [self._node_metrics]
+        if collector is not None:
+            callbacks.append(collector)
+        return {"configurable": configurable, "callbacks": callbacks}
+
+    def _usage_scope(self, request: FlowRunRequest):
+        """
+        Check the tenant's token budget and return the usage scope for a run.
+
+        Raises ``QuotaExceededError`` before any node runs when the budget
+        is already spent; calls made during the run are checked again by
+        the factory's usage callback.
+
+        Extension points:
+        - Derive the tenant from authentication instead of the request body.
+        """
+
+        if self._usage_ledger is not None:
+            self._usage_ledger.check_budget(request.tenant_id)
+        return usage_scope(request.tenant_id)
+
+    def _build_response(
+        self,
+        result_state: dict[str, Any],
+        run_config: dict[str, Any],
+        collector: FlowTraceCollector | None = None,
+    ) -> FlowRunResponse:
+        """
+        Map the final graph state onto the API response model.
+
+        Extension points:
+        - Add derived fields or response post-processing.
+        """
 
         answer = result_state.get("final_answer") or ""
         complexity = result_state.get("complexity")
         is_done = bool(result_state.get("form_submitted"))
         args = result_state.get("idea_form")
+        sizing = result_state.get("sizing")
+        duplicate_of = result_state.get("duplicate_of")
 
         return FlowRunResponse(
             answer=answer,
             complexity=complexity,
             isDone=is_done,
             args=args,
-            trace=[],
+            sizing=SizingBreakdown(**sizing) if sizing else None,
+            duplicate_of=DuplicateIdea(**duplicate_of) if duplicate_of else None,
+            outputs=result_state.get("outputs"),
+            trace=collector.steps() if collector is not None else [],
+            thread_id=(
+                run_config["configurable"].get("thread_id")
+                if self._checkpointer is not None
+                else None
+            ),
         )
 
     def _build_default_llm_config(self) -> LLMProviderConfig:
@@ -92,6 +466,7 @@ class OrchestrationService:
                 azure_api_version=self._settings.azure_api_version,
                 azure_deployment_name=self._settings.azure_deployment_name,
                 max_tokens=self._settings.llm_max_tokens,
+                temperature=self._settings.llm_temperature,
             )
         if provider == "local":
             return LLMProviderConfig(
@@ -100,6 +475,7 @@ class OrchestrationService:
                 base_url=self._settings.local_base_url,
                 api_key=self._settings.local_api_key,
                 max_tokens=self._settings.llm_max_tokens,
+                temperature=self._settings.llm_temperature,
             )
         return LLMProviderConfig(
             provider="openai",
@@ -107,21 +483,53 @@ class OrchestrationService:
             base_url=self._settings.openai_base_url,
             api_key=self._settings.openai_api_key or "",
             max_tokens=self._settings.llm_max_tokens,
+            temperature=self._settings.llm_temperature,
         )
 
     def _get_graph(self):
         """
         Build or return the cached LangGraph flow.
 
+        Construction is guarded by a lock so concurrent first requests
+        compile the graph only once.
+
         Extension points:
         - Rebuild graph based on tenant-specific settings.
         """
 
-        if self._graph is None:
-            config = self._build_default_llm_config()
-            self._graph = build_flow_graph(
-                llm_factory=self._llm_factory,
-                function_registry=self._function_registry,
-                config=config,
-            )
-        return self._graph
+        if self._graph is not None:
+            return self._graph
+        with self._graph_lock:
+            if self._graph is None:
+                config = self._build_default_llm_config()
+                history_compactor = HistoryCompactor(
+                    summarizer_llm=self._llm_factory.build_chat_model(config),
+                    token_budget=self._settings.history_token_budget,
+                    keep_turns=self._settings.history_keep_turns,
+                    cache_size=self._settings.history_summary_cache_size,
+                    prompts=self._prompt_registry,
+                )
+                idea_index = (
+                    IdeaIndex(
+                        threshold=self._settings.idea_dedup_threshold,
+                        max_entries=self._settings.idea_dedup_max_entries,
+                    )
+                    if self._settings.idea_dedup_enabled
+                    else None
+                )
+                self._graph = build_flow_graph(
+                    llm_factory=self._llm_factory,
+                    function_registry=self._function_registry,
+                    config=config,
+                    checkpointer=self._checkpointer,
+                    history_compactor=history_compactor,
+                    idea_index=idea_index,
+                    prompts=self._prompt_registry,
+                )
+            return self._graph
+
+
+def _durability(graph: Any) -> str | None:
+    # Checkpoint once per run; LangGraph warns when durability is set on a
+    # graph that has no checkpointer (stateless runs).
+    return "exit" if graph.checkpointer is not None else None
@@ -0,0 +1,251 @@
+"""
+Near-duplicate detection for submitted idea forms.
+
+Idea texts are normalized (Turkish-aware casefolding and diacritic folding),
+split into character shingles, and summarized as MinHash signatures. An LSH
+band index narrows the candidates, so lookups stay cheap as the index grows.
+Ideas only match within the tenant that sized them, and a match exposes an
+opaque identifier and the reusable sizing, never the other submitter's text.
+
+Extension points:
+- Persist the index in a shared store for multi-instance deployments.
+- Replace MinHash with embedding vectors for semantic matches.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+
+# Text fields of SubmitIdeaFormPayload that describe the idea itself.
+IDEA_TEXT_FIELDS = (
+    "fikrin_ozeti",
+    "fikrin_aciklamasi",
+    "amac",
+    "problem",
+    "cozum_tipi",
+    "kanallar",
+    "mevcut_durum",
+    "hedef_kitle",
+    "kpi",
+)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_TURKISH_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+_TURKISH_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+@dataclass(frozen=True)
+class IdeaMatch:
+    """
+    A previously sized idea that is similar to the submitted one.
+
+    Extension points:
+    - Add the thread or user that submitted the original idea.
+    """
+
+    idea_id: str
+    similarity: float
+    complexity: str | None
+    analysis_note: str | None
+    sizing: dict[str, Any] | None
+
+
+@dataclass
+class _IdeaEntry:
+    tenant_id: str
+    signature: tuple[int, ...]
+    complexity: str | None
+    analysis_note: str | None
+    sizing: dict[str, Any] | None
+
+
+class IdeaIndex:
+    """
+    In-memory MinHash/LSH index of sized idea forms.
+
+    Extension points:
+    - Weight fields differently (e.g. problem over target audience).
+    - Expire entries when sizing rules change.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+        max_entries: int = 10_000,
+    ) -> None:
+        """
+        Initialize the index with the match threshold and MinHash layout.
+
+        Extension points:
+        - Derive the band count from the threshold automatically.
+        """
+
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self._threshold = threshold
+        self._bands = bands
+        self._rows = num_perm // bands
+        self._shingle_size = shingle_size
+        self._max_entries = max_entries
+        seed = hashlib.sha256(b"opexai-idea-index").digest()
+        coefficients = [
+            int.from_bytes(hashlib.sha256(seed + index.to_bytes(4, "big")).digest()[:16], "big")
+            for index in range(num_perm)
+        ]
+        self._permutations = [
+            (coefficient % (_MERSENNE_PRIME - 1) + 1, (coefficient >> 64) % _MERSENNE_PRIME)
+            for coefficient in coefficients
+        ]
+        self._entries: OrderedDict[str, _IdeaEntry] = OrderedDict()
+        self._buckets: dict[tuple[str, int, tuple[int, ...]], set[str]] = {}
+        self._lock = threading.Lock()
+
+    def match(self, idea_form: dict[str, Any], tenant_id: str) -> IdeaMatch | None:
+        """
+        Return the tenant's most similar sized idea above the threshold, if any.
+
+        Extension points:
+        - Return the top-k candidates for reviewer suggestions.
+        """
+
+        signature = self.signature(idea_form)
+        if not signature:
+            return None
+        best_id: str | None = None
+        best_similarity = 0.0
+        with self._lock:
+            candidates: set[str] = set()
+            for key in self._band_keys(tenant_id, signature):
+                candidates.update(self._buckets.get(key, ()))
+            for idea_id in candidates:
+                similarity = _estimate_jaccard(signature, self._entries[idea_id].signature)
+                if similarity > best_similarity:
+                    best_id, best_similarity = idea_id, similarity
+            if best_id is None or best_similarity < self._threshold:
+                return None
+            entry = self._entries[best_id]
+            self._entries.move_to_end(best_id)
+        return IdeaMatch(
+            idea_id=best_id,
+            similarity=round(best_similarity, 4),
+            complexity=entry.complexity,
+            analysis_note=entry.analysis_note,
+            sizing=entry.sizing,
+        )
+
+    def add(
+        self,
+        idea_form: dict[str, Any],
+        tenant_id: str,
+        complexity: str | None,
+        analysis_note: str | None,
+        sizing: dict[str, Any] | None,
+    ) -> str | None:
+        """
+        Index a tenant's sized idea and return its identifier.
+
+        Extension points:
+        - Merge near-identical entries instead of storing both.
+        """
+
+        signature = self.signature(idea_form)
+        if not signature:
+            return None
+        idea_id = uuid.uuid4().hex
+        with self._lock:
+            self._entries[idea_id] = _IdeaEntry(
+                tenant_id=tenant_id,
+                signature=signature,
+                complexity=complexity,
+                analysis_note=analysis_note,
+                sizing=sizing,
+            )
+            for key in self._band_keys(tenant_id, signature):
+                self._buckets.setdefault(key, set()).add(idea_id)
+            while len(self._entries) > self._max_entries:
+                self._evict_oldest()
+        return idea_id
+
+    def signature(self, idea_form: dict[str, Any]) -> tuple[int, ...]:
+        """
+        Compute the MinHash signature of an idea form.
+
+        Extension points:
+        - Add word-level shingles for very short forms.
+        """
+
+        text = normalize_turkish(_idea_text(idea_form))
+        if not text:
+            return ()
+        size = self._shingle_size
+        shingles = {text[index : index + size] for index in range(max(len(text) - size + 1, 1))}
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+            for shingle in shingles
+        ]
+        return tuple(
+            min((a * value + b) % _MERSENNE_PRIME for value in hashes)
+            for a, b in self._permutations
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_keys(
+        self,
+        tenant_id: str,
+        signature: tuple[int, ...],
+    ) -> list[tuple[str, int, tuple[int, ...]]]:
+        rows = self._rows
+        return [
+            (tenant_id, band, signature[band * rows : (band + 1) * rows])
+            for band in range(self._bands)
+        ]
+
+    def _evict_oldest(self) -> None:
+        idea_id, entry = self._entries.popitem(last=False)
+        for key in self._band_keys(entry.tenant_id, entry.signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            bucket.discard(idea_id)
+            if not bucket:
+                del self._buckets[key]
+
+
+def normalize_turkish(text: str) -> str:
+    """
+    Casefold Turkish text and fold diacritics so spelling variants match.
+
+    Extension points:
+    - Add stemming for common Turkish suffixes.
+    """
+
+    lowered = text.translate(_TURKISH_UPPER).lower().translate(_TURKISH_FOLD)
+    return _NON_WORD.sub(" ", lowered).strip()
+
+
+def _idea_text(idea_form: dict[str, Any]) -> str:
+    parts: list[str] = []
+    for name in IDEA_TEXT_FIELDS:
+        value = idea_form.get(name)
+        if isinstance(value, list):
+            parts.extend(sorted(str(item) for item in value))
+        elif value:
+            parts.append(str(value))
+    return " ".join(parts)
+
+
+def _estimate_jaccard(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
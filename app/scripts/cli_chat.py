@@ -2,7 +2,7 @@
 Interactive CLI client for the orchestration flow API.
 
 Extension points:
-- Add persistent session storage for chat history.
+- Persist the thread_id to resume sessions across restarts.
 - Add authentication headers or request signing.
 - Add streaming output support if the API supports it.
 
@@ -15,6 +15,7 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import uuid
 from typing import Any
 from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
@@ -23,7 +24,11 @@ from urllib.request import Request, urlopen
 DEFAULT_BASE_URL = os.getenv("LLM_ORCH_API_URL", "http://127.0.0.1:8000")
 
 
-def build_payload(question: str, history: list[dict[str, Any]]) -> dict[str, Any]:
+def build_payload(
+    question: str,
+    history: list[dict[str, Any]],
+    thread_id: str | None = None,
+) -> dict[str, Any]:
     """
     Build the request payload for the /flow/run endpoint.
 
@@ -38,6 +43,7 @@ def build_payload(question: str, history: list[dict[str, Any]]) -> dict[str, Any
             "question": question,
             "chat_history": history,
         },
+        "thread_id": thread_id,
     }
 
 
@@ -118,6 +124,8 @@ def run_chat(base_url: str) -> None:
 
     print("LLM Orchestration CLI - type 'exit' to quit.")
     history: list[dict[str, Any]] = []
+    # The server only checkpoints threads the client names.
+    thread_id: str | None = str(uuid.uuid4())
 
     while True:
         question = input("> ").strip()
@@ -127,11 +135,14 @@ def run_chat(base_url: str) -> None:
             print("Görüşmek üzere.")
             break
 
-        payload = build_payload(question, history)
+        payload = build_payload(question, history, thread_id)
         response = call_flow(base_url, payload)
         answer = extract_output(response)
         print(answer)
-        append_history(history, question, answer)
+        # The server keeps the transcript when it returns a thread_id.
+        thread_id = response.get("thread_id")
+        if thread_id is None:
+            append_history(history, question, answer)
 
 
 def parse_args() -> argparse.Namespace:
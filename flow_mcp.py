@@ -9,18 +9,38 @@ fastmcp tabanlı tek dosya:
 
 from __future__ import annotations
 
+import atexit
 import json
 import os
 import uuid
 from typing import List, Dict, Any, Optional
 
-import requests
 from fastmcp import FastMCP
 
+from app.core.config import Settings
+from app.core.metrics import record_openai_usage
+from app.core.usage import build_usage_ledger, usage_scope
+from app.llm_provider.cache import build_response_cache
+from app.llm_provider.clients import build_http_clients
+
 
 LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:8000/v1")
 LLM_API_KEY = os.getenv("LLM_API_KEY", "dummy")
 LLM_MODEL = os.getenv("LLM_MODEL", "llama3")
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "local")
+
+_SETTINGS = Settings()
+
+# LLMFactory ile aynı HTTP yığını: LLM_ORCH_LLM_HTTP_* havuz/zaman aşımı ayarları,
+# replika dengeleme, hedge ve temperature=0 yanıt önbelleği (aynı anahtarlar;
+# sqlite backend süreçler arası paylaşılır).
+_HTTP_CLIENTS = build_http_clients(_SETTINGS, response_cache=build_response_cache(_SETTINGS))
+
+# API ile aynı token defteri (LLM_ORCH_USAGE_*): tenant/thread/model bazında
+# birikir, tenant bütçesi her LLM çağrısından önce kontrol edilir.
+_USAGE = build_usage_ledger(_SETTINGS)
+if _USAGE is not None:
+    atexit.register(_USAGE.close)
 
 # ============================================================
 # STEP-BASED ANALYST (kısa prompt + memory cache)
@@ -178,6 +198,33 @@ def _parse_json_from_llm(text: str) -> Dict[str, Any]:
         return {}
 
 
+def _post_chat_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    chat/completions POST'u; paylaşılan havuzlu istemciyle gönderilir,
+    deterministik istekler önbellekten karşılanır.
+    """
+    url = LLM_BASE_URL.rstrip("/") + "/chat/completions"
+    headers = {
+        "Content-Type": "application/json; charset=utf-8",
+        "Authorization": f"Bearer {LLM_API_KEY}",
+    }
+
+    if _USAGE is not None:
+        _USAGE.check_budget()
+
+    resp = _HTTP_CLIENTS.client.post(url, headers=headers, json=body)
+    resp.raise_for_status()
+    data = resp.json()
+    # Önbellekten dönen yanıtlar sağlayıcıya gitmediği için token sayılmaz;
+    # cached_tokens prefix cache isabetini gösterir.
+    if resp.headers.get("x-llm-cache") != "hit":
+        model = body.get("model", LLM_MODEL)
+        record_openai_usage(LLM_PROVIDER, model, data.get("usage"))
+        if _USAGE is not None:
+            _USAGE.record_response(model, body.get("messages") or [], data)
+    return data
+
+
 def _call_llm_json(system_prompt: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
     """
     JSON output bekleyen chat/completions çağrısı.
@@ -196,15 +243,7 @@ def _call_llm_json(system_prompt: str, messages: List[Dict[str, str]]) -> Dict[s
         "response_format": {"type": "json_object"},
     }
 
-    url = LLM_BASE_URL.rstrip("/") + "/chat/completions"
-    headers = {
-        "Content-Type": "application/json; charset=utf-8",
-        "Authorization": f"Bearer {LLM_API_KEY}",
-    }
-
-    resp = requests.post(url, headers=headers, json=body, timeout=90)
-    resp.raise_for_status()
-    data = resp.json()
+    data = _post_chat_completion(body)
     content = (data.get("choices") or [{}])[0].get("message", {}).get("content") or ""
     return _parse_json_from_llm(content)
 
@@ -232,15 +271,7 @@ def _call_llm_tools(
         "tool_choice": "auto",
     }
 
-    url = LLM_BASE_URL.rstrip("/") + "/chat/completions"
-    headers = {
-        "Content-Type": "application/json; charset=utf-8",
-        "Authorization": f"Bearer {LLM_API_KEY}",
-    }
-
-    resp = requests.post(url, headers=headers, json=body, timeout=90)
-    resp.raise_for_status()
-    return resp.json()
+    return _post_chat_completion(body)
 
 
 def _extract_assistant_message_and_tool_calls(
@@ -268,7 +299,8 @@ def _safe_json_loads(s: Any) -> Dict[str, Any]:
 
 def _tools_for_step(step: str) -> List[Dict[str, Any]]:
     """
-    Her adımda sadece ilgili alanı yazdıracak tool verilir.
+    Adımın alanını yazdıran tool(lar). LLM'e her adımda _STEP_TOOLS gönderilir;
+    bu liste adımda kabul edilecek tool çağrılarını belirler.
     """
     if step == "kanallar":
         return [
@@ -354,6 +386,29 @@ def _tools_for_step(step: str) -> List[Dict[str, Any]]:
     ]
 
 
+def _all_step_tools() -> List[Dict[str, Any]]:
+    """
+    Tüm adımların tool'ları, sabit sırada ve adımdan bağımsız açıklamayla.
+    Her istekte aynı tool listesi gönderildiği için sağlayıcı prefix cache'i
+    adım değişse de geçerli kalır.
+    """
+    tools: List[Dict[str, Any]] = []
+    seen: set[str] = set()
+    for step in STEP_ORDER:
+        for tool in _tools_for_step(step):
+            name = tool["function"]["name"]
+            if name in seen:
+                continue
+            seen.add(name)
+            if name == "set_text_field":
+                tool["function"]["description"] = "Mevcut adımın metin alanını doldurur/günceller."
+            tools.append(tool)
+    return tools
+
+
+_STEP_TOOLS = _all_step_tools()
+
+
 def _default_question_for_step(step: str) -> str:
     """
     Bazı modeller tool_call yapıp content boş dönebilir.
@@ -374,15 +429,13 @@ def _default_question_for_step(step: str) -> str:
     return prompts.get(step, "Devam edebilmem için biraz daha detay paylaşır mısınız?")
 
 
-def _build_step_system_prompt(current_step: str, fields: Dict[str, Any]) -> str:
-    step_prompt = STEP_PROMPTS.get(current_step, STEP_PROMPTS[STEP_ORDER[0]])
-    fields_summary = _summarize_fields(fields)
-    return f"""
-Mevcut toplanan alanlar:
-{fields_summary}
-
-Şu anki adım: {current_step}
-Görev: {step_prompt}
+# Sabit sistem promptu: adımdan ve alanlardan bağımsızdır, böylece her istekte
+# byte-byte aynı prefix oluşur (vLLM/OpenAI prefix cache). Değişken bilgiler
+# (adım, görev, toplanan alanlar) _build_step_context ile sona eklenir.
+STEP_SYSTEM_PROMPT = """
+Fikir formunu adım adım dolduran bir analist asistansın.
+Her turda mevcut adım, görev ve toplanan alanlar, kullanıcının son mesajından
+hemen önceki "Form durumu" mesajında verilir.
 
 Kurallar:
 - Kullanıcıya sadece 1 soru sor.
@@ -392,9 +445,38 @@ Kurallar:
 
 Tool Kullanımı:
 - Bu adımın alanını doldurabiliyorsan, mutlaka ilgili tool'u çağır.
+- Sadece "Form durumu" mesajında belirtilen tool'u kullan.
 - Tool argümanlarında sadece ilgili alanı gönder.
 - Kullanıcıya göstereceğin mesajı normal içerik (content) olarak yaz.
 """
+
+
+def _build_step_context(current_step: str, fields: Dict[str, Any]) -> str:
+    step_prompt = STEP_PROMPTS.get(current_step, STEP_PROMPTS[STEP_ORDER[0]])
+    tool_names = ", ".join(t["function"]["name"] for t in _tools_for_step(current_step)) or "-"
+    return f"""Form durumu
+
+Mevcut toplanan alanlar:
+{_summarize_fields(fields)}
+
+Şu anki adım: {current_step}
+Görev: {step_prompt}
+Bu adımın tool'u: {tool_names}"""
+
+
+def _step_messages(
+    messages: List[Dict[str, str]],
+    current_step: str,
+    fields: Dict[str, Any],
+) -> List[Dict[str, str]]:
+    """
+    Geçmiş mesajlar olduğu gibi kalır; adım bağlamı son kullanıcı mesajından
+    hemen önce eklenir, böylece sabit prefix geçmişle birlikte büyür.
+    """
+    context = {"role": "system", "content": _build_step_context(current_step, fields)}
+    return [*messages[:-1], context, *messages[-1:]]
+
+
 mcp = FastMCP("flow-analyst-server")
 
 
@@ -438,6 +520,7 @@ async def submit_idea_form(
 def flow_analyst_step_core(
     question: str,
     thread_id: Optional[str] = None,
+    tenant_id: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Step-based core iş mantığı (CLI ve MCP ortak).
@@ -447,8 +530,16 @@ def flow_analyst_step_core(
     - thread_id varsa cache'den state yükler.
     - current_step'e göre LLM'e kısa prompt + state özeti gönderir.
     - JSON çıktı ile fields merge edilir, step ilerletilir, history güncellenir.
+
+    LLM token'ları tenant_id'ye yazılır; tenant bütçesi dolmuşsa
+    QuotaExceededError fırlatılır.
     """
     tid = thread_id or str(uuid.uuid4())
+    with usage_scope(tenant_id):
+        return _flow_analyst_step(question, tid)
+
+
+def _flow_analyst_step(question: str, tid: str) -> Dict[str, Any]:
     state = _STATE_CACHE.get(tid) or _new_state()
 
     current_step = state.get("current_step") or STEP_ORDER[0]
@@ -461,29 +552,29 @@ def flow_analyst_step_core(
         msgs.extend(history[-6:])
     msgs.append({"role": "user", "content": question})
 
-    # Step-based akışta sistem promptu SADECE ilgili adım promptudur
-    system_prompt = _build_step_system_prompt(current_step=current_step, fields=fields)
-    tools = _tools_for_step(current_step)
-
     assistant_message = ""
     extracted: Dict[str, Any] = {}
     is_confirmed = False
 
     def run_llm_for_step(step: str) -> tuple[str, Dict[str, Any], bool]:
-        sp = _build_step_system_prompt(current_step=step, fields=fields)
+        step_msgs = _step_messages(msgs, step, fields)
         t = _tools_for_step(step)
 
         if t:
-            raw = _call_llm_tools(sp, msgs, t)
+            raw = _call_llm_tools(STEP_SYSTEM_PROMPT, step_msgs, _STEP_TOOLS)
             content, tool_calls = _extract_assistant_message_and_tool_calls(raw)
 
             local_extracted: Dict[str, Any] = {}
             local_confirmed = False
+            allowed = {tool["function"]["name"] for tool in t}
 
             for tc in tool_calls:
                 fn = (tc.get("function") or {}) if isinstance(tc, dict) else {}
                 name = fn.get("name")
                 args = _safe_json_loads(fn.get("arguments"))
+                if name not in allowed:
+                    # Tüm tool'lar gönderilir; başka adımın tool'u yok sayılır
+                    continue
 
                 if name == "set_text_field":
                     val = (args.get("value") or "").strip() if isinstance(args, dict) else ""
@@ -509,7 +600,7 @@ def flow_analyst_step_core(
 
             # Tool call gelmediyse fallback: JSON-mode ile dene (tek sefer)
             if not local_extracted and not local_confirmed and not content:
-                j = _call_llm_json(sp, msgs)
+                j = _call_llm_json(STEP_SYSTEM_PROMPT, step_msgs)
                 content = (j.get("assistant_message") or "").strip()
                 local_extracted = j.get("extracted") or {}
                 local_confirmed = bool(j.get("is_confirmed"))
@@ -517,7 +608,7 @@ def flow_analyst_step_core(
             return content, local_extracted, local_confirmed
 
         # Safety fallback (normalde STEP_ORDER hepsi tool'a sahip)
-        j = _call_llm_json(sp, msgs)
+        j = _call_llm_json(STEP_SYSTEM_PROMPT, step_msgs)
         return (
             (j.get("assistant_message") or "").strip(),
             j.get("extracted") or {},
@@ -595,8 +686,9 @@ def flow_analyst_step_core(
 async def flow_analyst_step(
     question: str,
     thread_id: Optional[str] = None,
+    tenant_id: Optional[str] = None,
 ) -> Dict[str, Any]:
-    return flow_analyst_step_core(question=question, thread_id=thread_id)
+    return flow_analyst_step_core(question=question, thread_id=thread_id, tenant_id=tenant_id)
 
 
 if __name__ == "__main__":